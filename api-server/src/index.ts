@@ -1,15 +1,17 @@
 import express from 'express';
 import cors from 'cors';
 import morgan from 'morgan';
-import patternsRouter from './routes/patterns.js';
+import patternsRouter, { batchRouter } from './routes/patterns.js';
 import { config } from './config/index.js';
 import { errorHandler } from './middleware/errorHandler.js';
 
 const app = express();
 
 app.use(cors());
-app.use(express.json());
 app.use(morgan('dev'));
+// Batches stream through to the engine unparsed, so they bypass express.json().
+app.use('/api/patterns/analyze/batch', batchRouter);
+app.use(express.json());
 
 app.get('/health', (_req, res) => {
   res.json({ status: 'ok' });
@@ -1,8 +1,33 @@
 import { Router } from 'express';
+import type { Request, Response } from 'express';
+import { Readable } from 'node:stream';
+import type { ReadableStream } from 'node:stream/web';
 import { config } from '../config/index.js';
 
 const router = Router();
 
+// Engine response headers passed back to clients: queue backpressure and cache status.
+const FORWARDED_HEADERS = ['retry-after', 'x-cache'];
+
+function engineHeaders(req: Request, contentType: string): Record<string, string> {
+  const headers: Record<string, string> = { 'Content-Type': contentType };
+  const bypass = req.get('x-cache-bypass');
+  if (bypass) {
+    headers['X-Cache-Bypass'] = bypass;
+  }
+  return headers;
+}
+
+function forwardEngineResponse(response: globalThis.Response, res: Response) {
+  res.status(response.status);
+  for (const name of FORWARDED_HEADERS) {
+    const value = response.headers.get(name);
+    if (value !== null) {
+      res.set(name, value);
+    }
+  }
+}
+
 router.get('/', (_req, res) => {
   res.json({
     status: 'ok',
@@ -19,14 +44,40 @@ router.post('/analyze', async (req, res, next) => {
   try {
     const response = await fetch(`${config.pythonEngineUrl}/analyze`, {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers: engineHeaders(req, 'application/json'),
       body: JSON.stringify(req.body || {})
     });
     const payload = await response.json();
+    forwardEngineResponse(response, res);
     res.json(payload);
   } catch (error) {
     next(error);
   }
 });
 
+// Mounted ahead of express.json() in index.ts: JSON arrays and NDJSON bodies
+// are both piped to the engine unread, so batch size is not bounded by the
+// JSON parser's body limit and nothing is buffered here.
+export const batchRouter = Router();
+
+batchRouter.post('/', async (req, res, next) => {
+  try {
+    const response = await fetch(`${config.pythonEngineUrl}/analyze/batch`, {
+      method: 'POST',
+      headers: engineHeaders(req, req.get('content-type') || 'application/x-ndjson'),
+      body: Readable.toWeb(req) as unknown as RequestInit['body'],
+      duplex: 'half'
+    } as RequestInit);
+    forwardEngineResponse(response, res);
+    res.type(response.headers.get('content-type') || 'application/x-ndjson');
+    if (!response.body) {
+      res.end();
+      return;
+    }
+    Readable.fromWeb(response.body as unknown as ReadableStream).pipe(res);
+  } catch (error) {
+    next(error);
+  }
+});
+
 export default router;
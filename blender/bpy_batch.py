@@ -0,0 +1,98 @@
+"""
+Blender Batch Adapter
+Writes stroke_geometry arrays into Blender data blocks with foreach_set
+One call per batch instead of one bpy call per vertex, stroke or keyframe.
+Author: ŊOB Universe
+"""
+
+import bpy
+import numpy as np
+
+from stroke_geometry import keyframe_coords
+
+def _link(obj, collection=None):
+    (collection or bpy.context.collection).objects.link(obj)
+    return obj
+
+def stroke_material(color):
+    """Flat RGB(A) ``color`` material, shared by every stroke of that colour"""
+    color = tuple(float(c) for c in color) + (1.0,) * (4 - len(color))
+    name = 'Stroke' + ''.join(f'_{c:.3f}' for c in color)
+    material = bpy.data.materials.get(name)
+    if material is None:
+        material = bpy.data.materials.new(name=name)
+        material.diffuse_color = color  # solid viewport colour
+        material.use_nodes = True
+        material.node_tree.nodes['Principled BSDF'].inputs[0].default_value = color
+    return material
+
+def mesh_object(name, geometry, material=None, collection=None):
+    """A single edge mesh object holding every stroke of ``geometry``"""
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(geometry.vertices))
+    mesh.vertices.foreach_set('co', geometry.vertices.ravel())
+    mesh.edges.add(len(geometry.edges))
+    mesh.edges.foreach_set('vertices', geometry.edges.ravel())
+    mesh.update()
+    if material is not None:
+        mesh.materials.append(material)
+    return _link(bpy.data.objects.new(name, mesh), collection)
+
+def curve_object(name, geometry, thickness=0.1, material=None, collection=None):
+    """A single curve object with one bevelled POLY spline per non-empty stroke"""
+    curve = bpy.data.curves.new(name=name, type='CURVE')
+    curve.dimensions = '3D'
+    curve.resolution_u = 12
+    curve.bevel_depth = thickness / 2
+    if material is not None:
+        curve.materials.append(material)
+    for stroke in geometry.strokes():
+        if not len(stroke):
+            continue  # a spline starts with one point; it cannot be empty
+        spline = curve.splines.new('POLY')
+        spline.points.add(len(stroke) - 1)
+        co = np.ones((len(stroke), 4), dtype=np.float32)
+        co[:, :3] = stroke
+        spline.points.foreach_set('co', co.ravel())
+    return _link(bpy.data.objects.new(name, curve), collection)
+
+def text_objects(texts, locations, sizes=1.0, font=None, collection=None):
+    """Text objects built from data blocks directly, without bpy.ops"""
+    sizes = np.broadcast_to(np.asarray(sizes, dtype=np.float64), (len(texts),))
+    objects = []
+    for text, location, size in zip(texts, locations, sizes):
+        data = bpy.data.curves.new(name='Text', type='FONT')
+        data.body = text
+        data.size = size
+        if font is not None:
+            data.font = font
+        obj = bpy.data.objects.new('Text', data)
+        obj.location = location
+        obj.scale = (size, size, size)
+        objects.append(_link(obj, collection))
+    return objects
+
+def _fcurve(action, obj, data_path, index):
+    if hasattr(action, 'fcurve_ensure_for_datablock'):  # Blender 4.4+ layered actions
+        return action.fcurve_ensure_for_datablock(obj, data_path, index=index)
+    return action.fcurves.find(data_path, index=index) or action.fcurves.new(data_path, index=index)
+
+def insert_keyframes(obj, data_path, frames, values):
+    """Key every channel of ``data_path`` at all ``frames`` in one foreach_set per fcurve
+
+    ``values`` is (k,) for a scalar property or (k, channels) for a vector
+    one; keys are added to any already on the fcurves.
+    """
+    animation = obj.animation_data or obj.animation_data_create()
+    if animation.action is None:
+        animation.action = bpy.data.actions.new(f'{obj.name}Action')
+    for index, coords in enumerate(keyframe_coords(frames, values)):
+        fcurve = _fcurve(animation.action, obj, data_path, index)
+        points = fcurve.keyframe_points
+        existing = len(points)
+        points.add(len(coords) // 2)
+        merged = np.empty(2 * len(points), dtype=np.float32)
+        points.foreach_get('co', merged)
+        merged[2 * existing:] = coords
+        points.foreach_set('co', merged)
+        fcurve.update()
@@ -4,10 +4,29 @@ Dynamic pen/writing engine for conceptual diagrams
 Author: ŊOB Universe
 """
 
+import sys
+from pathlib import Path
+
 import bpy
 import bmesh
 from mathutils import Vector
 
+def _script_dir():
+    """Folder holding stroke_geometry.py and bpy_batch.py
+
+    Run from Blender's Text Editor, ``__file__`` names the text block rather
+    than a file on disk, so fall back to the folder of the saved .blend file.
+    """
+    here = Path(__file__).resolve().parent
+    if (here / 'stroke_geometry.py').exists():
+        return here
+    return Path(bpy.path.abspath('//'))
+
+sys.path.insert(0, str(_script_dir()))
+
+import stroke_geometry
+from bpy_batch import curve_object, insert_keyframes, stroke_material, text_objects
+
 class PenWriter:
     """Write text and create dynamic pen strokes"""
     
@@ -17,57 +36,40 @@ class PenWriter:
     
     def write_text(self, text, location, size=1.0, font_file=None):
         """Write text object in 3D space"""
-        bpy.ops.object.text_add(location=location)
-        text_obj = bpy.context.active_object
-        text_obj.data.body = text
-        text_obj.data.size = size
-        text_obj.scale = (size, size, size)
-        
-        if font_file:
-            text_obj.data.font = bpy.data.fonts.load(font_file)
-        
-        self.text_objects.append(text_obj)
-        return text_obj
+        return self.write_texts([text], [location], size, font_file)[0]
+    
+    def write_texts(self, texts, locations, sizes=1.0, font_file=None):
+        """Write many text objects, loading the font once"""
+        font = bpy.data.fonts.load(font_file, check_existing=True) if font_file else None
+        objs = text_objects(texts, locations, sizes, font)
+        self.text_objects.extend(objs)
+        return objs
     
     def create_pen_stroke(self, points, thickness=0.1, color=(0, 0, 0, 1)):
         """Create a pen stroke from points"""
-        curve = bpy.data.curves.new(name="PenStroke", type='CURVE')
-        curve.dimensions = '3D'
-        curve.resolution_u = 12
-        
-        polyline = curve.splines.new('POLY')
-        polyline.points.add(len(points) - 1)
-        
-        for i, point in enumerate(points):
-            polyline.points[i].co = (point.x, point.y, point.z, 1)
-        
-        curve_obj = bpy.data.objects.new("PenStroke", curve)
-        bpy.context.collection.objects.link(curve_obj)
-        
-        # Bevel for thickness
-        curve.bevel_depth = thickness / 2
-        
-        self.strokes.append(curve_obj)
-        return curve_obj
+        return self.create_pen_strokes([points], thickness, color)
+    
+    def create_pen_strokes(self, strokes, thickness=0.1, color=(0, 0, 0, 1)):
+        """Create many pen strokes as one curve object, one spline per stroke"""
+        return self._add_strokes(stroke_geometry.polylines(strokes), thickness, color)
     
     def draw_path(self, start, end, num_points=20):
         """Draw curved path between two points"""
-        points = []
-        for i in range(num_points):
-            t = i / (num_points - 1)
-            # Quadratic interpolation for smooth curve
-            point = start.lerp(end, t) + Vector((0, 0, 0.1 * __import__('math').sin(t * 3.14159)))
-            points.append(point)
-        
-        return self.create_pen_stroke(points)
+        return self.draw_paths([start], [end], num_points)
+    
+    def draw_paths(self, starts, ends, num_points=20, thickness=0.1):
+        """Draw many curved paths as one curve object"""
+        return self._add_strokes(stroke_geometry.arcs(starts, ends, num_points), thickness)
+    
+    def _add_strokes(self, geometry, thickness, color=(0, 0, 0, 1)):
+        curve_obj = curve_object("PenStroke", geometry, thickness, stroke_material(color))
+        self.strokes.append(curve_obj)
+        return curve_obj
     
     def animate_write(self, text_obj, start_frame, end_frame):
         """Animate text being written"""
-        text_obj.scale = (0.01, 0.01, 0.01)
-        text_obj.keyframe_insert(data_path="scale", frame=start_frame)
-        
+        insert_keyframes(text_obj, "scale", [start_frame, end_frame], [(0.01, 0.01, 0.01), (1, 1, 1)])
         text_obj.scale = (1, 1, 1)
-        text_obj.keyframe_insert(data_path="scale", frame=end_frame)
     
     def compose_diagram(self, title, elements):
         """Create a complete diagram with title and elements"""
@@ -75,9 +77,8 @@ class PenWriter:
         title_obj = self.write_text(title, Vector((0, 5, 0)), size=2.0)
         
         # Add elements
-        for i, element in enumerate(elements):
-            pos = Vector((i * 3 - 3, 0, 0))
-            self.write_text(element, pos, size=1.0)
+        positions = [Vector((i * 3 - 3, 0, 0)) for i in range(len(elements))]
+        self.write_texts(elements, positions, sizes=1.0)
         
         print(f"Diagram '{title}' created with {len(elements)} elements")
 
@@ -89,8 +90,7 @@ def main():
     title = writer.write_text("ŊOB Concepts", Vector((0, 5, 0)), size=2.0)
     
     # Draw paths
-    writer.draw_path(Vector((-2, 0, 0)), Vector((2, 0, 0)))
-    writer.draw_path(Vector((0, 2, 0)), Vector((0, -2, 0)))
+    writer.draw_paths([Vector((-2, 0, 0)), Vector((0, 2, 0))], [Vector((2, 0, 0)), Vector((0, -2, 0))])
     
     # Compose diagram
     concepts = ["Ripple", "Harmonic", "Emotion"]
@@ -0,0 +1,120 @@
+"""
+Stroke Geometry
+Batched vertex/edge arrays for whiteboard and pen-writer drawings
+Pure NumPy, so it runs and can be checked outside Blender; bpy_batch.py
+writes the arrays into Blender data blocks.
+Author: ŊOB Universe
+"""
+
+import numpy as np
+
+class Geometry:
+    """Vertices (n, 3) and edges (m, 2) of one or more strokes
+
+    ``offsets`` holds the first vertex of every stroke plus the total, so
+    stroke ``i`` owns ``vertices[offsets[i]:offsets[i + 1]]``.
+    """
+
+    def __init__(self, vertices, edges, offsets):
+        self.vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self.edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __add__(self, other):
+        return concat([self, other])
+
+    def stroke(self, index):
+        """Vertices of one stroke"""
+        return self.vertices[self.offsets[index]:self.offsets[index + 1]]
+
+    def strokes(self):
+        """Vertices of every stroke, as views into ``vertices``"""
+        return np.split(self.vertices, self.offsets[1:-1])
+
+def empty():
+    return Geometry(np.empty((0, 3)), np.empty((0, 2)), [0])
+
+def concat(parts):
+    """One Geometry holding the strokes of all ``parts``, in order"""
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return empty()
+    bases = np.cumsum([0] + [len(part.vertices) for part in parts])
+    return Geometry(
+        np.concatenate([part.vertices for part in parts]),
+        np.concatenate([part.edges + base for part, base in zip(parts, bases)]),
+        np.concatenate([[0]] + [part.offsets[1:] + base for part, base in zip(parts, bases)])
+    )
+
+def polyline_edges(counts, closed=False):
+    """Edges joining consecutive vertices of strokes with ``counts`` vertices each
+
+    Closed strokes of three or more vertices also join their last vertex
+    back to the first.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    total = int(counts.sum())
+    first = np.arange(total)
+    last = np.repeat(starts + counts - 1, counts)
+    if closed:
+        second = np.where(first == last, np.repeat(starts, counts), first + 1)
+        keep = (first != last) | np.repeat(counts > 2, counts)
+    else:
+        second = first + 1
+        keep = first != last
+    return np.column_stack([first[keep], second[keep]])
+
+def _points(values):
+    return np.asarray(values, dtype=np.float64).reshape(-1, 3)
+
+def circles(centers, radii, segments=32, lift=0.01):
+    """Closed ``segments``-gons around ``centers`` (n, 3), raised ``lift`` off the board"""
+    centers = _points(centers)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(centers),))
+    angles = np.linspace(0.0, 2 * np.pi, segments, endpoint=False)
+    ring = np.column_stack([np.cos(angles), np.sin(angles), np.zeros(segments)])
+    vertices = centers[:, None, :] + radii[:, None, None] * ring[None]
+    vertices[..., 2] += lift
+    counts = np.full(len(centers), segments)
+    return Geometry(vertices.reshape(-1, 3), polyline_edges(counts, closed=True), np.arange(len(centers) + 1) * segments)
+
+def lines(starts, ends):
+    """Straight segments from ``starts`` to ``ends`` (n, 3 each)"""
+    starts, ends = _points(starts), _points(ends)
+    vertices = np.stack([starts, ends], axis=1).reshape(-1, 3)
+    edges = np.arange(2 * len(starts)).reshape(-1, 2)
+    return Geometry(vertices, edges, np.arange(len(starts) + 1) * 2)
+
+def arcs(starts, ends, num_points=20, height=0.1):
+    """Paths from ``starts`` to ``ends`` bowed up by ``height * sin(pi * t)`` in z"""
+    starts, ends = _points(starts), _points(ends)
+    t = np.linspace(0.0, 1.0, num_points)
+    vertices = starts[:, None, :] + t[None, :, None] * (ends - starts)[:, None, :]
+    vertices[..., 2] += height * np.sin(np.pi * t)
+    counts = np.full(len(starts), num_points)
+    return Geometry(vertices.reshape(-1, 3), polyline_edges(counts), np.arange(len(starts) + 1) * num_points)
+
+def polylines(strokes):
+    """Open strokes from a list of (k_i, 3) point arrays"""
+    strokes = [_points(stroke) for stroke in strokes]
+    if not strokes:
+        return empty()
+    counts = [len(stroke) for stroke in strokes]
+    return Geometry(np.concatenate(strokes), polyline_edges(counts), np.concatenate([[0], np.cumsum(counts)]))
+
+def keyframe_coords(frames, values):
+    """Interleaved (frame, value) arrays for ``keyframe_points.foreach_set('co', ...)``
+
+    ``values`` is (k,) or (k, channels); the result has one flat float32 row
+    of length 2k per channel.
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32).reshape(len(frames), -1)
+    coords = np.empty((values.shape[1], len(frames), 2), dtype=np.float32)
+    coords[:, :, 0] = frames
+    coords[:, :, 1] = values.T
+    return coords.reshape(values.shape[1], -1)
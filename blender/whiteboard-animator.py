@@ -4,11 +4,30 @@ Animate whiteboard drawings and conceptual diagrams
 Author: ŊOB Universe
 """
 
+import sys
+from pathlib import Path
+
 import bpy
 import bmesh
 from mathutils import Vector, Matrix
 import random
 
+def _script_dir():
+    """Folder holding stroke_geometry.py and bpy_batch.py
+
+    Run from Blender's Text Editor, ``__file__`` names the text block rather
+    than a file on disk, so fall back to the folder of the saved .blend file.
+    """
+    here = Path(__file__).resolve().parent
+    if (here / 'stroke_geometry.py').exists():
+        return here
+    return Path(bpy.path.abspath('//'))
+
+sys.path.insert(0, str(_script_dir()))
+
+import stroke_geometry
+from bpy_batch import insert_keyframes, mesh_object, stroke_material
+
 class WhiteboardAnimator:
     """Animate 2D drawings on a whiteboard plane"""
     
@@ -34,46 +53,28 @@ class WhiteboardAnimator:
     
     def draw_circle(self, center, radius, color=(0.1, 0.1, 0.1, 1.0)):
         """Draw a circle"""
-        vertices = []
-        edges = []
-        
-        for i in range(32):
-            angle = (i / 32) * 2 * 3.14159
-            x = center.x + radius * __import__('math').cos(angle)
-            y = center.y + radius * __import__('math').sin(angle)
-            z = center.z + 0.01
-            vertices.append((x, y, z))
-            
-            if i < 31:
-                edges.append((i, i + 1))
-            else:
-                edges.append((i, 0))
-        
-        mesh = bpy.data.meshes.new("Circle")
-        mesh.from_pydata(vertices, edges, [])
-        
-        obj = bpy.data.objects.new("Circle", mesh)
-        bpy.context.collection.objects.link(obj)
-        
+        return self.draw_circles([center], [radius], color)
+    
+    def draw_circles(self, centers, radii, color=(0.1, 0.1, 0.1, 1.0), segments=32):
+        """Draw many circles as one mesh"""
+        obj = mesh_object("Circle", stroke_geometry.circles(centers, radii, segments), stroke_material(color))
+        self.drawing_objects.append(obj)
         return obj
     
     def draw_line(self, start, end, color=(0, 0, 0, 1)):
         """Draw a line"""
-        mesh = bpy.data.meshes.new("Line")
-        mesh.from_pydata([start, end], [(0, 1)], [])
-        
-        obj = bpy.data.objects.new("Line", mesh)
-        bpy.context.collection.objects.link(obj)
-        
+        return self.draw_lines([start], [end], color)
+    
+    def draw_lines(self, starts, ends, color=(0, 0, 0, 1)):
+        """Draw many lines as one mesh"""
+        obj = mesh_object("Line", stroke_geometry.lines(starts, ends), stroke_material(color))
+        self.drawing_objects.append(obj)
         return obj
     
     def animate_draw(self, obj, start_frame, end_frame):
         """Animate object appearing"""
-        obj.scale = (0, 0, 1)
-        obj.keyframe_insert(data_path="scale", frame=start_frame)
-        
+        insert_keyframes(obj, "scale", [start_frame, end_frame], [(0, 0, 1), (1, 1, 1)])
         obj.scale = (1, 1, 1)
-        obj.keyframe_insert(data_path="scale", frame=end_frame)
     
     def render_animation(self, output_path="/tmp/animation.mp4"):
         """Set up rendering"""
@@ -0,0 +1,92 @@
+"""
+Analysis routines shared by the single and batched /analyze endpoints.
+"""
+
+import numpy as np
+
+from .metrics import stage_timer
+from .waveform import KIND_SPECTRUM, WaveformFormatError, decode_waveform, encode_frame, validate_waveform
+
+MAX_FLOAT = float(np.finfo(np.float64).max)
+
+
+def spectrum_metrics(magnitude: np.ndarray, freqs: np.ndarray, n: int) -> dict:
+    """Summary metrics of the one-sided spectrum of ``n`` real samples."""
+    total = magnitude.sum(dtype=np.float64)
+    # Harmonic energy keeps its two-sided definition, as in RippleLab: every
+    # bin except DC (and Nyquist for even n) appears twice in the full spectrum.
+    two_sided = total + magnitude[1:(n + 1) // 2].sum(dtype=np.float64)
+    with np.errstate(over="ignore"):
+        energy = min(float(two_sided ** 2 / n), MAX_FLOAT)
+    peak = int(np.argmax(magnitude))
+    return {
+        "peak_frequency": float(freqs[peak]),
+        "peak_magnitude": float(magnitude[peak]),
+        "harmonic_energy": energy,
+        "spectral_centroid": float(freqs @ magnitude / total) if total > 0 else 0.0
+    }
+
+
+@stage_timer("spectrum")
+def spectrum(waveform: np.ndarray, sample_rate: float) -> tuple[dict, np.ndarray]:
+    """One-sided magnitude spectrum of a real waveform plus summary metrics."""
+    validate_waveform(waveform, sample_rate)
+    freqs = np.fft.rfftfreq(waveform.size, 1 / sample_rate)
+    with np.errstate(over="ignore", invalid="ignore"):  # caught by the check below
+        magnitude = np.abs(np.fft.rfft(waveform))
+        metrics = spectrum_metrics(magnitude, freqs, waveform.size)
+    if not np.isfinite(list(metrics.values())).all():
+        raise WaveformFormatError("waveform amplitude is too large to analyze")
+    return metrics, magnitude
+
+
+@stage_timer("analyze")
+def analyze_payload(payload: dict | None) -> dict:
+    result = {
+        "status": "processed",
+        "received": payload or {},
+        "summary": "Placeholder analysis from Python engine"
+    }
+    if payload and "waveform" in payload and "sample_rate" in payload:
+        try:
+            waveform = np.asarray(payload["waveform"], dtype=np.float64)
+            result["spectrum"], _ = spectrum(waveform, float(payload["sample_rate"]))
+        except (TypeError, ValueError) as exc:  # WaveformFormatError is a ValueError
+            result.update(status="error", error=f"invalid waveform: {exc}")
+    return result
+
+
+def analyze_many(payloads: list[dict | None]) -> list[dict]:
+    """Analyze a micro-batch of payloads, preserving input order."""
+    return [analyze_payload(payload) for payload in payloads]
+
+
+@stage_timer("analyze")
+def analyze_waveform(
+    body: bytes,
+    content_type: str,
+    sample_rate: float | None,
+    with_spectrum: bool = False
+) -> tuple[dict, bytes | None]:
+    """Analyze a binary waveform body.
+
+    Returns the JSON result and, if ``with_spectrum`` is set, the magnitude
+    spectrum as a NOBW frame in the waveform's dtype.
+    """
+    waveform, rate = decode_waveform(body, content_type, sample_rate)
+    metrics, magnitude = spectrum(waveform, rate)
+    result = {
+        "status": "processed",
+        "samples": int(waveform.size),
+        "sample_rate": rate,
+        "spectrum": metrics
+    }
+    frame = None
+    if with_spectrum:
+        frame = encode_frame(magnitude.astype(waveform.dtype, copy=False), rate / waveform.size, KIND_SPECTRUM)
+    return result, frame
+
+
+def analyze_waveform_result(body: bytes, content_type: str, sample_rate: float | None) -> dict:
+    result, _ = analyze_waveform(body, content_type, sample_rate)
+    return result
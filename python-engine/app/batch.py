@@ -0,0 +1,190 @@
+"""
+Request parsing and NDJSON streaming for POST /analyze/batch.
+
+A batch body is either a JSON array of AnalyzeRequest objects or an NDJSON
+stream with one AnalyzeRequest per line. Items are grouped into micro-batches
+and results are streamed back as NDJSON in input order, one line per item.
+"""
+
+import json
+from collections.abc import AsyncIterator
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+
+from .analysis import analyze_many
+from .cache import ResultCache, canonical_key
+from .executor import AnalysisExecutor
+from .models import AnalyzeRequest
+from .neighbors import PatternIndex, with_nearest
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Each parsed item is either a validated request or the reason it was rejected.
+BatchItem = AnalyzeRequest | str
+
+
+class BatchStreamingResponse(StreamingResponse):
+    """StreamingResponse that leaves ``receive`` to the body iterator.
+
+    The stock implementation listens for client disconnects concurrently with
+    streaming, which would swallow the NDJSON request chunks the iterator is
+    still reading. A disconnect surfaces through ``request.stream()`` instead.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def _parse_item(raw) -> BatchItem:
+    try:
+        return AnalyzeRequest.model_validate(raw)
+    except ValidationError as exc:
+        return f"invalid item: {exc.errors()[0]['msg']}"
+
+
+def _parse_line(line: bytes) -> BatchItem:
+    try:
+        raw = json.loads(line)
+    except ValueError as exc:
+        return f"invalid JSON: {exc}"
+    return _parse_item(raw)
+
+
+async def _iter_array(items: list) -> AsyncIterator[BatchItem]:
+    for raw in items:
+        yield _parse_item(raw)
+
+
+async def _iter_ndjson(request: Request) -> AsyncIterator[BatchItem]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+async def read_batch(request: Request) -> AsyncIterator[BatchItem]:
+    """Return the items of a batch request without buffering NDJSON bodies."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        try:
+            items = json.loads(await request.body())
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"invalid JSON: {exc}")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="batch body must be a JSON array")
+        return _iter_array(items)
+    return _iter_ndjson(request)
+
+
+def _encode(batch: list[BatchItem], results: list[dict], start: int) -> list[bytes]:
+    remaining = iter(results)
+    lines = []
+    for offset, item in enumerate(batch):
+        if isinstance(item, AnalyzeRequest):
+            record = {"index": start + offset, **next(remaining)}
+        else:
+            record = {"index": start + offset, "status": "error", "error": item}
+        lines.append(json.dumps(record).encode() + b"\n")
+    return lines
+
+
+async def _analyze(
+    executor: AnalysisExecutor,
+    cache: ResultCache | None,
+    payloads: list[dict | None]
+) -> list[dict]:
+    keys = [canonical_key(payload) for payload in payloads] if cache is not None else []
+    results = await cache.aget_many(keys) if cache is not None else [None] * len(payloads)
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed, failed = await _analyze_missing(executor, [payloads[i] for i in missing])
+        for i, result in zip(missing, computed):
+            results[i] = result
+        if cache is not None:
+            await cache.aput_many([
+                (keys[i], result) for position, (i, result) in enumerate(zip(missing, computed))
+                if position not in failed
+            ])
+    return results
+
+
+async def _analyze_missing(
+    executor: AnalysisExecutor,
+    payloads: list[dict | None]
+) -> tuple[list[dict], set[int]]:
+    """Results for a micro-batch and the positions that failed outright.
+
+    If the batch job raises, each item is retried alone so one bad payload
+    cannot discard the rest; an item that still fails becomes an error record
+    instead of ending the stream. Headers are already sent, so this waits for
+    a queue slot rather than rejecting.
+    """
+    try:
+        return await executor.submit(analyze_many, payloads, wait=True), set()
+    except Exception:
+        pass
+    results, failed = [], set()
+    for position, payload in enumerate(payloads):
+        try:
+            results.extend(await executor.submit(analyze_many, [payload], wait=True))
+        except Exception as exc:
+            failed.add(position)
+            results.append({"status": "error", "error": f"analysis failed: {type(exc).__name__}: {exc}"})
+    return results, failed
+
+
+async def _flush(
+    executor: AnalysisExecutor,
+    cache: ResultCache | None,
+    batch: list[BatchItem],
+    start: int,
+    index: PatternIndex | None,
+    neighbors: int
+) -> list[bytes]:
+    payloads = [item.payload for item in batch if isinstance(item, AnalyzeRequest)]
+    results = await _analyze(executor, cache, payloads)
+    results = [with_nearest(result, payload, index, neighbors) for result, payload in zip(results, payloads)]
+    return _encode(batch, results, start)
+
+
+async def stream_results(
+    items: AsyncIterator[BatchItem],
+    executor: AnalysisExecutor,
+    cache: ResultCache | None,
+    batch_size: int,
+    index: PatternIndex | None = None,
+    neighbors: int = 5
+) -> AsyncIterator[bytes]:
+    """Analyze items in micro-batches of ``batch_size`` and yield NDJSON lines.
+
+    Payloads found in ``cache`` are served from it; pass ``None`` to bypass.
+    With a pattern ``index``, results gain ``nearest_patterns`` as on /analyze.
+    """
+    start = 0
+    batch: list[BatchItem] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            for line in await _flush(executor, cache, batch, start, index, neighbors):
+                yield line
+            start += len(batch)
+            batch = []
+    if batch:
+        for line in await _flush(executor, cache, batch, start, index, neighbors):
+            yield line
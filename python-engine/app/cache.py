@@ -0,0 +1,215 @@
+"""
+Content-addressed cache for analysis results.
+
+Results are keyed by a SHA-256 of the canonical JSON encoding of the request
+payload. The in-process tier is an LRU bounded by the encoded size of its
+entries; every entry also expires after a TTL. An optional on-disk tier keeps
+results across restarts and can be shared by several engine processes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import Settings
+
+# Bump whenever analysis output changes so stale results are never served.
+CACHE_VERSION = "3"
+
+
+def canonical_key(payload: dict | None) -> str:
+    encoded = json.dumps(payload or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{CACHE_VERSION}:{encoded}".encode()).hexdigest()
+
+
+def binary_key(body: bytes, content_type: str, sample_rate: float | None) -> str:
+    digest = hashlib.sha256(f"{CACHE_VERSION}:{content_type}:{sample_rate}:".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    bypasses: int = 0
+
+
+class DiskCache:
+    """One JSON file per key, written atomically so processes can share it."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str, now: float) -> dict | None:
+        """The stored entry, or None; expired and malformed files are deleted."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            entry = None
+        valid = (
+            isinstance(entry, dict)
+            and isinstance(entry.get("expires_at"), (int, float))
+            and isinstance(entry.get("value"), dict)
+        )
+        if not valid or entry["expires_at"] <= now:
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def put(self, key: str, value: dict, expires_at: float) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": expires_at, "value": value}, f)
+            os.replace(tmp, path)
+        finally:
+            Path(tmp).unlink(missing_ok=True)  # gone already once replaced
+
+
+class ResultCache:
+    """LRU + TTL result cache with a byte cap and an optional disk tier."""
+
+    def __init__(self, max_bytes: int, ttl: float, directory: str | None = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk = DiskCache(directory) if directory else None
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, int, dict]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ResultCache":
+        return cls(
+            max_bytes=settings.cache_max_bytes,
+            ttl=settings.cache_ttl,
+            directory=settings.cache_dir
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> dict | None:
+        """Blocking lookup through both tiers; async callers use ``aget``."""
+        now = time.time()
+        value = self._get_memory(key, now)
+        return value if value is not None else self._get_disk(key, now)
+
+    def put(self, key: str, value: dict) -> None:
+        """Blocking insert into both tiers; async callers use ``aput``."""
+        expires_at = time.time() + self.ttl
+        size = len(json.dumps(value, default=str))
+        with self._lock:
+            self._insert(key, value, expires_at, size)
+        if self.disk is not None:
+            self.disk.put(key, value, expires_at)
+
+    async def aget(self, key: str) -> dict | None:
+        """Lookup that serves memory hits inline and reads the disk tier in the threadpool."""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is not None:
+            return value
+        if self.disk is None:
+            return self._get_disk(key, now)
+        return await run_in_threadpool(self._get_disk, key, now)
+
+    async def aput(self, key: str, value: dict) -> None:
+        """Insert off the event loop: sizing the value and the disk write both block."""
+        await run_in_threadpool(self.put, key, value)
+
+    async def aget_many(self, keys: list[str]) -> list[dict | None]:
+        if self.disk is None:
+            return [self.get(key) for key in keys]
+        return await run_in_threadpool(lambda: [self.get(key) for key in keys])
+
+    async def aput_many(self, items: list[tuple[str, dict]]) -> None:
+        if items:
+            await run_in_threadpool(lambda: [self.put(key, value) for key, value in items])
+
+    def _get_memory(self, key: str, now: float) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                self._remove(key)
+                self.stats.expirations += 1
+        return None
+
+    def _get_disk(self, key: str, now: float) -> dict | None:
+        if self.disk is not None:
+            stored = self.disk.get(key, now)
+            if stored is not None:
+                size = len(json.dumps(stored["value"], default=str))
+                with self._lock:
+                    self.stats.disk_hits += 1
+                    self._insert(key, stored["value"], stored["expires_at"], size)
+                return stored["value"]
+
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **vars(self.stats),
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def _insert(self, key: str, value: dict, expires_at: float, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
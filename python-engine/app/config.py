@@ -0,0 +1,46 @@
+import os
+from dataclasses import dataclass
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    batch_size: int = 64
+    analysis_workers: int = os.cpu_count() or 1
+    analysis_queue_size: int = 64
+    retry_after: int = 1
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_ttl: float = 300.0
+    cache_dir: str | None = None
+    pattern_index: str | None = None
+    neighbors: int = 5
+    graph_root: str | None = None
+    graph_cache: str | None = None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            batch_size=_env_int("ANALYZE_BATCH_SIZE", cls.batch_size),
+            analysis_workers=_env_int("ANALYZE_WORKERS", cls.analysis_workers),
+            analysis_queue_size=_env_int("ANALYZE_QUEUE_SIZE", cls.analysis_queue_size),
+            retry_after=_env_int("ANALYZE_RETRY_AFTER", cls.retry_after),
+            cache_max_bytes=_env_int("ANALYZE_CACHE_MAX_BYTES", cls.cache_max_bytes),
+            cache_ttl=_env_float("ANALYZE_CACHE_TTL", cls.cache_ttl),
+            cache_dir=os.environ.get("ANALYZE_CACHE_DIR") or cls.cache_dir,
+            pattern_index=os.environ.get("ANALYZE_PATTERN_INDEX") or cls.pattern_index,
+            neighbors=_env_int("ANALYZE_NEIGHBORS", cls.neighbors),
+            graph_root=os.environ.get("ANALYZE_GRAPH_ROOT") or cls.graph_root,
+            graph_cache=os.environ.get("ANALYZE_GRAPH_CACHE") or cls.graph_cache,
+        )
+
+
+settings = Settings.from_env()
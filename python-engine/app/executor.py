@@ -0,0 +1,127 @@
+"""
+Process-pool execution with admission control for CPU-bound analysis.
+
+Heavy analysis runs in worker processes so it never ties up the event loop or
+uvicorn's threadpool. The number of in-flight jobs (running plus waiting) is
+bounded; once the bound is reached new requests are rejected with
+QueueFullError, which the app turns into a 503 with a Retry-After header.
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import Settings
+from .metrics import collect_stages, record_stages
+
+# Modules imported once per worker so the first job does not pay for them.
+WARM_UP_MODULES = ("numpy", "scipy.fft", "scipy.signal")
+
+
+class QueueFullError(RuntimeError):
+    def __init__(self, retry_after: int):
+        super().__init__("analysis queue is full")
+        self.retry_after = retry_after
+
+
+def warm_up() -> None:
+    """Process-pool initializer: preload the numeric stack in each worker."""
+    for name in WARM_UP_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def _run_with_stages(fn: Callable[..., Any], *args: Any) -> tuple[Any, list[tuple[str, float]]]:
+    with collect_stages() as samples:
+        result = fn(*args)
+    return result, samples
+
+
+class AnalysisExecutor:
+    """Run analysis callables in a process pool behind a bounded queue.
+
+    With ``workers=0`` jobs run in the threadpool instead, which keeps local
+    development and debugging simple while still applying admission control.
+    """
+
+    def __init__(self, workers: int, queue_size: int, retry_after: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._freed: asyncio.Condition | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AnalysisExecutor":
+        return cls(
+            workers=settings.analysis_workers,
+            queue_size=settings.analysis_queue_size,
+            retry_after=settings.retry_after
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def saturated(self) -> bool:
+        return self._pending >= self.queue_size
+
+    def start(self) -> None:
+        self._freed = asyncio.Condition()
+        if self.workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_up
+            )
+            # Spawn every worker now so warm-up happens at startup rather than
+            # on the first requests.
+            for _ in range(self.workers):
+                self._pool.submit(warm_up)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def ensure_capacity(self) -> None:
+        if self.saturated:
+            raise QueueFullError(self.retry_after)
+
+    async def submit(self, fn: Callable[..., Any], *args: Any, wait: bool = False) -> Any:
+        """Run ``fn(*args)`` off the event loop.
+
+        When the queue is full this raises QueueFullError, or with ``wait=True``
+        blocks until a slot frees up (used by streaming batches, which have
+        already sent their response headers).
+        """
+        if self._freed is None:
+            self.start()
+        if self.saturated:
+            if not wait:
+                raise QueueFullError(self.retry_after)
+            async with self._freed:
+                await self._freed.wait_for(lambda: not self.saturated)
+
+        self._pending += 1
+        try:
+            if self._pool is None:
+                result, samples = await run_in_threadpool(_run_with_stages, fn, *args)
+            else:
+                result, samples = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, _run_with_stages, fn, *args
+                )
+            record_stages(samples)
+            return result
+        finally:
+            self._pending -= 1
+            async with self._freed:
+                self._freed.notify()
@@ -0,0 +1,368 @@
+"""
+Indexed graph over the NOB node databases and the codex index.
+
+Every record with an ``id`` in a list section of ``databases/*.json`` (the
+template excepted) and every entry of ``codex/codex-index.json`` becomes a
+node with an integer index. ``connections`` and ``parent`` references become
+directed edges, held as CSR arrays in both directions, and numeric fields
+(nested one level deep, e.g. ``properties.stability``) become float columns
+with NaN where a record lacks them. References to ids that exist nowhere are
+kept in ``missing`` rather than becoming edges.
+
+The compiled graph is cached in one ``.npz`` file. The cache records each
+source's size, mtime and SHA-256: sources with unchanged size and mtime are
+trusted, others are rehashed, and any content change rebuilds the graph.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .metrics import stage_timer
+
+ROOT = Path(__file__).resolve().parents[2]
+CACHE_NAME = Path(".cache") / "nob-graph.npz"
+FORMAT_VERSION = 1
+
+DIRECTIONS = ("out", "in", "both")
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order].astype(np.int32)
+
+
+def _gather(indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Concatenated CSR rows of ``nodes``."""
+    starts, stops = indptr[nodes], indptr[nodes + 1]
+    counts = stops - starts
+    if not counts.sum():
+        return indices[:0]
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return indices[offsets + np.arange(counts.sum())]
+
+
+class Graph:
+    """Directed NOB node graph with columnar properties and CSR adjacency.
+
+    Nodes are addressed by integer index; ``index`` maps ids to indices and
+    ``ids`` maps back. Query methods accept either form.
+    """
+
+    def __init__(
+        self,
+        ids: list[str],
+        names: list[str],
+        types: list[str],
+        sources: list[str],
+        layer: np.ndarray,
+        columns: dict[str, np.ndarray],
+        edges: np.ndarray,
+        missing: list[tuple[str, str]] | None = None
+    ):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.types = list(types)
+        self.sources = list(sources)
+        self.layer = np.asarray(layer, dtype=np.int32)
+        self.columns = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+        self.edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        self.missing = [tuple(pair) for pair in (missing or [])]
+
+        n = len(self.ids)
+        self.index = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.out_indptr, self.out_indices = _csr(self.edges[:, 0], self.edges[:, 1], n)
+        self.in_indptr, self.in_indices = _csr(self.edges[:, 1], self.edges[:, 0], n)
+        self._by_type = self._group(self.types)
+        self._by_source = self._group(self.sources)
+        self._by_layer = self._group(self.layer.tolist())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _group(keys: list) -> dict:
+        groups: dict = {}
+        for i, key in enumerate(keys):
+            groups.setdefault(key, []).append(i)
+        return {key: np.array(members, dtype=np.int32) for key, members in groups.items()}
+
+    def _resolve(self, node: int | str) -> int:
+        return self.index[node] if isinstance(node, str) else int(node)
+
+    def by_type(self, node_type: str) -> np.ndarray:
+        return self._by_type.get(node_type, np.empty(0, dtype=np.int32))
+
+    def by_layer(self, layer: int) -> np.ndarray:
+        return self._by_layer.get(int(layer), np.empty(0, dtype=np.int32))
+
+    def by_source(self, source: str) -> np.ndarray:
+        """Nodes from one ``<database>/<section>`` or ``codex/<category>``."""
+        return self._by_source.get(source, np.empty(0, dtype=np.int32))
+
+    def column(self, name: str, nodes: np.ndarray | None = None, default: float = np.nan) -> np.ndarray:
+        """Values of a numeric column, ``default`` where absent."""
+        values = self.columns.get(name, np.full(len(self), np.nan))
+        values = values if nodes is None else values[nodes]
+        return np.where(np.isnan(values), default, values)
+
+    def neighbors(self, node: int | str, direction: str = "out") -> np.ndarray:
+        return self._expand(np.array([self._resolve(node)]), direction)[0]
+
+    def _expand(self, frontier: np.ndarray, direction: str) -> tuple[np.ndarray, np.ndarray]:
+        """Neighbours of every frontier node, and the frontier node each came from."""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}, got {direction!r}")
+        csrs = []
+        if direction in ("out", "both"):
+            csrs.append((self.out_indptr, self.out_indices))
+        if direction in ("in", "both"):
+            csrs.append((self.in_indptr, self.in_indices))
+        reached = [_gather(indptr, indices, frontier) for indptr, indices in csrs]
+        origin = [np.repeat(frontier, indptr[frontier + 1] - indptr[frontier]) for indptr, _ in csrs]
+        return np.concatenate(reached), np.concatenate(origin)
+
+    def _search(
+        self, start: int, max_depth: int | None, direction: str
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Level-synchronous BFS: visit order, hop count per node and BFS-tree parents (-1 = none)."""
+        depth = np.full(len(self), -1, dtype=np.int32)
+        parents = np.full(len(self), -1, dtype=np.int32)
+        depth[start] = 0
+        frontier = np.array([start])
+        order = [frontier]
+        level = 0
+        while len(frontier) and (max_depth is None or level < max_depth):
+            reached, origin = self._expand(frontier, direction)
+            fresh = depth[reached] < 0
+            reached, first = np.unique(reached[fresh], return_index=True)
+            level += 1
+            depth[reached] = level
+            parents[reached] = origin[fresh][first]
+            order.append(reached)
+            frontier = reached
+        return np.concatenate(order), depth, parents
+
+    def bfs(
+        self, source: int | str, max_depth: int | None = None, direction: str = "out"
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Nodes reachable from ``source`` in BFS order and their hop counts."""
+        nodes, depth, _ = self._search(self._resolve(source), max_depth, direction)
+        return nodes, depth[nodes]
+
+    def shortest_path(self, source: int | str, target: int | str, direction: str = "out") -> list[int] | None:
+        """Fewest-hop path from ``source`` to ``target`` as node indices, or None."""
+        start, goal = self._resolve(source), self._resolve(target)
+        _, depth, parents = self._search(start, None, direction)
+        if depth[goal] < 0:
+            return None
+        path = [goal]
+        while path[-1] != start:
+            path.append(int(parents[path[-1]]))
+        return path[::-1]
+
+    def neighborhood(self, node: int | str, depth: int = 1, direction: str = "both") -> tuple[np.ndarray, np.ndarray]:
+        """Nodes within ``depth`` hops of ``node`` and their hop counts."""
+        return self.bfs(node, max_depth=depth, direction=direction)
+
+    def node(self, node: int | str) -> dict:
+        """JSON-ready view of one node: identity, layer and its non-missing columns."""
+        i = self._resolve(node)
+        record = {
+            "id": self.ids[i],
+            "name": self.names[i] or None,
+            "type": self.types[i],
+            "layer": int(self.layer[i]) if self.layer[i] >= 0 else None,
+            "source": self.sources[i]
+        }
+        record.update({name: float(values[i]) for name, values in self.columns.items() if not np.isnan(values[i])})
+        return record
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        names = sorted(self.columns)
+        return {
+            "ids": np.array(self.ids, dtype=str),
+            "names": np.array(self.names, dtype=str),
+            "types": np.array(self.types, dtype=str),
+            "sources": np.array(self.sources, dtype=str),
+            "layer": self.layer,
+            "column_names": np.array(names, dtype=str),
+            "column_values": np.column_stack([self.columns[name] for name in names]) if names
+            else np.empty((len(self), 0)),
+            "edges": self.edges,
+            "missing": np.array(self.missing, dtype=str).reshape(-1, 2)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "Graph":
+        names = arrays["column_names"].tolist()
+        values = arrays["column_values"]
+        return cls(
+            arrays["ids"].tolist(),
+            arrays["names"].tolist(),
+            arrays["types"].tolist(),
+            arrays["sources"].tolist(),
+            arrays["layer"],
+            {name: values[:, j] for j, name in enumerate(names)},
+            arrays["edges"],
+            arrays["missing"].tolist()
+        )
+
+
+def source_files(root: Path = ROOT) -> list[Path]:
+    databases = sorted(
+        path for path in (root / "databases").glob("*.json") if not path.name.startswith("TEMPLATE")
+    )
+    codex = root / "codex" / "codex-index.json"
+    return databases + ([codex] if codex.exists() else [])
+
+
+def _records(path: Path):
+    """(source, record) pairs for every node-like record in one file."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if path.name == "codex-index.json":
+        for category, entries in data.get("codex", {}).get("entries", {}).items():
+            for entry in entries:
+                if isinstance(entry, dict) and "id" in entry:
+                    yield f"codex/{category}", entry
+        return
+    for section, items in data.items():
+        if isinstance(items, list):
+            for item in items:
+                if isinstance(item, dict) and "id" in item:
+                    yield f"{path.stem}/{section}", item
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def build_graph(paths: list[Path]) -> Graph:
+    """Compile source files into a Graph; duplicate ids are an error."""
+    ids, names, types, sources, layers, rows = [], [], [], [], [], []
+    origin: dict[str, str] = {}
+    for path in paths:
+        for source, record in _records(path):
+            node_id = str(record["id"])
+            if node_id in origin:
+                raise ValueError(f"duplicate node id {node_id!r} in {origin[node_id]} and {source}")
+            origin[node_id] = source
+            numbers = {}
+            for key, value in record.items():
+                if _is_number(value) and key != "layer":
+                    numbers[key] = float(value)
+                elif isinstance(value, dict):
+                    numbers.update({f"{key}.{k}": float(v) for k, v in value.items() if _is_number(v)})
+            ids.append(node_id)
+            names.append(str(record.get("name") or record.get("title") or ""))
+            types.append(str(record.get("type") or record.get("category") or source.rsplit("/", 1)[1]))
+            sources.append(source)
+            layers.append(record["layer"] if _is_number(record.get("layer")) else -1)
+            rows.append((record, numbers))
+
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    column_names = sorted({name for _, numbers in rows for name in numbers})
+    columns = {name: np.full(len(ids), np.nan) for name in column_names}
+    edges, missing = [], []
+    for i, (record, numbers) in enumerate(rows):
+        for name, value in numbers.items():
+            columns[name][i] = value
+        links = [(ids[i], str(ref)) for ref in record.get("connections") or []]
+        if record.get("parent"):
+            links.append((str(record["parent"]), ids[i]))
+        for a, b in links:
+            if a in index and b in index:
+                edges.append((index[a], index[b]))
+            else:
+                missing.append((a, b))
+
+    edges = np.unique(np.array(edges, dtype=np.int32).reshape(-1, 2), axis=0)
+    return Graph(ids, names, types, sources, np.array(layers), columns, edges, missing)
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _signature(paths: list[Path], root: Path, previous: dict | None = None) -> dict:
+    """Size, mtime and hash per source; hashes are reused when size and mtime match."""
+    signature = {}
+    for path in paths:
+        stat = path.stat()
+        key = os.path.relpath(path, root)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        old = (previous or {}).get(key)
+        if old and old["size"] == entry["size"] and old["mtime_ns"] == entry["mtime_ns"]:
+            entry["sha256"] = old["sha256"]
+        else:
+            entry["sha256"] = _sha256(path)
+        signature[key] = entry
+    return signature
+
+
+def _read_cache(cache_path: Path) -> tuple[Graph | None, dict | None]:
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != FORMAT_VERSION:
+                return None, None
+            return Graph.from_arrays(data), meta["sources"]
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _write_cache(cache_path: Path, graph: Graph, signature: dict) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_path.parent, suffix=".npz")
+    except OSError:
+        return  # read-only checkout: run uncached
+    try:
+        with os.fdopen(fd, "wb") as f:
+            meta = json.dumps({"version": FORMAT_VERSION, "sources": signature})
+            np.savez(f, meta=np.array(meta), **graph.to_arrays())
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass  # disk full or similar: run uncached
+    finally:
+        Path(tmp).unlink(missing_ok=True)  # gone already once replaced
+
+
+@stage_timer("graph_load")
+def load_graph(root: str | Path | None = None, cache_path: str | Path | None = None, use_cache: bool = True) -> Graph:
+    """The node graph under ``root``, from the binary cache when it is current.
+
+    ``cache_path`` defaults to ``<root>/.cache/nob-graph.npz``. A cache whose
+    sources only changed mtime (same content) is re-stamped, not rebuilt.
+    """
+    root = Path(root) if root is not None else ROOT
+    paths = source_files(root)
+    if not use_cache:
+        return build_graph(paths)
+
+    cache_path = Path(cache_path) if cache_path is not None else root / CACHE_NAME
+    graph, cached = _read_cache(cache_path)
+    signature = _signature(paths, root, cached)
+    if graph is not None and cached is not None:
+        if signature == cached:
+            return graph
+        if {key: entry["sha256"] for key, entry in signature.items()} == {
+            key: entry["sha256"] for key, entry in cached.items()
+        }:
+            _write_cache(cache_path, graph, signature)
+            return graph
+
+    graph = build_graph(paths)
+    _write_cache(cache_path, graph, signature)
+    return graph
@@ -1,11 +1,82 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+import time
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="NOB Universe Python Engine")
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import ValidationError
 
+from .analysis import analyze_payload, analyze_waveform, analyze_waveform_result
+from .batch import BatchStreamingResponse, read_batch, stream_results
+from .cache import ResultCache, binary_key, canonical_key
+from .config import settings
+from .executor import AnalysisExecutor, QueueFullError
+from .graph import Graph, load_graph
+from .metrics import (
+    CONTENT_TYPE, PAYLOAD_SIZE, REGISTRY, REQUEST_LATENCY, REQUESTS, CallbackCounter, Gauge
+)
+from .models import AnalyzeRequest
+from .neighbors import load_pattern_index, with_nearest
+from .streaming import serve_ripple_stream
+from .waveform import FRAME_MEDIA_TYPE, NPY_MEDIA_TYPE, WaveformFormatError
 
-class AnalyzeRequest(BaseModel):
-    payload: dict | None = None
+executor = AnalysisExecutor.from_settings(settings)
+cache = ResultCache.from_settings(settings)
+pattern_index = load_pattern_index(settings.pattern_index) if settings.pattern_index else None
+graph = load_graph(settings.graph_root, settings.graph_cache) if settings.graph_root else None
+
+REGISTRY.register(Gauge(
+    "nob_analysis_queue_depth", "Analysis jobs running or waiting.", lambda: executor.pending
+))
+REGISTRY.register(Gauge(
+    "nob_cache_size_bytes", "Encoded size of the in-process result cache.", lambda: cache.size_bytes
+))
+REGISTRY.register(CallbackCounter(
+    "nob_cache_events_total", "Result cache lookups by outcome.", "event", lambda: vars(cache.stats)
+))
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    executor.start()
+    yield
+    executor.shutdown()
+
+
+app = FastAPI(title="NOB Universe Python Engine", lifespan=lifespan)
+
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(_request: Request, exc: QueueFullError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.exception_handler(WaveformFormatError)
+async def waveform_format_handler(_request: Request, exc: WaveformFormatError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = "500"  # an unhandled exception becomes a 500 further out
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - start, route=path)
+        REQUESTS.inc(route=path, method=request.method, status=status)
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit():
+            PAYLOAD_SIZE.observe(int(content_length), route=path)
 
 
 @app.get("/health")
@@ -13,10 +84,152 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/analyze")
-def analyze(request: AnalyzeRequest):
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return cache.snapshot()
+
+
+async def _cached(response: Response, key: str | None, fn, *args) -> dict:
+    """Serve ``fn(*args)`` from the result cache, or compute it when ``key`` is None."""
+    if key is None:
+        cache.stats.bypasses += 1
+        response.headers["X-Cache"] = "BYPASS"
+        return await executor.submit(fn, *args)
+
+    result = await cache.aget(key)
+    if result is not None:
+        response.headers["X-Cache"] = "HIT"
+        return result
+
+    result = await executor.submit(fn, *args)
+    await cache.aput(key, result)
+    response.headers["X-Cache"] = "MISS"
+    return result
+
+
+async def _analyze_binary(
+    request: Request,
+    response: Response,
+    content_type: str,
+    sample_rate: float | None,
+    use_cache: bool
+):
+    body = await request.body()
+    if FRAME_MEDIA_TYPE in request.headers.get("accept", ""):
+        executor.ensure_capacity()
+        _, frame = await executor.submit(analyze_waveform, body, content_type, sample_rate, True)
+        return Response(content=frame, media_type=FRAME_MEDIA_TYPE)
+
+    key = binary_key(body, content_type, sample_rate) if use_cache else None
+    return await _cached(response, key, analyze_waveform_result, body, content_type, sample_rate)
+
+
+@app.post("/analyze", openapi_extra={"requestBody": {"required": True, "content": {
+    "application/json": {"schema": AnalyzeRequest.model_json_schema()},
+    FRAME_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    NPY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}
+}}})
+async def analyze(
+    request: Request,
+    response: Response,
+    sample_rate: float | None = None,
+    cache_bypass: bool = Header(False, alias="X-Cache-Bypass")
+):
+    use_cache = cache.enabled and not cache_bypass
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith((FRAME_MEDIA_TYPE, NPY_MEDIA_TYPE)):
+        return await _analyze_binary(request, response, content_type, sample_rate, use_cache)
+
+    try:
+        analyze_request = AnalyzeRequest.model_validate_json(await request.body())
+    except ValidationError as exc:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in exc.errors()])
+    payload = analyze_request.payload
+    key = canonical_key(payload) if use_cache else None
+    result = await _cached(response, key, analyze_payload, payload)
+    return with_nearest(result, payload, pattern_index, settings.neighbors)
+
+
+@app.post("/analyze/batch")
+async def analyze_batch(
+    request: Request,
+    cache_bypass: bool = Header(False, alias="X-Cache-Bypass")
+):
+    executor.ensure_capacity()
+    items = await read_batch(request)
+    if cache_bypass or not cache.enabled:
+        cache.stats.bypasses += 1
+        batch_cache = None
+    else:
+        batch_cache = cache
+    return BatchStreamingResponse(stream_results(
+        items, executor, batch_cache, settings.batch_size, pattern_index, settings.neighbors
+    ))
+
+
+def _graph_node(node_id: str) -> tuple[Graph, int]:
+    if graph is None:
+        raise HTTPException(status_code=404, detail="node graph not loaded")
+    if node_id not in graph.index:
+        raise HTTPException(status_code=404, detail=f"unknown node {node_id!r}")
+    return graph, graph.index[node_id]
+
+
+def _graph_direction(direction: str) -> str:
+    if direction not in ("out", "in", "both"):
+        raise HTTPException(status_code=400, detail="direction must be out, in or both")
+    return direction
+
+
+@app.get("/graph/nodes")
+def graph_nodes(node_type: str | None = Query(None, alias="type"), layer: int | None = None):
+    if graph is None:
+        raise HTTPException(status_code=404, detail="node graph not loaded")
+    nodes = np.arange(len(graph))
+    if node_type is not None:
+        nodes = np.intersect1d(nodes, graph.by_type(node_type))
+    if layer is not None:
+        nodes = np.intersect1d(nodes, graph.by_layer(layer))
+    return {"nodes": [graph.node(i) for i in nodes.tolist()]}
+
+
+@app.get("/graph/nodes/{node_id}")
+def graph_node(node_id: str):
+    graph, i = _graph_node(node_id)
     return {
-        "status": "processed",
-        "received": request.payload or {},
-        "summary": "Placeholder analysis from Python engine"
+        **graph.node(i),
+        "out": [graph.ids[j] for j in graph.neighbors(i, "out").tolist()],
+        "in": [graph.ids[j] for j in graph.neighbors(i, "in").tolist()]
     }
+
+
+@app.get("/graph/nodes/{node_id}/neighborhood")
+def graph_neighborhood(node_id: str, depth: int = 1, direction: str = "both"):
+    graph, i = _graph_node(node_id)
+    nodes, hops = graph.neighborhood(i, depth, _graph_direction(direction))
+    return {"nodes": [{"id": graph.ids[j], "depth": int(d)} for j, d in zip(nodes.tolist(), hops.tolist())]}
+
+
+@app.get("/graph/path")
+def graph_path(source: str, target: str, direction: str = "out"):
+    graph, start = _graph_node(source)
+    _, goal = _graph_node(target)
+    path = graph.shortest_path(start, goal, _graph_direction(direction))
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"no path from {source!r} to {target!r}")
+    return {"path": [graph.ids[j] for j in path]}
+
+
+@app.websocket("/ws/ripple")
+async def ripple_stream(
+    websocket: WebSocket,
+    sample_rate: float = 44100.0,
+    window: int = 2048,
+    hop: int = 512
+):
+    await serve_ripple_stream(websocket, sample_rate, window, hop)
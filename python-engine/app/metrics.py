@@ -0,0 +1,199 @@
+"""
+Lightweight metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms are kept in-process and rendered by
+``GET /metrics``. ``stage_timer`` (from ``nob_common``) times a named analysis
+stage as a context manager or decorator; importing this module routes its
+timings, including those of RippleLab and PatternIncubator code running in
+the engine, into the registry.
+
+Analysis runs in worker processes, so stage timings taken there are captured
+with ``collect_stages`` and replayed into the parent registry by the executor.
+"""
+
+import bisect
+import contextlib
+import math
+import threading
+from collections.abc import Callable, Iterator
+
+from nob_common.timing import set_observer, stage_timer  # noqa: F401  (re-exported)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """A gauge whose value is read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self._function = function
+
+    def samples(self):
+        yield f"{self.name} {_format_value(self._function())}"
+
+
+class CallbackCounter(_Metric):
+    """Counters owned elsewhere (e.g. cache stats), read at scrape time."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelname: str, function: Callable[[], dict[str, float]]):
+        super().__init__(name, documentation, (labelname,))
+        self._function = function
+
+    def samples(self):
+        for label, value in sorted(self._function().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, (label,))} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, ([*series[0]], series[1], series[2])) for key, series in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "nob_http_requests_total", "HTTP requests handled.", ("route", "method", "status")
+))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "nob_http_request_duration_seconds", "Time to produce response headers.", ("route",)
+))
+PAYLOAD_SIZE = REGISTRY.register(Histogram(
+    "nob_http_request_payload_bytes", "Request body size.", ("route",), buckets=SIZE_BUCKETS
+))
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "nob_analysis_stage_duration_seconds", "Time spent in each analysis stage.", ("stage",)
+))
+
+# Samples collected by collect_stages() in the current thread, if any.
+_collector = threading.local()
+
+
+@contextlib.contextmanager
+def collect_stages() -> Iterator[list[tuple[str, float]]]:
+    """Buffer stage timings instead of recording them, for shipping across processes."""
+    previous = getattr(_collector, "samples", None)
+    _collector.samples = samples = []
+    try:
+        yield samples
+    finally:
+        _collector.samples = previous
+
+
+def record_stages(samples: list[tuple[str, float]]) -> None:
+    for stage, seconds in samples:
+        STAGE_LATENCY.observe(seconds, stage=stage)
+
+
+def _observe_stage(stage: str, seconds: float) -> None:
+    samples = getattr(_collector, "samples", None)
+    if samples is not None:
+        samples.append((stage, seconds))
+    else:
+        STAGE_LATENCY.observe(seconds, stage=stage)
+
+
+set_observer(_observe_stage)
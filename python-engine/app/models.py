@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+
+class AnalyzeRequest(BaseModel):
+    payload: dict | None = None
@@ -0,0 +1,78 @@
+"""
+Nearest known patterns for /analyze and /analyze/batch.
+
+The index itself (``PatternIndex``) lives in ``nob_common.neighbors`` so the
+pattern incubator can use it without the engine; this module turns request
+payloads and pattern files into its feature vectors.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from nob_common.features import FEATURES, FeatureScaler  # noqa: F401
+from nob_common.neighbors import PatternIndex
+
+
+def query_features(payload: dict | None) -> np.ndarray | None:
+    """Feature vector for a payload carrying all of ``FEATURES`` as finite numbers, else None.
+
+    A missing feature is not guessed: zero is an arbitrary point in every
+    feature's scale and would skew the distances.
+    """
+    if not payload or not all(name in payload for name in FEATURES):
+        return None
+    try:
+        features = np.array([float(payload[name]) for name in FEATURES])
+    except (TypeError, ValueError):
+        return None
+    return features if np.isfinite(features).all() else None
+
+
+def with_nearest(result: dict, payload: dict | None, index: PatternIndex | None, k: int) -> dict:
+    """``result`` plus ``nearest_patterns`` when the payload has every feature.
+
+    Looked up in-process after the cache: it is sub-millisecond and the index
+    may differ between engines sharing a disk cache. Returns a new dict so
+    cached results are never modified.
+    """
+    features = query_features(payload) if index is not None else None
+    if features is None:
+        return result
+    return {**result, "nearest_patterns": index.nearest(features, k)}
+
+
+def _json_features(pattern) -> list[float]:
+    try:
+        return [float(pattern[name]) for name in FEATURES]
+    except (KeyError, TypeError, ValueError):
+        return [np.nan] * len(FEATURES)
+
+
+def load_pattern_index(path: str | Path) -> PatternIndex:
+    """Build an index from a PatternTable ``.npz`` or a JSON list of patterns.
+
+    Patterns missing a feature, or with a non-numeric or non-finite one, are
+    skipped rather than placed at an invented position; ``ValueError`` is
+    raised if the file has patterns but none of them is complete.
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path, allow_pickle=False) as data:
+            features = np.column_stack([data[name] for name in FEATURES]).astype(np.float64)
+            strings = data["strings"].tolist()
+            labels = [strings[code] if code >= 0 else None for code in data["id"].tolist()]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            patterns = json.load(f)
+        if isinstance(patterns, dict):
+            patterns = patterns["patterns"]
+        rows = [_json_features(pattern) for pattern in patterns]
+        features = np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES))
+        labels = [pattern.get("id") if isinstance(pattern, dict) else None for pattern in patterns]
+
+    complete = np.isfinite(features).all(axis=1)
+    if len(features) and not complete.any():
+        raise ValueError(f"{path}: no pattern has finite values for all of {', '.join(FEATURES)}")
+    return PatternIndex(features[complete], [label for label, keep in zip(labels, complete) if keep])
@@ -0,0 +1,123 @@
+"""
+WebSocket ripple streaming with rolling spectral analysis.
+
+Clients push samples per channel over ``/ws/ripple`` and receive rolling
+spectrum metrics every ``hop`` samples once a channel has a full ``window``.
+Each channel copies incoming samples into a ring buffer (O(samples) per
+message) and recomputes the window's spectrum with one ``rfft`` each time a
+hop completes. That is O(N log N) per hop whatever the client's message size,
+and constant no matter how long the stream runs. A per-sample sliding DFT
+would cost O(N) per sample, i.e. O(N * hop) per hop, which only wins for
+hops shorter than about log2(N) samples.
+
+Messages from the client are either JSON text, ``{"channel": "a", "samples":
+[...]}``, or binary NOBW waveform frames, which feed channel ``"0"``.
+"""
+
+import json
+
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+
+from .analysis import spectrum_metrics
+from .waveform import WaveformFormatError, decode_frame
+
+MAX_WINDOW = 1 << 16
+MAX_CHANNELS = 64
+BINARY_CHANNEL = "0"
+
+class SlidingSpectrum:
+    """Spectrum of the last ``window`` samples of one channel, refreshed every ``hop`` samples.
+
+    Samples are buffered until a hop boundary, so small messages cost only a
+    copy into the ring; the FFT runs once per hop on the time-ordered window.
+    """
+
+    def __init__(self, window: int, hop: int, sample_rate: float):
+        self.window = window
+        self.hop = hop
+        self.sample_rate = sample_rate
+        self.freqs = np.fft.rfftfreq(window, 1 / sample_rate)
+        self._ring = np.zeros(window)
+        self._pos = 0
+        self.samples_seen = 0
+
+    def push(self, samples: np.ndarray) -> list[dict]:
+        """Consume samples and return metrics for every hop boundary crossed."""
+        emitted = []
+        offset = 0
+        while offset < samples.size:
+            step = min(samples.size - offset, self.hop - self.samples_seen % self.hop)
+            self._write(samples[offset:offset + step])
+            offset += step
+            if self.samples_seen % self.hop == 0 and self.samples_seen >= self.window:
+                emitted.append(self._emit())
+        return emitted
+
+    def _write(self, block: np.ndarray) -> None:
+        # A block never exceeds hop <= window, so it wraps the ring at most once.
+        end = self._pos + block.size
+        if end <= self.window:
+            self._ring[self._pos:end] = block
+        else:
+            split = self.window - self._pos
+            self._ring[self._pos:] = block[:split]
+            self._ring[:end - self.window] = block[split:]
+        self._pos = end % self.window
+        self.samples_seen += block.size
+
+    def window_samples(self) -> np.ndarray:
+        """The last ``window`` samples, oldest first."""
+        return np.concatenate([self._ring[self._pos:], self._ring[:self._pos]])
+
+    def _emit(self) -> dict:
+        magnitude = np.abs(np.fft.rfft(self.window_samples()))
+        metrics = spectrum_metrics(magnitude, self.freqs, self.window)
+        metrics["sample_index"] = self.samples_seen
+        return metrics
+
+
+def _parse_message(message: dict) -> tuple[str, np.ndarray]:
+    if message.get("bytes") is not None:
+        samples, _ = decode_frame(message["bytes"])
+        channel, samples = BINARY_CHANNEL, samples.astype(np.float64)
+    else:
+        try:
+            data = json.loads(message.get("text") or "")
+            channel = str(data.get("channel", BINARY_CHANNEL))
+            samples = np.asarray(data["samples"], dtype=np.float64).ravel()
+        except (ValueError, TypeError, KeyError, AttributeError) as exc:
+            raise WaveformFormatError(f"invalid sample message: {exc}")
+    if not np.isfinite(samples).all():
+        raise WaveformFormatError("samples contain NaN or infinite values")
+    return channel, samples
+
+
+async def serve_ripple_stream(websocket: WebSocket, sample_rate: float, window: int, hop: int) -> None:
+    if not (2 <= window <= MAX_WINDOW and 1 <= hop <= window and sample_rate > 0):
+        await websocket.close(code=1008, reason="invalid sample_rate/window/hop")
+        return
+    await websocket.accept()
+
+    channels: dict[str, SlidingSpectrum] = {}
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                channel, samples = _parse_message(message)
+            except WaveformFormatError as exc:
+                await websocket.send_json({"error": str(exc)})
+                continue
+
+            state = channels.get(channel)
+            if state is None:
+                if len(channels) >= MAX_CHANNELS:
+                    await websocket.send_json({"channel": channel, "error": "too many channels"})
+                    continue
+                state = channels[channel] = SlidingSpectrum(window, hop, sample_rate)
+            for metrics in state.push(samples):
+                await websocket.send_json({"channel": channel, **metrics})
+    except WebSocketDisconnect:
+        return
@@ -0,0 +1,123 @@
+"""
+Binary waveform and spectrum wire formats.
+
+Two request encodings are accepted besides JSON:
+
+* ``application/octet-stream`` — a NOBW frame: a 24-byte little-endian header
+  followed by raw float32/float64 samples.
+* ``application/x-npy`` — a 1-D float ``.npy`` array; the sample rate comes from
+  the ``sample_rate`` query parameter.
+
+Samples are wrapped with ``np.frombuffer`` so the body is never copied or
+parsed element by element. Spectra are returned in the same NOBW framing.
+
+NOBW header layout (24 bytes, little-endian)::
+
+    magic    4s  b"NOBW"
+    version  u8  1
+    kind     u8  0 = waveform, 1 = magnitude spectrum
+    dtype    u8  1 = float32, 2 = float64
+    (pad)    1 byte
+    rate     f64 sample rate in Hz (waveform) or Hz per bin (spectrum)
+    count    u64 number of values that follow
+"""
+
+import ast
+import struct
+
+import numpy as np
+
+FRAME_MEDIA_TYPE = "application/octet-stream"
+NPY_MEDIA_TYPE = "application/x-npy"
+
+MAGIC = b"NOBW"
+VERSION = 1
+KIND_WAVEFORM = 0
+KIND_SPECTRUM = 1
+HEADER = struct.Struct("<4sBBBxdQ")
+
+DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f8")}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+NPY_MAGIC = b"\x93NUMPY"
+
+
+class WaveformFormatError(ValueError):
+    pass
+
+
+def validate_waveform(waveform: np.ndarray, sample_rate: float) -> None:
+    """Reject waveforms that are not non-empty, finite 1-D arrays, and non-positive sample rates."""
+    if waveform.ndim != 1:
+        raise WaveformFormatError(f"waveform must be 1-D, got {waveform.ndim}-D")
+    if waveform.size == 0:
+        raise WaveformFormatError("waveform is empty")
+    if not np.isfinite(waveform).all():
+        raise WaveformFormatError("waveform contains NaN or infinite samples")
+    if not (np.isfinite(sample_rate) and sample_rate > 0):
+        raise WaveformFormatError(f"sample_rate must be a positive number, got {sample_rate}")
+
+
+def decode_frame(body: bytes, kind: int = KIND_WAVEFORM) -> tuple[np.ndarray, float]:
+    """Return ``(values, rate)`` for a NOBW frame without copying the samples."""
+    if len(body) < HEADER.size:
+        raise WaveformFormatError("frame shorter than header")
+    magic, version, frame_kind, dtype_code, rate, count = HEADER.unpack_from(body)
+    if magic != MAGIC or version != VERSION:
+        raise WaveformFormatError("not a NOBW v1 frame")
+    if frame_kind != kind:
+        raise WaveformFormatError(f"expected frame kind {kind}, got {frame_kind}")
+    dtype = DTYPES.get(dtype_code)
+    if dtype is None:
+        raise WaveformFormatError(f"unsupported dtype code {dtype_code}")
+    if len(body) != HEADER.size + count * dtype.itemsize:
+        raise WaveformFormatError("frame length does not match sample count")
+    return np.frombuffer(body, dtype=dtype, count=count, offset=HEADER.size), rate
+
+
+def encode_frame(values: np.ndarray, rate: float, kind: int = KIND_WAVEFORM) -> bytes:
+    values = np.asarray(values)
+    dtype = values.dtype.newbyteorder("<")
+    if dtype not in DTYPE_CODES:
+        raise WaveformFormatError(f"unsupported dtype {values.dtype}")
+    header = HEADER.pack(MAGIC, VERSION, kind, DTYPE_CODES[dtype], rate, values.size)
+    return header + np.ascontiguousarray(values, dtype=dtype).tobytes()
+
+
+def decode_npy(body: bytes) -> np.ndarray:
+    """Wrap a 1-D float ``.npy`` body without copying the data section."""
+    if not body.startswith(NPY_MAGIC) or len(body) < 10:
+        raise WaveformFormatError("not an .npy file")
+    major = body[6]
+    if major == 1:
+        header_len, start = struct.unpack_from("<H", body, 8)[0], 10
+    elif major in (2, 3):
+        if len(body) < 12:
+            raise WaveformFormatError("truncated .npy header")
+        header_len, start = struct.unpack_from("<I", body, 8)[0], 12
+    else:
+        raise WaveformFormatError(f"unsupported .npy version {major}")
+    try:
+        header = ast.literal_eval(body[start:start + header_len].decode("latin1"))
+        dtype = np.dtype(header["descr"])
+        shape = header["shape"]
+    except (ValueError, SyntaxError, KeyError, TypeError) as exc:
+        raise WaveformFormatError(f"invalid .npy header: {exc}")
+    if header.get("fortran_order") or len(shape) != 1 or dtype.kind != "f":
+        raise WaveformFormatError(".npy body must be a 1-D float array")
+    offset = start + header_len
+    if len(body) != offset + shape[0] * dtype.itemsize:
+        raise WaveformFormatError(".npy data length does not match shape")
+    return np.frombuffer(body, dtype=dtype, count=shape[0], offset=offset)
+
+
+def decode_waveform(body: bytes, content_type: str, sample_rate: float | None) -> tuple[np.ndarray, float]:
+    if content_type.startswith(NPY_MEDIA_TYPE):
+        if sample_rate is None:
+            raise WaveformFormatError("sample_rate query parameter is required for .npy bodies")
+        waveform, rate = decode_npy(body), sample_rate
+    else:
+        waveform, rate = decode_frame(body)
+        rate = rate if sample_rate is None else sample_rate
+    validate_waveform(waveform, rate)
+    return waveform, rate
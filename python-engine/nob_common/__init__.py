@@ -0,0 +1,11 @@
+"""
+Helpers shared by the python-engine and the standalone python/ tools.
+
+Kept free of the web stack and compatible with Python 3.8, so RippleLab and
+PatternIncubator can import it by path without installing the engine.
+"""
+
+from .features import FEATURES, FeatureScaler
+from .timing import set_observer, stage_timer
+
+__all__ = ["FEATURES", "FeatureScaler", "set_observer", "stage_timer"]
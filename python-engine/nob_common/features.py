@@ -0,0 +1,48 @@
+"""
+Pattern feature space shared by the engine and the python/ tools.
+
+Patterns live in a 4-D feature space: frequency, magnitude, phase and
+coherence. ``FeatureScaler`` standardises the linear features and embeds
+phase on the unit circle as ``(cos, sin)``, so Euclidean distance in the
+embedded space treats 0 and 2*pi as the same phase.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+FEATURES = ("frequency", "magnitude", "phase", "coherence")
+LINEAR = [0, 1, 3]
+PHASE = 2
+
+
+class FeatureScaler:
+    """Standardise the linear features and embed phase on the unit circle.
+
+    Used by ``PatternIndex`` and the pattern incubator's clustering, so both
+    measure distance in the same embedded space.
+    """
+
+    def __init__(self, features: np.ndarray):
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURES))
+        if len(features):
+            self.mean = features[:, LINEAR].mean(axis=0)
+            std = features[:, LINEAR].std(axis=0)
+            # Constant features come out with a rounding-noise std; leave them unscaled.
+            self.std = np.where(std > 1e-9 * np.maximum(np.abs(self.mean), 1.0), std, 1.0)
+        else:
+            self.mean, self.std = np.zeros(len(LINEAR)), np.ones(len(LINEAR))
+
+    def embed(self, features: np.ndarray) -> np.ndarray:
+        """(n, 4) features to (n, 5) points: scaled linear features, cos and sin of phase."""
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURES))
+        phase = features[:, PHASE]
+        return np.column_stack([(features[:, LINEAR] - self.mean) / self.std, np.cos(phase), np.sin(phase)])
+
+    def restore(self, points: np.ndarray) -> np.ndarray:
+        """Inverse of ``embed``; phase comes back in [0, 2*pi)."""
+        points = np.asarray(points, dtype=np.float64)
+        features = np.empty((len(points), len(FEATURES)))
+        features[:, LINEAR] = points[:, :len(LINEAR)] * self.std + self.mean
+        features[:, PHASE] = np.mod(np.arctan2(points[:, -1], points[:, -2]), 2 * np.pi)
+        return features
@@ -0,0 +1,138 @@
+"""
+Nearest-neighbour index over pattern features.
+
+Distances and radii are in the standardised units of ``FeatureScaler``.
+Lookups go through a ``cKDTree``. Inserted patterns sit in a brute-force
+buffer that queries scan alongside the tree. Once the buffer holds more than
+``max(MIN_PENDING, 8 * sqrt(n))`` patterns, the ``insert`` call that
+overflowed it rebuilds the tree synchronously. The rebuild is O(n log n), so
+it costs O(sqrt(n) log n) per insert when amortised, but the caller that
+triggers it pays for the whole rebuild.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .features import FEATURES, FeatureScaler
+from .timing import stage_timer
+
+MIN_PENDING = 1024
+
+
+class PatternIndex:
+    """k-NN and radius search over pattern features with incremental inserts.
+
+    Rows are numbered in insertion order; ``labels`` optionally names them
+    (e.g. pattern ids). The feature scaling is fixed by the initial patterns.
+    """
+
+    def __init__(self, features: np.ndarray, labels: list[str | None] | None = None):
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURES))
+        self.scaler = FeatureScaler(features)
+        self.labels = list(labels) if labels is not None else [None] * len(features)
+        self._features = features
+        self._points = self.embed(features)
+        self._pending_features = np.empty((0, len(FEATURES)))
+        self._pending_points = np.empty((0, self._points.shape[1]))
+        self._tree = cKDTree(self._points) if len(features) else None
+
+    def __len__(self) -> int:
+        return len(self._features) + len(self._pending_features)
+
+    @property
+    def _indexed(self) -> int:
+        return len(self._features)
+
+    @property
+    def features(self) -> np.ndarray:
+        return np.concatenate([self._features, self._pending_features])
+
+    def embed(self, features: np.ndarray) -> np.ndarray:
+        return self.scaler.embed(features)
+
+    def insert(self, features: np.ndarray, labels: list[str | None] | None = None) -> None:
+        """Add patterns; they are searchable immediately."""
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURES))
+        self.labels.extend(labels if labels is not None else [None] * len(features))
+        self._pending_features = np.concatenate([self._pending_features, features])
+        self._pending_points = np.concatenate([self._pending_points, self.embed(features)])
+        if len(self._pending_points) > max(MIN_PENDING, 8 * int(np.sqrt(len(self)))):
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        """Fold the insert buffer into a freshly built tree."""
+        self._features = self.features
+        self._points = np.concatenate([self._points, self._pending_points])
+        self._pending_features = self._pending_features[:0]
+        self._pending_points = self._pending_points[:0]
+        self._tree = cKDTree(self._points) if len(self) else None
+
+    def query(self, features: np.ndarray, k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+        """Distances and row indices of the ``k`` nearest patterns, nearest first.
+
+        ``features`` is one (4,) vector or an (m, 4) batch; results are (k,)
+        or (m, k), with fewer columns when the index holds fewer than ``k``.
+        """
+        single = np.ndim(features) == 1
+        points = self.embed(features)
+        k = min(k, len(self))
+        if k == 0:
+            empty = np.empty((len(points), 0))
+            return (empty[0], empty[0].astype(np.intp)) if single else (empty, empty.astype(np.intp))
+
+        candidates_d, candidates_i = [], []
+        if self._indexed:
+            distances, indices = self._tree.query(points, k=min(k, self._indexed))
+            candidates_d.append(distances.reshape(len(points), -1))
+            candidates_i.append(indices.reshape(len(points), -1))
+        if len(self._pending_points):
+            pending = self._pending_points
+            distances = np.sqrt(np.maximum(
+                (points ** 2).sum(axis=1)[:, None] - 2 * points @ pending.T + (pending ** 2).sum(axis=1), 0.0
+            ))
+            nearest = np.argsort(distances, axis=1)[:, :k]
+            candidates_d.append(np.take_along_axis(distances, nearest, axis=1))
+            candidates_i.append(nearest + self._indexed)
+
+        distances, indices = np.concatenate(candidates_d, axis=1), np.concatenate(candidates_i, axis=1)
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        distances = np.take_along_axis(distances, order, axis=1)
+        indices = np.take_along_axis(indices, order, axis=1)
+        return (distances[0], indices[0]) if single else (distances, indices)
+
+    def query_radius(self, features: np.ndarray, radius: float) -> list[np.ndarray] | np.ndarray:
+        """Row indices within ``radius`` of each query, sorted by distance."""
+        single = np.ndim(features) == 1
+        points = self.embed(features)
+        results = []
+        for point in points:
+            indices = np.array(self._tree.query_ball_point(point, radius) if self._indexed else [], dtype=np.intp)
+            near = np.flatnonzero(((self._pending_points - point) ** 2).sum(axis=1) <= radius ** 2)
+            distances = np.concatenate([
+                np.sqrt(((self._points[indices] - point) ** 2).sum(axis=1)),
+                np.sqrt(((self._pending_points[near] - point) ** 2).sum(axis=1))
+            ])
+            indices = np.concatenate([indices, near + self._indexed])
+            results.append(indices[np.argsort(distances, kind="stable")])
+        return results[0] if single else results
+
+    def _row(self, index: int) -> np.ndarray:
+        if index < self._indexed:
+            return self._features[index]
+        return self._pending_features[index - self._indexed]
+
+    @stage_timer("neighbors")
+    def nearest(self, features: np.ndarray, k: int = 5) -> list[dict]:
+        """JSON-ready nearest patterns for one query vector."""
+        distances, indices = self.query(features, k)
+        return [
+            {
+                "index": int(index),
+                "id": self.labels[index],
+                "distance": float(distance),
+                **dict(zip(FEATURES, self._row(index).tolist()))
+            }
+            for distance, index in zip(distances, indices)
+        ]
@@ -0,0 +1,42 @@
+"""
+Named stage timing.
+
+``stage_timer`` times a stage, as a context manager or decorator, and passes
+``(stage, seconds)`` to the observer installed with ``set_observer``. The
+engine installs one that feeds its metrics registry; a tool running on its
+own has none, so timing there is a no-op.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import time
+from typing import Callable, Optional
+
+_observer: Optional[Callable[[str, float], None]] = None
+
+
+def set_observer(observer: Optional[Callable[[str, float], None]]) -> None:
+    """Send every stage timing to ``observer(stage, seconds)``; None turns timing off."""
+    global _observer
+    _observer = observer
+
+
+class stage_timer(contextlib.ContextDecorator):
+    """Time a named stage: ``with stage_timer("spectrum"):`` or ``@stage_timer("spectrum")``."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def _recreate_cm(self):
+        # A fresh timer per decorated call keeps concurrent calls independent.
+        return type(self)(self.stage)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if _observer is not None:
+            _observer(self.stage, time.perf_counter() - self._start)
+        return False
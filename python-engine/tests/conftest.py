@@ -0,0 +1,19 @@
+import os
+
+# Settings are read once at import time: analyse in the threadpool and keep
+# the tests off any cache directory or graph configured in the environment.
+os.environ["ANALYZE_WORKERS"] = "0"
+for name in ("ANALYZE_CACHE_DIR", "ANALYZE_PATTERN_INDEX", "ANALYZE_GRAPH_ROOT", "ANALYZE_GRAPH_CACHE"):
+    os.environ.pop(name, None)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+@pytest.fixture
+def client():
+    main.cache.clear()
+    with TestClient(main.app) as client:
+        yield client
@@ -0,0 +1,74 @@
+import json
+
+from app import batch, main
+from app.cache import canonical_key
+
+
+def _lines(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_streams_results_in_input_order(client):
+    items = [{"payload": {"n": i}} for i in range(150)]
+    response = client.post("/analyze/batch", json=items)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(batch.NDJSON_MEDIA_TYPE)
+    lines = _lines(response)
+    assert [line["index"] for line in lines] == list(range(150))
+    assert all(line["status"] == "processed" for line in lines)
+    assert [line["received"] for line in lines] == [item["payload"] for item in items]
+
+
+def test_ndjson_batch_reports_bad_lines_and_keeps_going(client):
+    body = b'{"payload": {"a": 1}}\nnot json\n{"payload": 5}\n\n{"payload": {"b": 2}}'
+    response = client.post("/analyze/batch", content=body, headers={"content-type": batch.NDJSON_MEDIA_TYPE})
+    lines = _lines(response)
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert [line["status"] for line in lines] == ["processed", "error", "error", "processed"]
+    assert lines[1]["error"].startswith("invalid JSON")
+    assert lines[2]["error"].startswith("invalid item")
+
+
+def test_invalid_waveform_is_an_error_record(client):
+    items = [
+        {"payload": {"waveform": [[0.0, 1.0]], "sample_rate": 100}},
+        {"payload": {"waveform": [0.0, 1.0, 0.0, -1.0], "sample_rate": 0}},
+        {"payload": {"waveform": [0.0, 1.0, 0.0, -1.0], "sample_rate": 4}}
+    ]
+    lines = _lines(client.post("/analyze/batch", json=items))
+    assert [line["status"] for line in lines] == ["error", "error", "processed"]
+    assert lines[2]["spectrum"]["peak_frequency"] == 1.0
+
+
+def test_failing_item_does_not_end_the_stream(client, monkeypatch):
+    def analyze_many(payloads):
+        if any(payload.get("boom") for payload in payloads):
+            raise RuntimeError("boom")
+        return [{"status": "processed", "received": payload} for payload in payloads]
+
+    monkeypatch.setattr(batch, "analyze_many", analyze_many)
+    payloads = [{"n": 0}, {"boom": True}, {"n": 2}]
+    lines = _lines(client.post("/analyze/batch", json=[{"payload": p} for p in payloads]))
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert [line["status"] for line in lines] == ["processed", "error", "processed"]
+    assert lines[1]["error"] == "analysis failed: RuntimeError: boom"
+
+    # Failures are not cached; the items around them are.
+    assert main.cache.get(canonical_key(payloads[0])) is not None
+    assert main.cache.get(canonical_key(payloads[1])) is None
+
+
+def test_batch_body_must_be_a_json_array(client):
+    response = client.post("/analyze/batch", json={"payload": {}})
+    assert response.status_code == 400
+
+
+def test_repeated_batch_is_served_from_cache(client):
+    items = [{"payload": {"n": i}} for i in range(3)]
+    first = client.post("/analyze/batch", json=items).text
+    hits = main.cache.stats.hits
+    assert client.post("/analyze/batch", json=items).text == first
+    assert main.cache.stats.hits == hits + 3
+
+    client.post("/analyze/batch", json=items, headers={"X-Cache-Bypass": "1"})
+    assert main.cache.stats.hits == hits + 3
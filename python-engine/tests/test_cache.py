@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from app import cache as cache_module
+from app.cache import ResultCache, canonical_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def test_hit_miss_and_expiry(clock):
+    cache = ResultCache(max_bytes=1 << 20, ttl=10.0)
+    assert cache.get("k") is None
+    cache.put("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    clock.now += 10.0
+    assert cache.get("k") is None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.expirations) == (1, 2, 1)
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+def test_lru_eviction_by_size(clock):
+    size = len(json.dumps({"v": "x" * 10}))
+    cache = ResultCache(max_bytes=2 * size, ttl=10.0)
+    cache.put("a", {"v": "x" * 10})
+    cache.put("b", {"v": "y" * 10})
+    cache.get("a")
+    cache.put("c", {"v": "z" * 10})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats.evictions == 1
+
+
+def test_disk_tier_survives_restart_and_expires(clock, tmp_path):
+    ResultCache(max_bytes=1 << 20, ttl=10.0, directory=str(tmp_path)).put("k", {"v": 1})
+    restarted = ResultCache(max_bytes=1 << 20, ttl=10.0, directory=str(tmp_path))
+    assert restarted.get("k") == {"v": 1}
+    assert restarted.stats.disk_hits == 1
+
+    fresh = ResultCache(max_bytes=1 << 20, ttl=10.0, directory=str(tmp_path))
+    clock.now += 10.0
+    assert fresh.get("k") is None
+    assert not list(tmp_path.rglob("*.json"))
+
+
+def test_malformed_disk_entry_is_a_miss_and_is_removed(clock, tmp_path):
+    cache = ResultCache(max_bytes=1 << 20, ttl=10.0, directory=str(tmp_path))
+    path = cache.disk._path("k")
+    path.parent.mkdir(parents=True)
+    path.write_text(json.dumps({"value": {"v": 1}}))
+    assert cache.get("k") is None
+    assert not path.exists()
+
+
+def test_canonical_key_ignores_key_order():
+    assert canonical_key({"a": 1, "b": [1, 2]}) == canonical_key({"b": [1, 2], "a": 1})
+    assert canonical_key({"a": 1}) != canonical_key({"a": 2})
+
+
+def test_endpoint_reports_cache_outcome(client):
+    body = {"payload": {"waveform": [0.0, 1.0, 0.0, -1.0], "sample_rate": 4}}
+    assert client.post("/analyze", json=body).headers["X-Cache"] == "MISS"
+    assert client.post("/analyze", json=body).headers["X-Cache"] == "HIT"
+    bypass = client.post("/analyze", json=body, headers={"X-Cache-Bypass": "1"})
+    assert bypass.headers["X-Cache"] == "BYPASS"
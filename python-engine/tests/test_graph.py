@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from app import graph as graph_module
+from app.graph import load_graph
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+@pytest.fixture
+def root(tmp_path):
+    _write(tmp_path / "databases" / "nodes.json", {"nodes": [
+        {"id": "A", "connections": ["B"], "position": {"x": 1.0}},
+        {"id": "B", "parent": "A"}
+    ]})
+    _write(tmp_path / "codex" / "codex-index.json", {"codex": {"entries": {"core": [{"id": "C", "layer": 2}]}}})
+    return tmp_path
+
+
+def _forbid_rebuild(monkeypatch):
+    def build_graph(paths):
+        raise AssertionError("graph was rebuilt")
+    monkeypatch.setattr(graph_module, "build_graph", build_graph)
+
+
+def test_cache_is_reused_while_sources_are_unchanged(root, monkeypatch):
+    graph = load_graph(root)
+    assert graph.ids == ["A", "B", "C"]
+    assert (root / graph_module.CACHE_NAME).exists()
+
+    _forbid_rebuild(monkeypatch)
+    assert load_graph(root).ids == ["A", "B", "C"]
+
+    # Same content, new mtime: the hashes match, so the cache is re-stamped.
+    source = root / "databases" / "nodes.json"
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert load_graph(root).ids == ["A", "B", "C"]
+
+
+def test_cache_is_rebuilt_when_a_source_changes(root):
+    load_graph(root)
+    _write(root / "databases" / "nodes.json", {"nodes": [{"id": "A"}, {"id": "B"}, {"id": "D", "parent": "B"}]})
+    graph = load_graph(root)
+    assert graph.ids == ["A", "B", "D", "C"]
+    assert graph.neighbors("B").tolist() == [graph.index["D"]]
+
+
+def test_cache_is_rebuilt_when_a_source_is_added(root):
+    load_graph(root)
+    _write(root / "databases" / "more.json", {"items": [{"id": "E"}]})
+    assert "E" in load_graph(root).index
+
+
+def test_failed_cache_write_leaves_no_temp_file(root, monkeypatch):
+    def savez(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(graph_module.np, "savez", savez)
+    cache_dir = root / "cache"
+    load_graph(root, cache_dir / "graph.npz")
+    assert list(cache_dir.iterdir()) == []
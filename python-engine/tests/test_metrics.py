@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+
+from app import main
+from app.metrics import REQUESTS, STAGE_LATENCY, Counter, collect_stages, stage_timer
+from nob_common import timing
+
+
+def _requests(route: str, status: str) -> float:
+    return REQUESTS._values.get((route, "POST", status), 0.0)
+
+
+def test_unhandled_errors_are_counted_as_500(monkeypatch):
+    def analyze_payload(payload):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main, "analyze_payload", analyze_payload)
+    before = _requests("/analyze", "500")
+    with TestClient(main.app, raise_server_exceptions=False) as client:
+        for _ in range(3):
+            response = client.post("/analyze", json={"payload": {"x": 1}}, headers={"X-Cache-Bypass": "1"})
+            assert response.status_code == 500
+        assert 'status="500"' in client.get("/metrics").text
+    assert _requests("/analyze", "500") == before + 3
+
+
+def test_label_values_are_escaped():
+    counter = Counter("nob_test_total", "Test.", ("path",))
+    counter.inc(path='a"b\\c\nd')
+    assert counter.render().splitlines()[-1] == 'nob_test_total{path="a\\"b\\\\c\\nd"} 1'
+
+
+def test_stage_timer_feeds_the_registry_and_collectors():
+    with collect_stages() as samples:
+        with stage_timer("unit"):
+            pass
+    assert [stage for stage, _ in samples] == ["unit"]
+
+    @stage_timer("unit-decorated")
+    def work():
+        return 1
+
+    work()
+    assert ("unit-decorated",) in STAGE_LATENCY._series
+
+
+def test_stage_timer_without_an_observer_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(timing, "_observer", None)
+    with timing.stage_timer("ignored") as timer:
+        pass
+    assert timer.stage == "ignored"
@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pytest
+
+from nob_common import neighbors
+from app import main
+from app.neighbors import FeatureScaler, PatternIndex, load_pattern_index, query_features
+
+
+def _features(rng, n):
+    return np.column_stack([
+        rng.uniform(100, 1000, n), rng.uniform(0, 2, n), rng.uniform(0, 2 * np.pi, n), rng.uniform(0, 1, n)
+    ])
+
+
+def _brute_force(index, queries, k):
+    points = index.embed(index.features)
+    distances = np.sqrt(((index.embed(queries)[:, None, :] - points[None, :, :]) ** 2).sum(axis=2))
+    order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(distances, order, axis=1), order
+
+
+@pytest.mark.parametrize("inserted", [0, 5, 40])
+def test_knn_matches_brute_force(monkeypatch, inserted):
+    monkeypatch.setattr(neighbors, "MIN_PENDING", 16)
+    rng = np.random.default_rng(1)
+    index = PatternIndex(_features(rng, 300))
+    for _ in range(inserted):
+        index.insert(_features(rng, 1))
+    queries = _features(rng, 25)
+
+    distances, indices = index.query(queries, k=7)
+    expected_distances, expected_indices = _brute_force(index, queries, 7)
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-9, atol=1e-9)
+    np.testing.assert_array_equal(indices, expected_indices)
+
+
+def test_radius_matches_brute_force():
+    rng = np.random.default_rng(2)
+    index = PatternIndex(_features(rng, 200))
+    index.insert(_features(rng, 20))
+    for query in _features(rng, 10):
+        expected_distances, expected = _brute_force(index, query[None], len(index))
+        within = expected[0][expected_distances[0] <= 1.0]
+        np.testing.assert_array_equal(index.query_radius(query, 1.0), within)
+
+
+def test_phase_wraps_around():
+    index = PatternIndex(np.array([[440.0, 1.0, 0.05, 0.5], [440.0, 1.0, np.pi, 0.5]]))
+    _, nearest = index.query(np.array([440.0, 1.0, 2 * np.pi - 0.05, 0.5]), k=1)
+    assert nearest.tolist() == [0]
+
+
+def test_query_larger_than_index():
+    index = PatternIndex(np.zeros((2, 4)))
+    distances, indices = index.query(np.zeros(4), k=5)
+    assert distances.shape == indices.shape == (2,)
+
+
+def test_scaler_restores_features():
+    features = _features(np.random.default_rng(3), 50)
+    scaler = FeatureScaler(features)
+    np.testing.assert_allclose(scaler.restore(scaler.embed(features)), features)
+
+
+def test_query_features_requires_every_feature():
+    complete = {"frequency": 440, "magnitude": 1, "phase": 0.5, "coherence": 0.9}
+    assert query_features(complete).tolist() == [440.0, 1.0, 0.5, 0.9]
+    assert query_features({"frequency": 440, "magnitude": 1}) is None
+    assert query_features({**complete, "phase": "x"}) is None
+    assert query_features({**complete, "phase": float("nan")}) is None
+    assert query_features(None) is None
+
+
+def test_json_loader_skips_incomplete_patterns(tmp_path):
+    path = tmp_path / "patterns.json"
+    complete = {"id": "a", "frequency": 440, "magnitude": 1, "phase": 0.5, "coherence": 0.9}
+    path.write_text(json.dumps({"patterns": [
+        complete,
+        {"id": "missing", "frequency": 440, "magnitude": 1, "phase": 0.5},
+        {**complete, "id": "text", "coherence": "high"},
+        {**complete, "id": "null", "magnitude": None},
+        {**complete, "id": "b", "frequency": 880}
+    ]}))
+    index = load_pattern_index(path)
+    assert index.labels == ["a", "b"]
+    np.testing.assert_array_equal(index.features[:, 0], [440, 880])
+
+
+def test_json_loader_rejects_file_without_complete_patterns(tmp_path):
+    path = tmp_path / "patterns.json"
+    path.write_text(json.dumps([{"id": "a", "frequency": 440}]))
+    with pytest.raises(ValueError):
+        load_pattern_index(path)
+
+
+def test_batch_results_include_nearest_patterns(client, monkeypatch):
+    index = PatternIndex(np.array([[440.0, 1.0, 0.5, 0.9], [880.0, 2.0, 1.0, 0.1]]), ["a", "b"])
+    monkeypatch.setattr(main, "pattern_index", index)
+    query = {"frequency": 450, "magnitude": 1.1, "phase": 0.5, "coherence": 0.8}
+    single = client.post("/analyze", json={"payload": query}).json()
+    response = client.post("/analyze/batch", json=[{"payload": query}, {"payload": {"frequency": 450}}])
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["nearest_patterns"] == single["nearest_patterns"]
+    assert single["nearest_patterns"][0]["id"] == "a"
+    assert "nearest_patterns" not in lines[1]
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from app.analysis import spectrum_metrics
+from app.streaming import SlidingSpectrum
+
+
+@pytest.mark.parametrize("window,hop", [(256, 64), (256, 256), (100, 7)])
+def test_sliding_spectrum_matches_rfft_of_window(window, hop):
+    rng = np.random.default_rng(0)
+    signal = rng.normal(size=5000)
+    sliding = SlidingSpectrum(window, hop, sample_rate=1000.0)
+    emitted = []
+    offset = 0
+    while offset < signal.size:
+        size = int(rng.integers(1, 3 * hop))
+        emitted += sliding.push(signal[offset:offset + size])
+        offset += size
+
+    ends = np.arange(window, signal.size + 1)
+    ends = ends[ends % hop == 0]
+    assert [metrics["sample_index"] for metrics in emitted] == ends.tolist()
+    for metrics in emitted:
+        end = metrics["sample_index"]
+        expected = spectrum_metrics(np.abs(np.fft.rfft(signal[end - window:end])), sliding.freqs, window)
+        for key, value in expected.items():
+            assert metrics[key] == pytest.approx(value, rel=1e-9, abs=1e-9)
+    np.testing.assert_array_equal(sliding.window_samples(), signal[-window:])
+
+
+def test_websocket_stream_emits_hops(client):
+    with client.websocket_connect("/ws/ripple?sample_rate=64&window=64&hop=32") as ws:
+        ws.send_json({"samples": np.sin(2 * np.pi * 8 * np.arange(96) / 64).tolist()})
+        first = ws.receive_json()
+        assert first["peak_frequency"] == pytest.approx(8.0)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from app.analysis import spectrum
+from app.waveform import (
+    FRAME_MEDIA_TYPE, KIND_SPECTRUM, KIND_WAVEFORM, NPY_MEDIA_TYPE, WaveformFormatError,
+    decode_frame, decode_waveform, encode_frame
+)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64, np.dtype(">f8")])
+def test_frame_round_trip(dtype):
+    values = np.linspace(-1, 1, 101).astype(dtype)
+    decoded, rate = decode_frame(encode_frame(values, 44100.0))
+    assert rate == 44100.0
+    assert decoded.dtype == np.dtype(dtype).newbyteorder("<")
+    np.testing.assert_array_equal(decoded, values)
+
+
+def test_frame_rejects_bad_input():
+    frame = encode_frame(np.zeros(4, dtype=np.float32), 8.0)
+    with pytest.raises(WaveformFormatError):
+        decode_frame(frame[:-1])
+    with pytest.raises(WaveformFormatError):
+        decode_frame(b"XXXX" + frame[4:])
+    with pytest.raises(WaveformFormatError):
+        decode_frame(frame, KIND_SPECTRUM)
+    with pytest.raises(WaveformFormatError):
+        encode_frame(np.zeros(4, dtype=np.int16), 8.0)
+
+
+def test_decode_waveform_validates():
+    with pytest.raises(WaveformFormatError):
+        decode_waveform(encode_frame(np.zeros(0), 8.0), FRAME_MEDIA_TYPE, None)
+    with pytest.raises(WaveformFormatError):
+        decode_waveform(encode_frame(np.zeros(4), 0.0), FRAME_MEDIA_TYPE, None)
+    with pytest.raises(WaveformFormatError):
+        decode_waveform(b"", NPY_MEDIA_TYPE, None)
+    waveform, rate = decode_waveform(encode_frame(np.ones(4), 0.0), FRAME_MEDIA_TYPE, 8.0)
+    assert rate == 8.0 and waveform.size == 4
+
+
+def test_binary_analyze_returns_spectrum_frame(client):
+    rate = 64.0
+    waveform = np.sin(2 * np.pi * 8 * np.arange(64) / rate).astype(np.float32)
+    response = client.post(
+        "/analyze",
+        content=encode_frame(waveform, rate),
+        headers={"content-type": FRAME_MEDIA_TYPE, "accept": FRAME_MEDIA_TYPE}
+    )
+    assert response.status_code == 200
+    magnitude, bin_width = decode_frame(response.content, KIND_SPECTRUM)
+    assert bin_width == 1.0
+    assert magnitude.dtype == np.float32
+    np.testing.assert_allclose(magnitude, np.abs(np.fft.rfft(waveform)), rtol=1e-5, atol=1e-4)
+
+    result = client.post("/analyze", content=encode_frame(waveform, rate), headers={"content-type": FRAME_MEDIA_TYPE})
+    assert result.json()["spectrum"]["peak_frequency"] == 8.0
+
+
+def test_binary_analyze_rejects_bad_frames(client):
+    response = client.post(
+        "/analyze", content=encode_frame(np.zeros(0), 8.0, KIND_WAVEFORM), headers={"content-type": FRAME_MEDIA_TYPE}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("bad", [np.nan, np.inf, -np.inf])
+def test_non_finite_samples_are_rejected(client, bad):
+    waveform = np.array([0.0, 1.0, bad, -1.0])
+    response = client.post("/analyze", content=encode_frame(waveform, 4.0), headers={"content-type": FRAME_MEDIA_TYPE})
+    assert response.status_code == 400
+
+    result = client.post("/analyze", json={"payload": {"waveform": [0.0, 1.0, "NaN"], "sample_rate": 4.0}})
+    assert result.status_code == 200
+    assert result.json()["status"] == "error"
+
+
+def test_huge_amplitudes_do_not_overflow():
+    metrics, _ = spectrum(np.array([1e200, 1e200]), 2.0)
+    assert metrics["harmonic_energy"] == np.finfo(np.float64).max
+    with pytest.raises(WaveformFormatError):
+        spectrum(np.array([1e308, 1e308]), 2.0)
+
+
+@pytest.mark.parametrize("waveform,expected", [([0, 1, 0, -1], 4.0), ([1, 1, 1], 3.0), ([1, 0, 0, 0, 0], 5.0)])
+def test_harmonic_energy_is_two_sided(waveform, expected):
+    metrics, _ = spectrum(np.asarray(waveform, dtype=np.float64), 4.0)
+    full = np.abs(np.fft.fft(waveform)).sum()
+    assert metrics["harmonic_energy"] == pytest.approx(full ** 2 / len(waveform))
+    assert metrics["harmonic_energy"] == pytest.approx(expected)
@@ -7,12 +7,16 @@ Uses Dash/Plotly for real-time visualization
 import dash
 from dash import dcc, html, Input, Output, State
 import plotly.graph_objects as go
-import plotly.express as px
 import json
+import os
+import threading
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 
+from feeds import open_feed, start_feed
+from timeseries import MAX_POINTS, ChunkedFrame, FigureCache, RingBuffer, RollupPyramid, downsample, visible_range
+
 # Initialize app
 app = dash.Dash(__name__)
 
@@ -28,101 +32,229 @@ def generate_solar_data():
     }
     return pd.DataFrame(data)
 
-df_solar = generate_solar_data()
+def load_solar_data(path=None):
+    """Estate readings from a CSV/Parquet file with a ``date`` column, or synthetic data"""
+    path = path or os.environ.get('SOLAR_DATA')
+    if not path:
+        return generate_solar_data()
+    df = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path, parse_dates=['date'])
+    return df.sort_values('date', ignore_index=True)
 
-# Layout
-app.layout = html.Div([
-    html.Header([
-        html.H1('☀️ Dash Solar Estate', style={'color': '#FFD700', 'textAlign': 'center'}),
-        html.P('Real-time solar energy management dashboard', style={'textAlign': 'center', 'color': '#ccc'})
-    ], style={'background': '#1a1a2e', 'padding': '20px', 'marginBottom': '20px', 'borderBottom': '2px solid #FFD700'}),
+SERIES = ['irradiance', 'temperature', 'power_output', 'efficiency']
 
-    html.Div([
-        html.Div([
-            html.Div([
-                html.H3('Solar Irradiance', style={'color': '#FFD700'}),
-                dcc.Graph(id='irradiance-graph', style={'height': '400px'})
-            ], style={'flex': 1, 'padding': '15px', 'border': '1px solid #FFD700', 'borderRadius': '8px', 'background': 'rgba(255, 215, 0, 0.05)'}),
+history = ChunkedFrame(load_solar_data())
+rollups = RollupPyramid(history.window(), SERIES)
+figure_cache = FigureCache(max_entries=256)
 
-            html.Div([
-                html.H3('Power Output', style={'color': '#FFD700'}),
-                dcc.Graph(id='power-graph', style={'height': '400px'})
-            ], style={'flex': 1, 'padding': '15px', 'border': '1px solid #FFD700', 'borderRadius': '8px', 'background': 'rgba(255, 215, 0, 0.05)', 'marginLeft': '20px'})
-        ], style={'display': 'flex', 'gap': '20px', 'marginBottom': '20px'}),
+# Live mode: SOLAR_LIVE names a feed (see feeds.py); the page polls for new
+# readings every SOLAR_LIVE_INTERVAL milliseconds.
+LIVE = os.environ.get('SOLAR_LIVE')
+LIVE_INTERVAL_MS = int(os.environ.get('SOLAR_LIVE_INTERVAL', 1000))
+live_buffer = RingBuffer(SERIES, capacity=MAX_POINTS)
+_data_lock = threading.Lock()
+
+def append_readings(rows):
+    """Take in new readings without copying the history
+
+    Rows go to the raw history as a new chunk, the live ring buffer and the
+    rollups. Cached figures are keyed on the rollup epoch, which only moves
+    when an hour is completed or backfilled, so a steady feed retires them
+    once an hour rather than on every batch.
+    """
+    rows = rows.sort_values('date', ignore_index=True)
+    with _data_lock:
+        history.append(rows)
+        live_buffer.extend(rows)
+        rollups.append(rows)
+
+def stat_row(label, value, last=False):
+    return html.Div([
+        html.P(label, style={'color': '#ccc'}),
+        html.P(value, style={'color': '#FFD700', 'fontSize': '18px', 'fontWeight': 'bold'})
+    ], style={'padding': '10px'} if last else {'padding': '10px', 'borderBottom': '1px solid #FFD700'})
+
+def statistics_panel():
+    """Whole-history statistics from the rollups' running totals
+
+    Cheap enough to build on every live tick, so it stays out of the figure
+    cache, where a new entry per batch would push out cached figures.
+    """
+    irradiance = rollups.summary('irradiance')
+    efficiency = rollups.summary('efficiency')
+    power = rollups.summary('power_output')
+    return html.Div([
+        stat_row('Avg Irradiance:', f"{irradiance['mean']:.1f} W/m²"),
+        stat_row('Avg Efficiency:', f"{efficiency['mean']:.1%}"),
+        stat_row('Peak Power:', f"{power['max']:.0f} kW", last=True)
+    ])
+
+# Layout, rebuilt on every page load so the statistics follow appended readings
+def serve_layout():
+    return html.Div([
+        html.Header([
+            html.H1('☀️ Dash Solar Estate', style={'color': '#FFD700', 'textAlign': 'center'}),
+            html.P('Real-time solar energy management dashboard', style={'textAlign': 'center', 'color': '#ccc'})
+        ], style={'background': '#1a1a2e', 'padding': '20px', 'marginBottom': '20px', 'borderBottom': '2px solid #FFD700'}),
 
         html.Div([
             html.Div([
-                html.H3('System Efficiency', style={'color': '#FFD700'}),
-                dcc.Graph(id='efficiency-graph', style={'height': '350px'})
-            ], style={'flex': 1, 'padding': '15px', 'border': '1px solid #FFD700', 'borderRadius': '8px', 'background': 'rgba(255, 215, 0, 0.05)'}),
+                html.Div([
+                    html.H3('Solar Irradiance', style={'color': '#FFD700'}),
+                    dcc.Graph(id='irradiance-graph', style={'height': '400px'})
+                ], style={'flex': 1, 'padding': '15px', 'border': '1px solid #FFD700', 'borderRadius': '8px', 'background': 'rgba(255, 215, 0, 0.05)'}),
+
+                html.Div([
+                    html.H3('Power Output', style={'color': '#FFD700'}),
+                    dcc.Graph(id='power-graph', style={'height': '400px'})
+                ], style={'flex': 1, 'padding': '15px', 'border': '1px solid #FFD700', 'borderRadius': '8px', 'background': 'rgba(255, 215, 0, 0.05)', 'marginLeft': '20px'})
+            ], style={'display': 'flex', 'gap': '20px', 'marginBottom': '20px'}),
 
             html.Div([
-                html.H3('Statistics', style={'color': '#FFD700'}),
                 html.Div([
-                    html.Div([
-                        html.P('Avg Irradiance:', style={'color': '#ccc'}),
-                        html.P(f"{df_solar['irradiance'].mean():.1f} W/m²", style={'color': '#FFD700', 'fontSize': '18px', 'fontWeight': 'bold'})
-                    ], style={'padding': '10px', 'borderBottom': '1px solid #FFD700'}),
-                    html.Div([
-                        html.P('Avg Efficiency:', style={'color': '#ccc'}),
-                        html.P(f"{df_solar['efficiency'].mean():.1%}", style={'color': '#FFD700', 'fontSize': '18px', 'fontWeight': 'bold'})
-                    ], style={'padding': '10px', 'borderBottom': '1px solid #FFD700'}),
-                    html.Div([
-                        html.P('Peak Power:', style={'color': '#ccc'}),
-                        html.P(f"{df_solar['power_output'].max():.0f} kW", style={'color': '#FFD700', 'fontSize': '18px', 'fontWeight': 'bold'})
-                    ], style={'padding': '10px'})
-                ])
-            ], style={'flex': 1, 'padding': '15px', 'border': '1px solid #FFD700', 'borderRadius': '8px', 'background': 'rgba(255, 215, 0, 0.05)', 'marginLeft': '20px'})
-        ], style={'display': 'flex', 'gap': '20px'})
-    ], style={'padding': '20px', 'background': '#1a1a2e'})
-])
+                    html.H3('System Efficiency', style={'color': '#FFD700'}),
+                    dcc.Graph(id='efficiency-graph', style={'height': '350px'})
+                ], style={'flex': 1, 'padding': '15px', 'border': '1px solid #FFD700', 'borderRadius': '8px', 'background': 'rgba(255, 215, 0, 0.05)'}),
+
+                html.Div([
+                    html.H3('Statistics', style={'color': '#FFD700'}),
+                    html.Div(statistics_panel(), id='statistics')
+                ], style={'flex': 1, 'padding': '15px', 'border': '1px solid #FFD700', 'borderRadius': '8px', 'background': 'rgba(255, 215, 0, 0.05)', 'marginLeft': '20px'})
+            ], style={'display': 'flex', 'gap': '20px'})
+        ], style={'padding': '20px', 'background': '#1a1a2e'}),
+
+        dcc.Interval(id='live-interval', interval=LIVE_INTERVAL_MS, disabled=not LIVE),
+        dcc.Store(id='live-cursor', data=live_buffer.seq)
+    ])
+
+app.layout = serve_layout
 
 # Callbacks
-@app.callback(
-    Output('irradiance-graph', 'figure'),
-    Input('irradiance-graph', 'id')
-)
-def update_irradiance(id_val):
-    fig = px.line(df_solar, x='date', y='irradiance', title='Solar Irradiance Over Time')
-    fig.update_traces(line_color='#FFD700')
+def cache_range(x_range, resolution):
+    """``x_range`` widened to whole buckets, so nearby pans and zooms share a cache entry"""
+    if x_range is None:
+        return None
+    freq = {'raw': 'h', 'hourly': 'h', 'daily': 'D', 'monthly': 'MS'}[resolution]
+    if freq == 'MS':
+        return (x_range[0].to_period('M').start_time, (x_range[1].to_period('M') + 1).start_time)
+    return (x_range[0].floor(freq), x_range[1].ceil(freq))
+
+def live_times(times):
+    """Ring-buffer timestamps as millisecond ISO strings for a live trace"""
+    return [str(stamp) for stamp in times.astype('datetime64[ms]')]
+
+def line_figure(column, title, color, relayout):
+    """Line chart of the visible range of ``column`` at the finest resolution fitting MAX_POINTS
+
+    Zooming or panning fires ``relayoutData``. Ranges holding at most
+    MAX_POINTS raw rows are drawn from the raw frame; wider ones from the
+    hourly, daily or monthly rollups as a mean line inside a min-max band, so
+    peaks stay visible. Figures are memoized per series, bucketed range,
+    resolution and rollup epoch, and ``uirevision`` keeps the user's zoom
+    when the figure is replaced.
+
+    A cached figure stops at the readings present when it was built, so in
+    live mode its live trace is filled from the ring buffer with everything
+    after that point; stream_readings extends it from there.
+    """
+    x_range = visible_range(relayout)
+    rows = history.count(cache_range(x_range, 'raw'))
+    resolution = rollups.resolution(rows, x_range, MAX_POINTS)
+    key_range = cache_range(x_range, resolution)
+    key = (column, key_range, resolution, rollups.epoch)
+
+    def build():
+        # Read the cursor first: readings appended during the build show up
+        # twice at worst, never not at all.
+        return live_buffer.seq, build_figure(column, title, color, key_range, resolution).to_dict()
+    built_at, fig = figure_cache.get_or_create(key, build)
+    if not LIVE:
+        return fig
+    times, values, _ = live_buffer.since(built_at)
+    live = {**fig['data'][-1], 'x': live_times(times), 'y': values[column].tolist()}
+    return {**fig, 'data': [*fig['data'][:-1], live]}
+
+def build_figure(column, title, color, x_range, resolution):
+    if resolution == 'raw':
+        x, y = downsample(history.window(x_range), column, None, MAX_POINTS)
+        traces = [go.Scatter(x=x, y=y, mode='lines', line_color=color, name=column)]
+    else:
+        buckets = rollups.rollup(resolution, x_range)[column]
+        x = buckets.index
+        traces = [
+            go.Scatter(x=x, y=buckets['max'], mode='lines', line_width=0, showlegend=False, hoverinfo='skip'),
+            go.Scatter(x=x, y=buckets['min'], mode='lines', line_width=0, fill='tonexty',
+                       fillcolor='rgba(255, 255, 255, 0.15)', showlegend=False, hoverinfo='skip'),
+            go.Scatter(x=x, y=buckets['sum'] / buckets['count'], mode='lines', line_color=color,
+                       name=f'{column} ({resolution} mean)')
+        ]
+    if LIVE:
+        # Filled by stream_readings through extendData; always the last trace.
+        traces.append(go.Scatter(x=[], y=[], mode='lines', line_color=color, line_dash='dot', name=f'{column} (live)'))
+    fig = go.Figure(traces)
     fig.update_layout(
+        title=title,
         template='plotly_dark',
         hovermode='x unified',
         plot_bgcolor='rgba(26, 26, 46, 0.5)',
-        paper_bgcolor='rgba(26, 26, 46, 0.5)'
+        paper_bgcolor='rgba(26, 26, 46, 0.5)',
+        uirevision=column,
+        xaxis_title='date',
+        yaxis_title=column
     )
     return fig
 
+@app.callback(
+    Output('irradiance-graph', 'figure'),
+    Input('irradiance-graph', 'relayoutData')
+)
+def update_irradiance(relayout):
+    return line_figure('irradiance', 'Solar Irradiance Over Time', '#FFD700', relayout)
+
 @app.callback(
     Output('power-graph', 'figure'),
-    Input('power-graph', 'id')
+    Input('power-graph', 'relayoutData')
 )
-def update_power(id_val):
-    fig = px.line(df_solar, x='date', y='power_output', title='Power Output Over Time')
-    fig.update_traces(line_color='#00FF00')
-    fig.update_layout(
-        template='plotly_dark',
-        hovermode='x unified',
-        plot_bgcolor='rgba(26, 26, 46, 0.5)',
-        paper_bgcolor='rgba(26, 26, 46, 0.5)'
-    )
-    return fig
+def update_power(relayout):
+    return line_figure('power_output', 'Power Output Over Time', '#00FF00', relayout)
 
 @app.callback(
     Output('efficiency-graph', 'figure'),
-    Input('efficiency-graph', 'id')
+    Input('efficiency-graph', 'relayoutData')
 )
-def update_efficiency(id_val):
-    fig = px.line(df_solar, x='date', y='efficiency', title='System Efficiency Over Time')
-    fig.update_traces(line_color='#00BFFF')
-    fig.update_layout(
-        template='plotly_dark',
-        hovermode='x unified',
-        plot_bgcolor='rgba(26, 26, 46, 0.5)',
-        paper_bgcolor='rgba(26, 26, 46, 0.5)'
-    )
-    return fig
+def update_efficiency(relayout):
+    return line_figure('efficiency', 'System Efficiency Over Time', '#00BFFF', relayout)
+
+@app.callback(
+    Output('irradiance-graph', 'extendData'),
+    Output('power-graph', 'extendData'),
+    Output('efficiency-graph', 'extendData'),
+    Output('statistics', 'children'),
+    Output('live-cursor', 'data'),
+    Input('live-interval', 'n_intervals'),
+    State('live-cursor', 'data')
+)
+def stream_readings(n_intervals, cursor):
+    """Send each client only the readings after its cursor
+
+    The points are appended to the live trace of every graph, which keeps
+    at most the ring buffer's capacity, and the statistics are rebuilt from
+    the running totals, so a tick costs O(new readings).
+    """
+    times, values, seq = live_buffer.since(cursor or 0)
+    if not len(times):
+        return (dash.no_update,) * 5
+    x = live_times(times)
+    extend = [
+        ({'x': [x], 'y': [values[column].tolist()]}, [-1], live_buffer.capacity)
+        for column in ('irradiance', 'power_output', 'efficiency')
+    ]
+    return (*extend, statistics_panel(), seq)
+
+if LIVE:
+    start_feed(lambda: open_feed(LIVE), append_readings)
+
 if __name__ == "__main__":
     print("Starting Dash Solar Estate Dashboard...")
-    app.run(debug=True, port=8050)
+    # The reloader would import this module twice and start a second feed.
+    app.run(debug=True, port=8050, use_reloader=not LIVE)
 
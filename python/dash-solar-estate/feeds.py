@@ -0,0 +1,120 @@
+"""
+Live reading feeds for the Dash Solar Estate dashboard
+Each feed is an iterator of small DataFrames of new readings with a ``date``
+column; ``start_feed`` drains one into a sink on a background thread.
+
+Feed specs (SOLAR_LIVE):
+    simulated             synthetic reading every second
+    tail:PATH             rows appended to a CSV file
+    socket:HOST:PORT      newline-delimited JSON objects from a TCP server
+"""
+
+import io
+import json
+import logging
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait before reopening a feed whose source failed.
+RETRY_INTERVAL = 5.0
+
+def simulated_feed(start=None, step=pd.Timedelta(seconds=1), interval=1.0, seed=None):
+    """One synthetic reading per ``interval`` seconds, ``step`` apart in time"""
+    rng = np.random.default_rng(seed)
+    stamp = pd.Timestamp(start) if start is not None else pd.Timestamp.now().floor('s')
+    while True:
+        yield pd.DataFrame({
+            'date': [stamp],
+            'irradiance': rng.normal(600, 150, 1),
+            'temperature': rng.normal(25, 10, 1),
+            'power_output': rng.normal(500, 100, 1),
+            'efficiency': rng.normal(0.82, 0.05, 1)
+        })
+        stamp += step
+        time.sleep(interval)
+
+def tail_feed(path, interval=1.0):
+    """Rows appended to a CSV file after the feed starts, like ``tail -f``
+
+    Only complete lines are parsed; a partially written last line waits for
+    the next poll.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        header = f.readline()
+        f.seek(0, io.SEEK_END)
+        partial = ''
+        while True:
+            chunk = f.read()
+            if not chunk:
+                time.sleep(interval)
+                continue
+            lines = (partial + chunk).split('\n')
+            partial = lines.pop()
+            if any(line.strip() for line in lines):
+                try:
+                    yield pd.read_csv(io.StringIO(header + '\n'.join(lines)), parse_dates=['date'])
+                except ValueError as exc:  # pandas ParserError included
+                    log.warning('Skipping %d malformed lines from %s: %s', len(lines), path, exc)
+
+def socket_feed(host, port, timeout=None):
+    """Readings sent as newline-delimited JSON objects over TCP"""
+    with socket.create_connection((host, port), timeout=timeout) as conn:
+        buffer = b''
+        while True:
+            data = conn.recv(65536)
+            if not data:
+                return
+            buffer += data
+            *lines, buffer = buffer.split(b'\n')
+            records = []
+            for line in lines:
+                if line.strip():
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError as exc:
+                        log.warning('Skipping malformed reading from %s:%s: %s', host, port, exc)
+            if records:
+                rows = pd.DataFrame.from_records(records)
+                rows['date'] = pd.to_datetime(rows['date'])
+                yield rows
+
+def open_feed(spec):
+    """Feed iterator for a SOLAR_LIVE spec"""
+    kind, _, target = spec.partition(':')
+    if kind == 'simulated':
+        return simulated_feed()
+    if kind == 'tail':
+        return tail_feed(target)
+    if kind == 'socket':
+        host, _, port = target.rpartition(':')
+        return socket_feed(host, int(port))
+    raise ValueError(f'Unknown feed spec: {spec!r}')
+
+def start_feed(make_feed, sink, retry=RETRY_INTERVAL):
+    """Call ``sink(rows)`` for every batch from ``make_feed()`` on a daemon thread
+
+    A batch the sink rejects is logged and dropped. If the feed itself fails
+    or ends, it is logged and reopened after ``retry`` seconds, so one bad
+    row or a dropped connection never stops live updates for good.
+    """
+    def run():
+        while True:
+            try:
+                for rows in make_feed():
+                    try:
+                        sink(rows)
+                    except Exception:
+                        log.exception('Dropping a batch of %d readings', len(rows))
+                log.warning('Feed ended; reopening in %.0f s', retry)
+            except Exception:
+                log.exception('Feed failed; reopening in %.0f s', retry)
+            time.sleep(retry)
+    thread = threading.Thread(target=run, name='solar-feed', daemon=True)
+    thread.start()
+    return thread
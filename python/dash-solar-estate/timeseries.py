@@ -0,0 +1,345 @@
+"""
+Time-series helpers for the Dash Solar Estate dashboard
+Viewport-aware downsampling so figures stay at a few thousand points whatever
+the size of the underlying series, incrementally maintained rollups and an
+LRU memo for built figures.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Points sent to the browser per trace: about two per horizontal pixel.
+MAX_POINTS = 2000
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of ``n_out`` points that keep the shape of y(x)
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    chosen point and the average of the next bucket.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n) if n_out >= n else np.linspace(0, n - 1, max(n_out, 0)).astype(np.int64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Bucket averages, used as the third triangle vertex for the previous bucket.
+    sums_x = np.add.reduceat(x[:n - 1], edges[:-1])
+    sums_y = np.add.reduceat(y[:n - 1], edges[:-1])
+    sizes = np.diff(edges)
+    avg_x = np.append(sums_x / sizes, x[-1])
+    avg_y = np.append(sums_y / sizes, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        area = np.abs((ax - cx) * (y[start:stop] - ay) - (ax - x[start:stop]) * (cy - ay))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+def minmax(y, n_out):
+    """Indices of the min and max of each of ``n_out // 2`` buckets, in order
+
+    Cheaper than LTTB and keeps every spike, at the cost of a more jagged line.
+    """
+    n = len(y)
+    buckets = n_out // 2
+    if n <= n_out or buckets < 1:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    width = int(np.diff(edges).max())
+    # Pad each bucket to the same width so argmin/argmax run over a 2-D view.
+    index = np.minimum(edges[:-1, None] + np.arange(width), n - 1)
+    index = np.where(index < edges[1:, None], index, edges[1:, None] - 1)
+    values = y[index]
+    lo = index[np.arange(buckets), np.argmin(values, axis=1)]
+    hi = index[np.arange(buckets), np.argmax(values, axis=1)]
+    return np.unique(np.concatenate([lo, hi]))
+
+def visible_range(relayout):
+    """(start, end) timestamps of a graph's x-axis from ``relayoutData``, or None when autoranged"""
+    if not relayout or relayout.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        bounds = relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    elif 'xaxis.range' in relayout:
+        bounds = relayout['xaxis.range']
+    else:
+        return None
+    start, end = pd.Timestamp(bounds[0]), pd.Timestamp(bounds[1])
+    return (start, end) if start <= end else (end, start)
+
+def window(df, x_range=None, x='date', pad=1):
+    """Rows of ``df`` (sorted by ``x``) inside ``x_range``, plus ``pad`` rows either side
+
+    The padding keeps the line running to the plot edges when zoomed in.
+    """
+    if x_range is None:
+        return df
+    times = df[x].to_numpy()
+    start = np.searchsorted(times, np.datetime64(x_range[0]), side='left')
+    stop = np.searchsorted(times, np.datetime64(x_range[1]), side='right')
+    return df.iloc[max(start - pad, 0):min(stop + pad, len(df))]
+
+def downsample(df, column, x_range=None, max_points=MAX_POINTS, method='lttb', x='date'):
+    """(x, y) arrays for the visible part of ``column``, at most ``max_points`` long"""
+    visible = window(df, x_range, x)
+    times = visible[x].to_numpy()
+    values = visible[column].to_numpy()
+    if len(values) > max_points:
+        if method == 'minmax':
+            keep = minmax(values, max_points)
+        else:
+            keep = lttb(times.astype('datetime64[ns]').astype(np.int64), values, max_points)
+        times, values = times[keep], values[keep]
+    return times, values
+
+class ChunkedFrame:
+    """Append-only raw history kept as a list of date-sorted DataFrame chunks
+
+    Appending never copies the history: new rows become a chunk, and the
+    last two chunks are merged while the older one is no bigger than the
+    newer, like carries in a binary counter. That keeps O(log n) chunks at
+    amortized O(log n) copies per row. ``count`` and ``window`` only touch the visible slice of each chunk.
+    """
+
+    def __init__(self, df, x='date'):
+        self.x = x
+        self.chunks = [df.reset_index(drop=True)] if len(df) else []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def append(self, rows):
+        if len(rows) == 0:
+            return
+        rows = rows.sort_values(self.x, ignore_index=True)
+        with self._lock:
+            chunks = self.chunks + [rows]
+            while len(chunks) > 1 and len(chunks[-2]) <= len(chunks[-1]):
+                merged = pd.concat(chunks[-2:], ignore_index=True)
+                if not merged[self.x].is_monotonic_increasing:
+                    merged = merged.sort_values(self.x, ignore_index=True)
+                chunks[-2:] = [merged]
+            self.chunks = chunks
+
+    def count(self, x_range=None):
+        """Rows inside ``x_range`` (inclusive), or all rows"""
+        chunks = self.chunks
+        if x_range is None:
+            return sum(len(chunk) for chunk in chunks)
+        lo, hi = np.datetime64(x_range[0]), np.datetime64(x_range[1])
+        total = 0
+        for chunk in chunks:
+            times = chunk[self.x].to_numpy()
+            total += int(np.searchsorted(times, hi, side='right') - np.searchsorted(times, lo, side='left'))
+        return total
+
+    def window(self, x_range=None, pad=1):
+        """Rows inside ``x_range`` plus ``pad`` rows either side, as one sorted frame"""
+        chunks = self.chunks
+        if not chunks:
+            return pd.DataFrame(columns=[self.x])
+        parts = [window(chunk, x_range, self.x, pad) for chunk in chunks]
+        visible = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        if len(parts) == 1:
+            return visible
+        if not visible[self.x].is_monotonic_increasing:
+            visible = visible.sort_values(self.x, ignore_index=True)
+        # Every chunk contributed its own padding; keep only the global pad.
+        return window(visible, x_range, self.x, pad)
+
+# Rollup levels, finest first: pandas period aliases and their labels.
+LEVELS = (('h', 'hourly'), ('D', 'daily'), ('M', 'monthly'))
+STATS = ('count', 'sum', 'min', 'max')
+
+class RollupPyramid:
+    """Hourly, daily and monthly count/sum/min/max rollups of several series
+
+    Each level is a DataFrame indexed by bucket start with ``(column, stat)``
+    columns. ``append`` folds new rows into the existing buckets, but each
+    call also rebuilds every level frame: a roughly constant cost of tens of
+    milliseconds on multi-year histories, plus time proportional to the new
+    rows. Call it once per feed batch, never per viewer request.
+
+    ``version`` counts appends. ``epoch`` only moves when an hourly bucket
+    is completed (a reading opens a newer hour) or a completed bucket is
+    backfilled, so it is the coarser key to cache figures on while live
+    readings trickle into the open hour.
+    """
+
+    def __init__(self, df, columns, x='date'):
+        self.columns = list(columns)
+        self.x = x
+        self.levels = {label: _empty_rollup(self.columns) for _, label in LEVELS}
+        self.totals = {column: {'count': 0, 'sum': 0.0, 'min': np.nan, 'max': np.nan} for column in self.columns}
+        self.version = 0
+        self.epoch = 0
+        self._open_bucket = None
+        self._lock = threading.Lock()
+        self.append(df)
+
+    def append(self, rows):
+        """Fold new rows (any order, may overlap existing buckets) into every level"""
+        if len(rows) == 0:
+            return
+        times = pd.to_datetime(rows[self.x])
+        with self._lock:
+            for freq, label in LEVELS:
+                buckets = times.dt.to_period(freq).dt.start_time.to_numpy()
+                grouped = rows[self.columns].groupby(buckets).agg(list(STATS))
+                self.levels[label] = _combine(self.levels[label], grouped)
+                if label == LEVELS[0][1]:
+                    self._advance_epoch(grouped.index)
+            for column in self.columns:
+                values = rows[column].to_numpy(dtype=np.float64)
+                values = values[~np.isnan(values)]
+                if len(values):
+                    totals = self.totals[column]
+                    totals['count'] += len(values)
+                    totals['sum'] += float(values.sum())
+                    totals['min'] = float(np.fmin(totals['min'], values.min()))
+                    totals['max'] = float(np.fmax(totals['max'], values.max()))
+            self.version += 1
+
+    def _advance_epoch(self, buckets):
+        """Bump ``epoch`` if any of the finest ``buckets`` touched is not the open one"""
+        previous = self._open_bucket
+        if previous is None or buckets.max() > previous or buckets.min() < previous:
+            self.epoch += 1
+            self._open_bucket = buckets.max() if previous is None else max(previous, buckets.max())
+
+    def rollup(self, label, x_range=None):
+        """Buckets of one level overlapping ``x_range`` (start, end), or all of them"""
+        level = self.levels[label]
+        if x_range is None:
+            return level
+        freq = next(freq for freq, name in LEVELS if name == label)
+        start = pd.Timestamp(x_range[0]).to_period(freq).start_time
+        return level.loc[start:pd.Timestamp(x_range[1])]
+
+    def summary(self, column):
+        """Whole-history count, mean, min, max and sum of ``column`` from the running totals"""
+        totals = self.totals[column]
+        count = totals['count']
+        return {**totals, 'mean': totals['sum'] / count if count else float('nan')}
+
+    def resolution(self, rows_in_range, x_range, max_points=MAX_POINTS):
+        """Finest of raw/hourly/daily/monthly with at most ``max_points`` points in range"""
+        if rows_in_range <= max_points:
+            return 'raw'
+        for _, label in LEVELS:
+            if len(self.rollup(label, x_range)) <= max_points:
+                return label
+        return LEVELS[-1][1]
+
+def _empty_rollup(columns):
+    return pd.DataFrame(columns=pd.MultiIndex.from_product([columns, STATS]), dtype=np.float64)
+
+def _combine(existing, new):
+    """Merge two rollups bucket by bucket
+
+    Copies and re-sorts ``existing``, so the cost grows with the level size,
+    not just with ``new``.
+    """
+    overlap = existing.index.intersection(new.index)
+    if len(overlap):
+        old, fresh = existing.loc[overlap], new.loc[overlap]
+        merged = fresh.copy()
+        for column in existing.columns.get_level_values(0).unique():
+            merged[(column, 'count')] = old[(column, 'count')] + fresh[(column, 'count')]
+            merged[(column, 'sum')] = old[(column, 'sum')] + fresh[(column, 'sum')]
+            merged[(column, 'min')] = np.fmin(old[(column, 'min')], fresh[(column, 'min')])
+            merged[(column, 'max')] = np.fmax(old[(column, 'max')], fresh[(column, 'max')])
+        new = pd.concat([new.drop(overlap), merged])
+        existing = existing.drop(overlap)
+    combined = pd.concat([existing, new.astype(np.float64)]) if len(existing) else new.astype(np.float64)
+    return combined.sort_index()
+
+class RingBuffer:
+    """Fixed-capacity buffer of the most recent readings
+
+    Every row gets a sequence number; ``since(seq)`` returns the rows a
+    client has not seen yet, so each poll costs time proportional to the
+    new rows rather than the buffer size.
+    """
+
+    def __init__(self, columns, capacity=MAX_POINTS, x='date'):
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.x = x
+        self.times = np.empty(capacity, dtype='datetime64[ns]')
+        self.values = {column: np.empty(capacity) for column in self.columns}
+        self.seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.seq, self.capacity)
+
+    def extend(self, rows):
+        """Append rows (a DataFrame with ``x`` and every column); the oldest are overwritten"""
+        times = pd.to_datetime(rows[self.x]).to_numpy(dtype='datetime64[ns]')[-self.capacity:]
+        count = len(times)
+        if count == 0:
+            return
+        with self._lock:
+            slots = (self.seq + len(rows) - count + np.arange(count)) % self.capacity
+            self.times[slots] = times
+            for column in self.columns:
+                self.values[column][slots] = rows[column].to_numpy(dtype=np.float64)[-count:]
+            self.seq += len(rows)
+
+    def since(self, seq):
+        """(times, {column: values}, new seq) for rows after ``seq``, at most ``capacity`` of them"""
+        with self._lock:
+            start = max(seq, self.seq - self.capacity, 0)
+            slots = np.arange(start, self.seq) % self.capacity
+            return self.times[slots], {column: self.values[column][slots] for column in self.columns}, self.seq
+
+class FigureCache:
+    """Thread-safe LRU memo for figures and aggregates
+
+    Keys should include everything the value depends on, e.g. series,
+    quantised range, resolution and the rollup epoch.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Build outside the lock; concurrent misses may both build, last write wins.
+        value = factory()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
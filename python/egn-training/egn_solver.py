@@ -0,0 +1,355 @@
+"""
+N-body solver for Emotional Gravity Nodes (EGN)
+Computes the net emotional-gravity force and acceleration on every node, using the
+same pair law as `generate_training_data.py`:
+
+    F_ij = G_e * I_i*I_j*C_i*C_j / d_ij^2    (d floored at 0.01), pulling i toward j
+
+With charge q = I*C the field at node i is sum_j q_j (r_j - r_i) / d_ij^3, so
+groups of nodes can be summarised by their total charge and charge-weighted
+centre. Methods:
+
+- ``barnes-hut`` (default): Morton-ordered octree; a cell whose size is below
+  ``theta`` times its distance acts as one point charge. O(N log N).
+- ``cutoff``: exact forces from nodes within ``cutoff`` (KD-tree neighbour
+  pairs); everything farther is ignored.
+- ``direct``: exact O(N^2) sum, in bounded-memory row blocks.
+
+``error_report`` measures the approximation against the direct sum, and
+``Simulation`` steps positions and velocities with velocity Verlet.
+
+    python egn_solver.py --random 20000 --theta 0.5 --steps 10 --dt 0.01
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from generate_training_data import DB_PATH, G_e, load_nodes
+
+MIN_DISTANCE = 0.01
+METHODS = ('barnes-hut', 'cutoff', 'direct')
+
+# Morton codes use 21 bits per axis, so the octree is at most 21 levels deep.
+MAX_DEPTH = 21
+
+def charges(nodes):
+    return np.clip(nodes['intensity'], 0, 1) * np.clip(nodes['clarity'], 0, 1)
+
+def masses(nodes):
+    """Inertial mass per node: its half of the pairwise emotionalMass (s_a + s_b + 0.1)"""
+    return np.maximum(0.01, nodes['stability'] + 0.05)
+
+def _pull(delta, charge):
+    """charge * delta / d^3 with the EGN distance floor"""
+    dist = np.maximum(np.sqrt(np.einsum('ij,ij->i', delta, delta)), MIN_DISTANCE)
+    return delta * (charge / dist**3)[:, None]
+
+def _accumulate(field, targets, contributions):
+    for axis in range(3):
+        field[:, axis] += np.bincount(targets, weights=contributions[:, axis], minlength=len(field))
+
+def direct_field(positions, q, targets=None, max_elements=1 << 22):
+    """Exact field at ``targets`` (all nodes by default) from every node"""
+    targets = np.arange(len(positions)) if targets is None else np.asarray(targets)
+    field = np.empty((len(targets), 3))
+    rows = max(1, max_elements // max(len(positions), 1))
+    for start in range(0, len(targets), rows):
+        block = targets[start:start + rows]
+        delta = positions[None, :, :] - positions[block, None, :]
+        dist = np.maximum(np.sqrt(np.einsum('ijk,ijk->ij', delta, delta)), MIN_DISTANCE)
+        field[start:start + rows] = np.einsum('ijk,ij->ik', delta, q / dist**3)
+    return field
+
+def cutoff_field(positions, q, cutoff):
+    """Exact field from every node within ``cutoff``; farther nodes are ignored"""
+    pairs = cKDTree(positions).query_pairs(cutoff, output_type='ndarray')
+    field = np.zeros((len(positions), 3))
+    if len(pairs):
+        i, j = pairs[:, 0], pairs[:, 1]
+        delta = positions[j] - positions[i]
+        _accumulate(field, i, _pull(delta, q[j]))
+        _accumulate(field, j, _pull(-delta, q[i]))
+    return field
+
+def _spread_bits(values):
+    """Insert two zero bits between each of the low 21 bits"""
+    x = values.astype(np.uint64) & np.uint64(0x1FFFFF)
+    for shift, mask in ((32, 0x1F00000000FFFF), (16, 0x1F0000FF0000FF), (8, 0x100F00F00F00F00F),
+                        (4, 0x10C30C30C30C30C3), (2, 0x1249249249249249)):
+        x = (x | (x << np.uint64(shift))) & np.uint64(mask)
+    return x
+
+def _ranges(starts, counts):
+    """Concatenated aranges [start, start + count) and the range each element came from"""
+    owner = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets, owner
+
+class Octree:
+    """Barnes–Hut octree over Morton-sorted nodes, built level by level
+
+    Every tree cell covers a contiguous run of the sorted nodes and stores its
+    total charge, charge-weighted centre, edge length and children. Cells with
+    at most ``leaf_size`` nodes (or at ``MAX_DEPTH``) are leaves.
+    """
+
+    def __init__(self, positions, q, leaf_size=16):
+        if not len(positions):
+            raise ValueError("an octree needs at least one node")
+        lo = positions.min(axis=0)
+        size = max(float((positions.max(axis=0) - lo).max()), 1e-12) * (1 + 1e-9)
+        scale = 1 << MAX_DEPTH
+        cells = np.minimum(((positions - lo) / size * scale).astype(np.int64), scale - 1)
+        codes = _spread_bits(cells[:, 0]) | (_spread_bits(cells[:, 1]) << np.uint64(1)) \
+            | (_spread_bits(cells[:, 2]) << np.uint64(2))
+
+        self.order = np.argsort(codes, kind='stable')
+        self.codes = codes[self.order]
+        self.positions = positions[self.order]
+        self.q = q[self.order]
+
+        charge_sum = np.concatenate([[0.0], np.cumsum(self.q)])
+        moment_sum = np.vstack([np.zeros(3), np.cumsum(self.q[:, None] * (self.positions - lo), axis=0)])
+        position_sum = np.vstack([np.zeros(3), np.cumsum(self.positions - lo, axis=0)])
+
+        levels = []
+        starts, counts = np.array([0]), np.array([len(positions)])
+        for level in range(MAX_DEPTH + 1):
+            ends = starts + counts
+            charge = charge_sum[ends] - charge_sum[starts]
+            moment = moment_sum[ends] - moment_sum[starts]
+            # Chargeless cells exert no pull; any centre will do.
+            centre = np.where(charge[:, None] > 0, moment / np.where(charge > 0, charge, 1)[:, None],
+                              (position_sum[ends] - position_sum[starts]) / counts[:, None]) + lo
+            leaf = (counts <= leaf_size) | (level == MAX_DEPTH)
+            levels.append((starts, counts, charge, centre, leaf, level))
+
+            internal = np.flatnonzero(~leaf)
+            if not internal.size:
+                break
+            index, owner = _ranges(starts[internal], counts[internal])
+            prefix = self.codes[index] >> np.uint64(3 * (MAX_DEPTH - level - 1))
+            first = np.flatnonzero(np.concatenate([[True], prefix[1:] != prefix[:-1]]))
+            starts = index[first]
+            counts = np.diff(np.append(first, len(index)))
+            levels[-1] += (internal, owner[first])
+
+        # Flatten the levels into one cell table with global child offsets.
+        offsets = np.cumsum([0] + [len(level[0]) for level in levels])
+        total = offsets[-1]
+        self.start = np.concatenate([level[0] for level in levels])
+        self.count = np.concatenate([level[1] for level in levels])
+        self.charge = np.concatenate([level[2] for level in levels])
+        self.centre = np.concatenate([level[3] for level in levels])
+        self.leaf = np.concatenate([level[4] for level in levels])
+        depth = np.concatenate([np.full(len(level[0]), level[5]) for level in levels])
+        self.size = size / 2.0 ** depth
+        self.shift = (3 * (MAX_DEPTH - depth)).astype(np.uint64)
+        self.prefix = self.codes[self.start] >> self.shift
+        self.first_child = np.zeros(total, dtype=np.int64)
+        self.children = np.zeros(total, dtype=np.int64)
+        for n, level in enumerate(levels[:-1]):
+            internal, parent = level[6], level[7]
+            children = np.bincount(parent, minlength=len(internal))
+            self.children[offsets[n] + internal] = children
+            self.first_child[offsets[n] + internal] = offsets[n + 1] + np.cumsum(children) - children
+
+    def field(self, theta=0.5, batch=4096):
+        """Approximate field at every node, in the caller's node order"""
+        n = len(self.positions)
+        field = np.zeros((n, 3))
+        for begin in range(0, n, batch):
+            bodies = np.arange(begin, min(n, begin + batch))
+            local = np.zeros((len(bodies), 3))
+            body, cell = bodies, np.zeros(len(bodies), dtype=np.int64)
+            while body.size:
+                delta = self.centre[cell] - self.positions[body]
+                dist = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+                inside = (self.codes[body] >> self.shift[cell]) == self.prefix[cell]
+                accept = ~inside & (self.size[cell] < theta * dist)
+                _accumulate(local, body[accept] - begin, _pull(delta[accept], self.charge[cell[accept]]))
+
+                open_leaf = ~accept & self.leaf[cell]
+                if open_leaf.any():
+                    others, owner = _ranges(self.start[cell[open_leaf]], self.count[cell[open_leaf]])
+                    targets = body[open_leaf][owner]
+                    # A node's own term has zero offset and so contributes nothing.
+                    _accumulate(local, targets - begin,
+                                _pull(self.positions[others] - self.positions[targets], self.q[others]))
+
+                split = ~accept & ~self.leaf[cell]
+                children, owner = _ranges(self.first_child[cell[split]], self.children[cell[split]])
+                body, cell = body[split][owner], children
+            field[begin:begin + len(bodies)] = local
+
+        result = np.empty_like(field)
+        result[self.order] = field
+        return result
+
+def compute_field(positions, q, method='barnes-hut', theta=0.5, cutoff=None, leaf_size=16):
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}; expected one of {METHODS}")
+    if not len(positions):
+        return np.zeros((0, 3))
+    if method == 'barnes-hut':
+        return Octree(positions, q, leaf_size).field(theta)
+    if method == 'cutoff':
+        if cutoff is None:
+            raise ValueError("the cutoff method needs a cutoff radius")
+        return cutoff_field(positions, q, cutoff)
+    return direct_field(positions, q)
+
+def compute_forces(nodes, method='barnes-hut', theta=0.5, cutoff=None, leaf_size=16):
+    """Net force (n x 3) and acceleration (n x 3) on every node"""
+    q = charges(nodes)
+    forces = G_e * q[:, None] * compute_field(nodes['position'], q, method, theta, cutoff, leaf_size)
+    return forces, forces / masses(nodes)[:, None]
+
+def error_report(nodes, method='barnes-hut', theta=0.5, cutoff=None, leaf_size=16, sample=1000, seed=0):
+    """Compare an approximate method with the exact direct sum
+
+    The direct sum is evaluated for up to ``sample`` randomly chosen nodes
+    (all of them if there are fewer), which keeps the reference O(sample * N).
+    Relative errors are per node, |F - F_exact| / |F_exact|.
+    """
+    positions = nodes['position']
+    q = charges(nodes)
+    started = time.perf_counter()
+    field = compute_field(positions, q, method, theta, cutoff, leaf_size)
+    elapsed = time.perf_counter() - started
+
+    n = len(positions)
+    targets = np.arange(n) if n <= sample else np.sort(np.random.default_rng(seed).choice(n, sample, replace=False))
+    started = time.perf_counter()
+    exact = direct_field(positions, q, targets)
+    direct_elapsed = time.perf_counter() - started
+
+    approx = field[targets]
+    scale = np.linalg.norm(exact, axis=1)
+    error = np.linalg.norm(approx - exact, axis=1)
+    relative = error[scale > 0] / scale[scale > 0]
+    return {
+        'method': method,
+        'nodes': n,
+        'theta': theta if method == 'barnes-hut' else None,
+        'cutoff': cutoff if method == 'cutoff' else None,
+        'sampled': len(targets),
+        'relative_l2': float(np.linalg.norm(approx - exact) / max(np.linalg.norm(exact), 1e-300)),
+        'median_relative': float(np.median(relative)) if relative.size else 0.0,
+        'p99_relative': float(np.percentile(relative, 99)) if relative.size else 0.0,
+        'max_relative': float(relative.max()) if relative.size else 0.0,
+        'seconds': elapsed,
+        'direct_seconds_estimate': direct_elapsed * n / len(targets) if n else 0.0
+    }
+
+class Simulation:
+    """Step an EGN node set forward in time with velocity Verlet
+
+    Forces are recomputed (octree rebuilt) every step. ``run`` calls
+    ``callback(sim)`` after each step, for logging or snapshotting.
+    """
+
+    def __init__(self, nodes, method='barnes-hut', theta=0.5, cutoff=None, leaf_size=16, velocities=None):
+        self.nodes = nodes
+        self.positions = np.array(nodes['position'], dtype=np.float64)
+        self.velocities = np.zeros_like(self.positions) if velocities is None else np.array(velocities, dtype=np.float64)
+        self.options = {'method': method, 'theta': theta, 'cutoff': cutoff, 'leaf_size': leaf_size}
+        self.q = charges(nodes)
+        self.mass = masses(nodes)
+        self.time = 0.0
+        self.steps = 0
+        self._acceleration = None
+
+    def forces(self):
+        field = compute_field(self.positions, self.q, **self.options)
+        return G_e * self.q[:, None] * field
+
+    def accelerations(self):
+        return self.forces() / self.mass[:, None]
+
+    def step(self, dt):
+        if self._acceleration is None:
+            self._acceleration = self.accelerations()
+        self.velocities += 0.5 * dt * self._acceleration
+        self.positions += dt * self.velocities
+        self._acceleration = self.accelerations()
+        self.velocities += 0.5 * dt * self._acceleration
+        self.time += dt
+        self.steps += 1
+        return self
+
+    def run(self, steps, dt, callback=None):
+        for _ in range(steps):
+            self.step(dt)
+            if callback is not None:
+                callback(self)
+        return self
+
+    def kinetic_energy(self):
+        return float(0.5 * np.sum(self.mass * np.einsum('ij,ij->i', self.velocities, self.velocities)))
+
+    def to_nodes(self):
+        """Current state as ``emotional-nodes.json``-style node dicts"""
+        return [
+            {
+                'id': node_id,
+                'position': dict(zip('xyz', position)),
+                'velocity': dict(zip('xyz', velocity)),
+                'intensity': intensity,
+                'clarity': clarity,
+                'stability': stability
+            }
+            for node_id, position, velocity, intensity, clarity, stability in zip(
+                self.nodes['ids'], self.positions.tolist(), self.velocities.tolist(),
+                self.nodes['intensity'].tolist(), self.nodes['clarity'].tolist(), self.nodes['stability'].tolist()
+            )
+        ]
+
+def random_nodes(count, seed=None):
+    """Synthetic node set for benchmarking: clustered positions, random traits"""
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform(-50, 50, (max(1, count // 500), 3))
+    return {
+        'ids': [f'RAND-{i}' for i in range(count)],
+        'position': centres[rng.integers(len(centres), size=count)] + rng.normal(0, 3, (count, 3)),
+        'intensity': rng.random(count),
+        'clarity': rng.random(count),
+        'stability': rng.random(count)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--db', default=DB_PATH, help='node database JSON')
+    parser.add_argument('--random', type=int, help='use this many synthetic nodes instead of --db')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--method', choices=METHODS, default='barnes-hut')
+    parser.add_argument('--theta', type=float, default=0.5, help='Barnes–Hut opening angle')
+    parser.add_argument('--cutoff', type=float, help='cutoff radius for --method cutoff')
+    parser.add_argument('--leaf-size', type=int, default=16)
+    parser.add_argument('--sample', type=int, default=1000, help='nodes checked against the direct sum')
+    parser.add_argument('--steps', type=int, default=0, help='timesteps to simulate')
+    parser.add_argument('--dt', type=float, default=0.01)
+    parser.add_argument('--out', help='write the final node state to this JSON file')
+    args = parser.parse_args(argv)
+
+    nodes = random_nodes(args.random, args.seed) if args.random else load_nodes(args.db)
+    options = {'method': args.method, 'theta': args.theta, 'cutoff': args.cutoff, 'leaf_size': args.leaf_size}
+    print(json.dumps(error_report(nodes, sample=args.sample, seed=args.seed, **options), indent=2))
+
+    if args.steps:
+        sim = Simulation(nodes, **options)
+        started = time.perf_counter()
+        sim.run(args.steps, args.dt)
+        elapsed = time.perf_counter() - started
+        print(f"Simulated {args.steps} steps of {len(sim.positions)} nodes in {elapsed:.2f}s "
+              f"(kinetic energy = {sim.kinetic_energy():.6g})")
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                json.dump({'egn_nodes': sim.to_nodes()}, f, indent=2)
+            print(f"Wrote node state to {args.out}")
+
+if __name__ == '__main__':
+    main()
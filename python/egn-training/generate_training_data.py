@@ -2,70 +2,410 @@
 Simple training data generator for Emotional Gravity Node (EGN)
 Generates synthetic pairs of emotional nodes and computes the ground-truth gravity
 saves CSV to `python/egn-training/training_data.csv`.
+
+Every node pair is computed in vectorized blocks of at most ``chunk_size``
+pairs and streamed to disk, so memory stays bounded for tens of thousands of
+nodes. ``--binary DIR`` additionally writes one ``.npy`` file per column plus
+``ids.json`` (the node ids behind ``id_a``/``id_b``). With ``--seed`` the
+output is identical bit for bit across runs and chunk sizes.
+
+``--shards N`` splits the work into part files generated on a process pool,
+with a ``manifest.json`` recording the master seed and a checksum per part.
+Any part can be rebuilt alone with ``--shard K``, and ``--merge`` joins the
+parts into the same file an unsharded run writes.
+
+    python generate_training_data.py --seed 7 --binary training_data
+    python generate_training_data.py --seed 7 --shards 64 --merge
 """
-import json
+import argparse
 import csv
-import math
-import random
+import hashlib
+import json
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
-BASE = Path(__file__).resolve().parents[1]
+import numpy as np
+
+try:
+    from app.graph import load_graph
+except ImportError:  # python-engine not installed: read the node JSON directly
+    load_graph = None
+
+BASE = Path(__file__).resolve().parents[2]
 DB_PATH = BASE / 'databases' / 'emotional-nodes.json'
 OUT_PATH = Path(__file__).resolve().parent / 'training_data.csv'
+SHARD_DIR = Path(__file__).resolve().parent / 'training_data_shards'
 
-try:
-    with open(DB_PATH, 'r', encoding='utf-8') as f:
-        db = json.load(f)
-        nodes = db.get('egn_nodes', [])
-except Exception:
-    nodes = []
-
-if not nodes:
-    # fallback random nodes
-    nodes = [
-        { 'id':'EGN-A', 'position':{'x':0,'y':0,'z':0}, 'intensity':0.8, 'clarity':0.6, 'stability':0.4 },
-        { 'id':'EGN-B', 'position':{'x':1.5,'y':0.5,'z':-0.5}, 'intensity':0.7, 'clarity':0.55, 'stability':0.6 }
-    ]
+FALLBACK_NODES = [
+    { 'id':'EGN-A', 'position':{'x':0,'y':0,'z':0}, 'intensity':0.8, 'clarity':0.6, 'stability':0.4 },
+    { 'id':'EGN-B', 'position':{'x':1.5,'y':0.5,'z':-0.5}, 'intensity':0.7, 'clarity':0.55, 'stability':0.6 }
+]
+
+COLUMNS = ['id_a','id_b','intensity_a','intensity_b','clarity_a','clarity_b','stability_a','stability_b','distance','force','wellDepth','acceleration']
+
+BINARY_COLUMNS = COLUMNS + ['rand_id']
 
 # generator function matching engine formula
 G_e = 0.87
 
-def dist(a,b):
-    return math.sqrt((a['position']['x']-b['position']['x'])**2 + (a['position']['y']-b['position']['y'])**2 + (a['position']['z']-b['position']['z'])**2)
+# Synthetic pairs are drawn in fixed blocks, each from its own seeded stream,
+# so the output does not depend on chunk_size.
+SYNTHETIC_BLOCK = 1 << 16
+
+def _graph_nodes():
+    """EGN nodes from the engine's cached node graph, or None to fall back to JSON"""
+    try:
+        graph = load_graph(BASE)
+    except (OSError, ValueError):
+        return None
+    rows = graph.by_source('emotional-nodes/egn_nodes')
+    if not len(rows) or np.isnan(graph.column('position.x', rows)).any():
+        return None
+    return {
+        'ids': [graph.ids[i] for i in rows.tolist()],
+        'position': np.column_stack([graph.column(f'position.{axis}', rows, 0.0) for axis in 'xyz']),
+        'intensity': graph.column('intensity', rows, 0.0),
+        'clarity': graph.column('clarity', rows, 0.0),
+        'stability': graph.column('stability', rows, 0.5)
+    }
 
-with open(OUT_PATH, 'w', newline='', encoding='utf-8') as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(['id_a','id_b','intensity_a','intensity_b','clarity_a','clarity_b','stability_a','stability_b','distance','force','wellDepth','acceleration'])
+def load_nodes(path=DB_PATH):
+    """Node database as column arrays: ids, positions (n x 3), intensity, clarity, stability"""
+    if load_graph is not None and Path(path).resolve() == DB_PATH:
+        nodes = _graph_nodes()
+        if nodes is not None:
+            return nodes
 
-    # produce combinations and random samples
-    pairs = []
-    for i in range(len(nodes)):
-        for j in range(i+1, len(nodes)):
-            pairs.append((nodes[i], nodes[j]))
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            nodes = json.load(f).get('egn_nodes', [])
+    except Exception:
+        nodes = []
 
-    # add random synthetic pairs
-    for _ in range(100):
-        a = random.choice(nodes)
-        bpos = { 'x': random.uniform(-3,3), 'y': random.uniform(-1,1), 'z': random.uniform(-3,3) }
+    if not nodes:
+        # fallback random nodes
+        nodes = FALLBACK_NODES
+
+    return {
+        'ids': [node.get('id') for node in nodes],
+        'position': np.array([[node['position'][axis] for axis in 'xyz'] for node in nodes], dtype=np.float64),
+        'intensity': np.array([node.get('intensity', 0) for node in nodes], dtype=np.float64),
+        'clarity': np.array([node.get('clarity', 0) for node in nodes], dtype=np.float64),
+        'stability': np.array([node.get('stability', 0.5) for node in nodes], dtype=np.float64)
+    }
+
+def gravity(a, b):
+    """Ground-truth gravity between aligned node arrays ``a`` and ``b``
+
+    Mirrors the engine formula term by term and in the same operation order.
+    """
+    delta = a['position'] - b['position']
+    d = np.maximum(np.sqrt(delta[:, 0]**2 + delta[:, 1]**2 + delta[:, 2]**2), 0.01)
+    I1 = np.clip(a['intensity'], 0, 1)
+    I2 = np.clip(b['intensity'], 0, 1)
+    C1 = np.clip(a['clarity'], 0, 1)
+    C2 = np.clip(b['clarity'], 0, 1)
+    force = (G_e * (I1 * I2 * C1 * C2)) / (d*d)
+    wellDepth = force * (1 - ((C1 + C2)/2))
+    emotionalMass = np.maximum(0.01, a['stability'] + b['stability'] + 0.1)
+    return {
+        'intensity_a': I1, 'intensity_b': I2,
+        'clarity_a': C1, 'clarity_b': C2,
+        'stability_a': a['stability'], 'stability_b': b['stability'],
+        'distance': d, 'force': force, 'wellDepth': wellDepth,
+        'acceleration': force / emotionalMass
+    }
+
+def _take(nodes, index):
+    return {key: nodes[key][index] for key in ('position', 'intensity', 'clarity', 'stability')}
+
+def pair_blocks(n, chunk_size, rows=None):
+    """Yield (i, j) index arrays covering every i < j in row-major order
+
+    Each block holds whole rows and at most ``chunk_size`` pairs (or one row,
+    if a single row is longer). ``rows`` limits the output to rows
+    [first, last) of the pair space.
+    """
+    if n < 2:
+        return
+    lengths = np.arange(n - 1, 0, -1)
+    ends = np.cumsum(lengths)
+    row, last = rows or (0, n - 1)
+    while row < last:
+        done = ends[row - 1] if row else 0
+        stop = min(last, max(row + 1, int(np.searchsorted(ends, done + chunk_size, side='right'))))
+        rows = np.arange(row, stop)
+        counts = lengths[row:stop]
+        i = np.repeat(rows, counts)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        j = np.arange(counts.sum()) - starts + i + 1
+        yield i, j
+        row = stop
+
+def synthetic_pairs(nodes, entropy, start, stop):
+    """Yield blocks of random pairs: a known node against a random synthetic node
+
+    Samples [start, stop) are drawn in ``SYNTHETIC_BLOCK`` blocks; block k
+    uses the k-th stream spawned from ``entropy``, so any range can be
+    regenerated on its own. ``start`` must be block aligned.
+    """
+    for offset in range(start, stop, SYNTHETIC_BLOCK):
+        seq = np.random.SeedSequence(entropy, spawn_key=(offset // SYNTHETIC_BLOCK,))
+        rng = np.random.default_rng(seq)
+        size = min(SYNTHETIC_BLOCK, stop - offset)
+        a = rng.integers(len(nodes['ids']), size=size)
         b = {
-            'id': f'RAND-{random.randint(1000,9999)}',
-            'position': bpos,
-            'intensity': random.random(),
-            'clarity': random.random(),
-            'stability': random.random()
+            'position': np.column_stack([
+                rng.uniform(-3, 3, size), rng.uniform(-1, 1, size), rng.uniform(-3, 3, size)
+            ]),
+            'intensity': rng.random(size),
+            'clarity': rng.random(size),
+            'stability': rng.random(size)
+        }
+        yield a, b, rng.integers(1000, 10000, size=size).astype(np.int32)
+
+def generate_shard(nodes, shard, entropy, chunk_size=1 << 20):
+    """Yield chunks of training rows as column dicts for one shard
+
+    ``id_a``/``id_b`` index ``nodes['ids']``. Synthetic nodes have
+    ``id_b == -1`` and are named ``RAND-<rand_id>``.
+    """
+    if shard['kind'] == 'pairs':
+        for i, j in pair_blocks(len(nodes['ids']), chunk_size, (shard['start'], shard['stop'])):
+            columns = gravity(_take(nodes, i), _take(nodes, j))
+            columns.update(id_a=i.astype(np.int32), id_b=j.astype(np.int32), rand_id=np.zeros(len(i), dtype=np.int32))
+            yield columns
+    else:
+        for a, b, rand_id in synthetic_pairs(nodes, entropy, shard['start'], shard['stop']):
+            columns = gravity(_take(nodes, a), b)
+            columns.update(id_a=a.astype(np.int32), id_b=np.full(len(a), -1, dtype=np.int32), rand_id=rand_id)
+            yield columns
+
+def plan_shards(n, synthetic=100, shards=1):
+    """Split the pair rows and synthetic samples into about ``shards`` even shards
+
+    Node pairs come first and split on row boundaries, synthetic samples on
+    ``SYNTHETIC_BLOCK`` boundaries, so concatenating the shards in order
+    reproduces the unsharded output.
+    """
+    pairs = n * (n - 1) // 2
+    target = max(1, -(-(pairs + synthetic) // max(1, shards)))
+    plan = []
+    if pairs:
+        ends = np.cumsum(np.arange(n - 1, 0, -1))
+        bounds = np.searchsorted(ends, np.arange(target, pairs, target), side='left') + 1
+        bounds = np.unique(np.concatenate([[0], bounds, [n - 1]]))
+        for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            rows = int(ends[stop - 1] - (ends[start - 1] if start else 0))
+            plan.append({'kind': 'pairs', 'start': start, 'stop': stop, 'rows': rows})
+    step = max(SYNTHETIC_BLOCK, -(-target // SYNTHETIC_BLOCK) * SYNTHETIC_BLOCK)
+    for start in range(0, synthetic, step):
+        stop = min(synthetic, start + step)
+        plan.append({'kind': 'synthetic', 'start': start, 'stop': stop, 'rows': stop - start})
+    for index, shard in enumerate(plan):
+        shard['index'] = index
+    return plan
+
+def generate(nodes, seed=None, synthetic=100, chunk_size=1 << 20):
+    """Yield every training row in chunks: all node pairs, then synthetic pairs"""
+    entropy = np.random.SeedSequence(seed).entropy
+    n = len(nodes['ids'])
+    for shard in ({'kind': 'pairs', 'start': 0, 'stop': max(n - 1, 0)},
+                  {'kind': 'synthetic', 'start': 0, 'stop': synthetic}):
+        yield from generate_shard(nodes, shard, entropy, chunk_size)
+
+def count_rows(nodes, synthetic=100):
+    n = len(nodes['ids'])
+    return n * (n - 1) // 2 + synthetic
+
+def write(chunks, nodes, path=OUT_PATH, binary=None, total=None):
+    """Stream chunks to CSV and, optionally, columnar ``.npy`` files
+
+    The binary layout is one preallocated ``<column>.npy`` per column, with
+    ``id_a``/``id_b`` as int32 indexes into ``ids.json`` (-1 for synthetic
+    nodes) and ``rand_id`` numbering the synthetic nodes.
+    """
+    ids = nodes['ids']
+    arrays = {}
+    if binary:
+        binary = Path(binary)
+        binary.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            name: np.lib.format.open_memmap(binary / f'{name}.npy', mode='w+', dtype=_binary_dtype(name),
+                                            shape=(total,))
+            for name in BINARY_COLUMNS
         }
-        pairs.append((a,b))
-
-    for a,b in pairs:
-        d = max(dist(a,b), 0.01)
-        I1 = max(0, min(1, a.get('intensity',0)))
-        I2 = max(0, min(1, b.get('intensity',0)))
-        C1 = max(0, min(1, a.get('clarity',0)))
-        C2 = max(0, min(1, b.get('clarity',0)))
-        force = (G_e * (I1 * I2 * C1 * C2)) / (d*d)
-        wellDepth = force * (1 - ((C1 + C2)/2))
-        emotionalMass = max(0.01, a.get('stability',0.5) + b.get('stability',0.5) + 0.1)
-        acc = force / emotionalMass
-        writer.writerow([a.get('id'), b.get('id'), I1, I2, C1, C2, a.get('stability',0.5), b.get('stability',0.5), d, force, wellDepth, acc])
-
-print(f"Wrote training data to {OUT_PATH}")
+
+    offset = 0
+    with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(COLUMNS)
+        for chunk in chunks:
+            id_a = [ids[code] for code in chunk['id_a'].tolist()]
+            id_b = [ids[code] if code >= 0 else f'RAND-{rand}'
+                    for code, rand in zip(chunk['id_b'].tolist(), chunk['rand_id'].tolist())]
+            writer.writerows(zip(id_a, id_b, *(chunk[name].tolist() for name in COLUMNS[2:])))
+
+            size = len(chunk['id_a'])
+            for name, array in arrays.items():
+                array[offset:offset + size] = chunk[name]
+            offset += size
+
+    if binary:
+        for array in arrays.values():
+            array.flush()
+        with open(binary / 'ids.json', 'w', encoding='utf-8') as f:
+            json.dump(ids, f)
+
+def _binary_dtype(name):
+    return np.int32 if name in ('id_a', 'id_b', 'rand_id') else np.float64
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _nodes_digest(nodes):
+    digest = hashlib.sha256(json.dumps(nodes['ids']).encode())
+    for key in ('position', 'intensity', 'clarity', 'stability'):
+        digest.update(np.ascontiguousarray(nodes[key], dtype='<f8').tobytes())
+    return digest.hexdigest()
+
+def run_shard(nodes, shard, entropy, directory, chunk_size=1 << 20, binary=False):
+    """Generate one shard into ``part-NNNNN.csv`` (and ``part-NNNNN/``); returns its manifest entry"""
+    directory = Path(directory)
+    name = f"part-{shard['index']:05d}"
+    started = time.perf_counter()
+    write(generate_shard(nodes, shard, entropy, chunk_size), nodes, directory / f'{name}.csv',
+          directory / name if binary else None, shard['rows'])
+    return {
+        **shard,
+        'csv': f'{name}.csv',
+        'binary': name if binary else None,
+        'sha256': _sha256(directory / f'{name}.csv'),
+        'seconds': time.perf_counter() - started
+    }
+
+def run_sharded(nodes, directory, seed=None, synthetic=100, shards=1, workers=None,
+                chunk_size=1 << 20, binary=False):
+    """Generate all shards on a process pool and write ``manifest.json``
+
+    Shards share one master seed (drawn if not given and recorded in the
+    manifest), so any shard can later be rebuilt alone with ``rerun_shards``.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    entropy = np.random.SeedSequence(seed).entropy
+    plan = plan_shards(len(nodes['ids']), synthetic, shards)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_shard, nodes, shard, entropy, directory, chunk_size, binary) for shard in plan]
+        results = [future.result() for future in futures]
+
+    manifest = {
+        'seed': str(entropy),
+        'nodes': len(nodes['ids']),
+        'nodes_sha256': _nodes_digest(nodes),
+        'synthetic': synthetic,
+        'synthetic_block': SYNTHETIC_BLOCK,
+        'chunk_size': chunk_size,
+        'rows': sum(shard['rows'] for shard in results),
+        'columns': COLUMNS,
+        'created': datetime.now().isoformat(),
+        'shards': results
+    }
+    with open(directory / 'ids.json', 'w', encoding='utf-8') as f:
+        json.dump(nodes['ids'], f)
+    with open(directory / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def rerun_shards(nodes, directory, indexes):
+    """Regenerate the given shards from their manifest; returns {index: checksum matches}"""
+    directory = Path(directory)
+    with open(directory / 'manifest.json', 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest['nodes_sha256'] != _nodes_digest(nodes):
+        raise ValueError("node database differs from the one the shards were generated from")
+    entropy = int(manifest['seed'])
+    matches = {}
+    for index in indexes:
+        shard = manifest['shards'][index]
+        result = run_shard(nodes, shard, entropy, directory, manifest['chunk_size'], bool(shard['binary']))
+        matches[index] = result['sha256'] == shard['sha256']
+    return matches
+
+def merge(directory, path=OUT_PATH, binary=None):
+    """Concatenate shard parts in order into one CSV (and optional ``.npy`` columns)"""
+    directory = Path(directory)
+    with open(directory / 'manifest.json', 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    shards = manifest['shards']
+
+    with open(path, 'wb') as out:
+        for n, shard in enumerate(shards):
+            with open(directory / shard['csv'], 'rb') as part:
+                header = part.readline()
+                if n == 0:
+                    out.write(header)
+                shutil.copyfileobj(part, out, 1 << 20)
+
+    if binary:
+        if not all(shard['binary'] for shard in shards):
+            raise ValueError("shards were generated without --binary")
+        binary = Path(binary)
+        binary.mkdir(parents=True, exist_ok=True)
+        for name in BINARY_COLUMNS:
+            merged = np.lib.format.open_memmap(binary / f'{name}.npy', mode='w+', dtype=_binary_dtype(name),
+                                               shape=(manifest['rows'],))
+            offset = 0
+            for shard in shards:
+                part = np.load(directory / shard['binary'] / f'{name}.npy', mmap_mode='r')
+                merged[offset:offset + len(part)] = part
+                offset += len(part)
+            merged.flush()
+        shutil.copyfile(directory / 'ids.json', binary / 'ids.json')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--db', default=DB_PATH, help='node database JSON')
+    parser.add_argument('--out', default=OUT_PATH, help='CSV output path')
+    parser.add_argument('--binary', help='also write columnar .npy files to this directory')
+    parser.add_argument('--seed', type=int, help='seed for the synthetic pairs')
+    parser.add_argument('--synthetic', type=int, default=100, help='number of random synthetic pairs')
+    parser.add_argument('--chunk-size', type=int, default=1 << 20, help='maximum pairs computed at once')
+    parser.add_argument('--shards', type=int, help='split generation into about this many part files')
+    parser.add_argument('--workers', type=int, help='processes for --shards (default: CPU count)')
+    parser.add_argument('--shard-dir', default=SHARD_DIR, help='directory for part files and manifest.json')
+    parser.add_argument('--shard', type=int, action='append', help='regenerate only this shard (repeatable)')
+    parser.add_argument('--merge', action='store_true', help='merge the part files into --out (and --binary)')
+    args = parser.parse_args(argv)
+
+    nodes = load_nodes(args.db)
+    if args.shard:
+        for index, match in rerun_shards(nodes, args.shard_dir, args.shard).items():
+            print(f"Regenerated shard {index}: {'checksum matches' if match else 'CHECKSUM MISMATCH'}")
+        return
+    if args.shards:
+        manifest = run_sharded(nodes, args.shard_dir, args.seed, args.synthetic, args.shards, args.workers,
+                               args.chunk_size, bool(args.binary))
+        print(f"Wrote {manifest['rows']} rows in {len(manifest['shards'])} shards to {args.shard_dir}")
+    if args.shards or args.merge:
+        if args.merge:
+            merge(args.shard_dir, args.out, args.binary)
+            print(f"Merged shards into {args.out}")
+        return
+
+    chunks = generate(nodes, args.seed, args.synthetic, args.chunk_size)
+    write(chunks, nodes, args.out, args.binary, count_rows(nodes, args.synthetic))
+
+    print(f"Wrote training data to {args.out}")
+    if args.binary:
+        print(f"Wrote columnar training data to {args.binary}")
+
+if __name__ == '__main__':
+    main()
@@ -3,83 +3,770 @@ Pattern Incubator Core
 AI-driven pattern learning and generation engine
 """
 
+import csv
 import json
+import multiprocessing
+import operator
+import os
+import sys
+import tempfile
 import numpy as np
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+# Shared helpers (nob_common) ship with python-engine but do not need it installed.
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'python-engine'))
+
+from nob_common import FeatureScaler, stage_timer
+
+try:
+    from nob_common.neighbors import PatternIndex
+except ImportError:  # SciPy missing: build_index is unavailable
+    PatternIndex = None
+
+FEATURE_NAMES = ('frequency', 'magnitude', 'phase', 'coherence')
+
+class ColumnTable(Sequence):
+    """Columnar record store: one NumPy array per field, interned strings
+
+    Subclasses declare ``SCHEMA`` as field name -> dtype. ``str`` fields are
+    stored as int32 codes into a shared string table (-1 when missing).
+    Columns grow by doubling, so appending one record at a time stays cheap.
+    Indexing returns a ``Row``, a dict, so code written against a list of
+    dicts keeps working. If ``OVERFLOW`` names a ``str`` field of the
+    schema, keys outside the schema are kept there as a JSON object and
+    merged back into the row; otherwise they are dropped.
+
+    ``column`` hands out read-only views. Rows change only through item
+    assignment (``table[i] = record`` or ``table[i][key] = value``), which
+    bumps ``edits`` so ``CheckpointStore`` knows to check the rows it has
+    already written instead of appending only the new ones.
+    """
+
+    SCHEMA = {}
+    OVERFLOW = None
+
+    def __init__(self, columns=None, strings=None):
+        columns = columns or {}
+        size = len(next(iter(columns.values()))) if columns else 0
+        self._data = {}
+        for name, dtype in self.SCHEMA.items():
+            if name in columns:
+                self._data[name] = np.asarray(columns[name], dtype=_storage_dtype(dtype))
+            else:
+                self._data[name] = np.full(size, _default_value(dtype), dtype=_storage_dtype(dtype))
+        self._size = size
+        self.strings = list(strings or [])
+        self._lookup = {value: i for i, value in enumerate(self.strings)}
+        self.edits = 0
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a table from an iterable of record dicts"""
+        table = cls()
+        table.extend(records)
+        return table
+
+    def _intern(self, value):
+        if value is None:
+            return -1
+        value = str(value)
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def _overflow(self, record):
+        extra = {key: value for key, value in record.items() if key not in self.SCHEMA or key == self.OVERFLOW}
+        return self._intern(json.dumps(extra, sort_keys=True, default=str)) if extra else -1
+
+    def _reserve(self, size):
+        capacity = len(next(iter(self._data.values())))
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 16)
+        for name, column in self._data.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._data[name] = grown
+
+    def extend(self, records):
+        """Append record dicts in bulk"""
+        records = records if isinstance(records, list) else list(records)
+        columns = {}
+        for name, dtype in self.SCHEMA.items():
+            if name == self.OVERFLOW:
+                columns[name] = np.array([self._overflow(record) for record in records], dtype=np.int32)
+            elif dtype is str:
+                columns[name] = np.array([self._intern(record.get(name)) for record in records], dtype=np.int32)
+            else:
+                default = _default_value(dtype)
+                columns[name] = np.array([record.get(name, default) for record in records], dtype=dtype)
+        self.extend_columns(columns)
+
+    def extend_columns(self, columns):
+        """Append whole columns at once; missing fields get their default
+
+        ``str`` fields take either strings or int32 codes from ``strings``.
+        """
+        views = self.allocate(len(next(iter(columns.values()))))
+        for name, dtype in self.SCHEMA.items():
+            values = columns.get(name)
+            if values is None:
+                continue
+            if dtype is str and np.asarray(values).dtype.kind not in 'iu':
+                values = [self._intern(value) for value in values]
+            views[name][:] = values
+
+    def allocate(self, count):
+        """Append ``count`` default rows and return writable views of them
+
+        Lets bulk producers fill columns in place instead of building
+        temporaries and copying them in.
+        """
+        start, end = self._size, self._size + count
+        self._reserve(end)
+        views = {}
+        for name, dtype in self.SCHEMA.items():
+            views[name] = self._data[name][start:end]
+            views[name][:] = _default_value(dtype)
+        self._size = end
+        return views
+
+    def append(self, record):
+        self.extend([record])
+
+    def column(self, name):
+        view = self._data[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def columns(self):
+        return {name: self.column(name) for name in self.SCHEMA}
+
+    def __len__(self):
+        return self._size
+
+    def _position(self, index):
+        index = operator.index(index)
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('table index out of range')
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = self._position(index)
+        record = {}
+        for name, dtype in self.SCHEMA.items():
+            value = self._data[name][index]
+            if name == self.OVERFLOW:
+                if value >= 0:
+                    record.update(json.loads(self.strings[value]))
+            elif dtype is str:
+                if value >= 0:
+                    record[name] = self.strings[value]
+            elif value.dtype.kind == 'M':
+                record[name] = None if np.isnat(value) else value.item().isoformat()
+            else:
+                record[name] = value.item()
+        return Row(self, index, record)
+
+    def __setitem__(self, index, record):
+        """Replace row ``index`` with ``record``; fields it lacks get their defaults"""
+        index = self._position(index)
+        for name, dtype in self.SCHEMA.items():
+            if name == self.OVERFLOW:
+                value = self._overflow(record)
+            elif dtype is str:
+                value = self._intern(record.get(name))
+            else:
+                value = record.get(name, _default_value(dtype))
+            self._data[name][index] = value
+        self.edits += 1
+
+    def to_records(self):
+        return [dict(row) for row in self]
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+class Row(dict):
+    """One table row as a dict; changing it writes the row back to the table"""
+
+    def __init__(self, table, index, record):
+        super().__init__(record)
+        self.table = table
+        self.index = index
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.table[self.index] = self
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.table[self.index] = self
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.table[self.index] = self
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+def _storage_dtype(dtype):
+    return np.dtype(np.int32) if dtype is str else np.dtype(dtype)
+
+def _default_value(dtype):
+    if dtype is str:
+        return -1
+    return np.datetime64('NaT') if np.dtype(dtype).kind == 'M' else 0
+
+class PatternTable(ColumnTable):
+    """Columnar pattern store with bulk JSON, CSV and .npz loading
+
+    Fields outside the schema are kept per row in the ``extra`` column.
+    """
+
+    SCHEMA = {
+        'id': str,
+        'template': str,
+        'frequency': 'f8',
+        'magnitude': 'f8',
+        'phase': 'f8',
+        'coherence': 'f8',
+        'extra': str
+    }
+    OVERFLOW = 'extra'
+
+    @classmethod
+    def from_json(cls, path):
+        """Load a JSON list of patterns, or an object with a 'patterns' list"""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls.from_records(data['patterns'] if isinstance(data, dict) else data)
+
+    @classmethod
+    def from_csv(cls, path):
+        """Load a CSV file with a header row naming the pattern fields"""
+        with open(path, 'r', newline='') as f:
+            rows = [{key: value for key, value in row.items() if value not in ('', None)}
+                    for row in csv.DictReader(f)]
+        return cls.from_records(rows)
+
+    @classmethod
+    def from_binary(cls, path):
+        """Load a table written by ``save_binary``"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in cls.SCHEMA}, data['strings'].tolist())
+
+    @classmethod
+    def load(cls, path):
+        """Load JSON, CSV or binary (.npz) patterns based on the file extension"""
+        suffix = Path(path).suffix.lower()
+        if suffix == '.csv':
+            return cls.from_csv(path)
+        if suffix == '.npz':
+            return cls.from_binary(path)
+        return cls.from_json(path)
+
+    def save_binary(self, path):
+        """Write the columns and string table to an uncompressed .npz file"""
+        np.savez(path, strings=np.array(self.strings, dtype=str), **self.columns)
+
+    def features(self, rows=slice(None)):
+        """(n x 4) float64 matrix of frequency, magnitude, phase, coherence"""
+        return np.column_stack([self.column(name)[rows] for name in FEATURE_NAMES])
+
+class LearnedPatternTable(ColumnTable):
+    SCHEMA = {
+        'template': str,
+        'generated_at': 'M8[us]',
+        'frequency': 'f8',
+        'magnitude': 'f8',
+        'phase': 'f8',
+        'confidence': 'f8'
+    }
+
+class TrainingHistory(ColumnTable):
+    SCHEMA = {
+        'iteration': 'i8',
+        'loss': 'f8',
+        'timestamp': 'M8[us]'
+    }
+
+CHECKPOINT_TABLES = {
+    'patterns': PatternTable,
+    'learned_patterns': LearnedPatternTable,
+    'training_history': TrainingHistory
+}
+
+class CheckpointStore:
+    """Append-only incubator checkpoint directory
+
+    Every column is a raw little-endian file and every string table a JSON
+    lines file; a checkpoint appends only the rows and strings added since
+    the previous one, then atomically replaces ``manifest.json``, which
+    records the live row range of each table. Bytes past the manifest's
+    offsets (an interrupted checkpoint) are truncated on the next append.
+
+    A table that was replaced, or edited in rows already written, rather
+    than only appended to starts a new segment further down its files and
+    leaves dead rows behind; compaction rewrites
+    live rows into the next file generation once the dead rows outnumber
+    the live ones, or after ``compact_every`` checkpoints.
+    """
+
+    FORMAT = 2
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.manifest = None
+        self._tables = {}
+        self._edits = {}
+
+    def _path(self, table, name, generation):
+        return self.directory / table / f'{name}.{generation}.bin'
+
+    def _strings_path(self, table, generation):
+        return self.directory / table / f'strings.{generation}.jsonl'
+
+    def load(self):
+        """Memory-map every table back in (copy-on-write); returns (tables, manifest)"""
+        with open(self.directory / 'manifest.json', 'r') as f:
+            self.manifest = json.load(f)
+        self._check_format()
+        generation = self.manifest['generation']
+        tables = {}
+        for name, cls in CHECKPOINT_TABLES.items():
+            state = self.manifest['tables'][name]
+            rows = state['rows'] - state['start']
+            columns = {}
+            for column, dtype in cls.SCHEMA.items():
+                dtype = _storage_dtype(dtype).newbyteorder('<')
+                if rows:
+                    columns[column] = np.memmap(self._path(name, column, generation), dtype=dtype, mode='c',
+                                                offset=state['start'] * dtype.itemsize, shape=(rows,))
+                else:
+                    columns[column] = np.empty(0, dtype=dtype)
+            with open(self._strings_path(name, generation), 'rb') as f:
+                f.seek(state['strings_offset'])
+                lines = f.read(state['strings_end'] - state['strings_offset']).splitlines()
+            tables[name] = self._tables[name] = cls(columns, [json.loads(line) for line in lines])
+            self._edits[name] = 0
+        return tables, self.manifest
+
+    def save(self, tables, model_version, compact_every=10, random_state=None):
+        """Append the rows added to ``tables`` since the last save
+
+        The first save of a store continues the checkpoint already in the
+        directory, if any: a table whose leading rows and strings are the
+        ones saved there only has its new rows appended. ``random_state``
+        (JSON-compatible) is stored in the manifest as is.
+        """
+        if self.manifest is None:
+            self._open()
+        manifest = self.manifest
+        generation = manifest['generation']
+        for name, table in tables.items():
+            state = manifest['tables'][name]
+            written = state['rows'] - state['start']
+            unchanged = self._tables.get(name) is table and self._edits.get(name) == table.edits
+            if not unchanged and not self._continues(name, table):
+                # Replaced or edited since the last checkpoint: start a new live segment.
+                state.update(start=state['rows'], strings_offset=state['strings_end'], strings=0)
+                written = 0
+            for column, values in table.columns.items():
+                values = values[written:].astype(values.dtype.newbyteorder('<'), copy=False)
+                state_bytes = state['rows'] * values.dtype.itemsize
+                with open(self._path(name, column, generation), 'r+b') as f:
+                    f.truncate(state_bytes)
+                    f.seek(state_bytes)
+                    f.write(values.tobytes())
+            with open(self._strings_path(name, generation), 'r+b') as f:
+                f.truncate(state['strings_end'])
+                f.seek(state['strings_end'])
+                f.write(''.join(json.dumps(s) + '\n' for s in table.strings[state['strings']:]).encode())
+                state['strings_end'] = f.tell()
+            state['rows'] += len(table) - written
+            state['strings'] = len(table.strings)
+            self._tables[name] = table
+            self._edits[name] = table.edits
+
+        manifest['checkpoints'] += 1
+        manifest['since_compaction'] += 1
+        manifest['model_version'] = model_version
+        manifest['random_state'] = random_state
+        manifest['timestamp'] = datetime.now().isoformat()
+        live = sum(state['rows'] - state['start'] for state in manifest['tables'].values())
+        dead = sum(state['start'] for state in manifest['tables'].values())
+        if dead and (dead > live or manifest['since_compaction'] >= compact_every):
+            self.compact()
+        else:
+            self._write_manifest()
+        return manifest
+
+    def compact(self):
+        """Rewrite live rows into a new file generation and drop the old one"""
+        old, new = self.manifest['generation'], self.manifest['generation'] + 1
+        for name, cls in CHECKPOINT_TABLES.items():
+            state = self.manifest['tables'][name]
+            for column, dtype in cls.SCHEMA.items():
+                itemsize = _storage_dtype(dtype).itemsize
+                with open(self._path(name, column, old), 'rb') as f:
+                    f.seek(state['start'] * itemsize)
+                    data = f.read((state['rows'] - state['start']) * itemsize)
+                self._path(name, column, new).write_bytes(data)
+            with open(self._strings_path(name, old), 'rb') as f:
+                f.seek(state['strings_offset'])
+                strings = f.read(state['strings_end'] - state['strings_offset'])
+            self._strings_path(name, new).write_bytes(strings)
+            state.update(rows=state['rows'] - state['start'], start=0,
+                         strings_offset=0, strings_end=len(strings))
+        self.manifest.update(generation=new, since_compaction=0)
+        self._write_manifest()
+        for name in CHECKPOINT_TABLES:
+            for path in self.directory.glob(f'{name}/*.{old}.*'):
+                path.unlink()
+
+    def _open(self):
+        """Continue the checkpoint in the directory, or start an empty one"""
+        try:
+            with open(self.directory / 'manifest.json', 'r') as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self._reset()
+            return
+        self._check_format()
+        self._tables = {}
+        self._edits = {}
+
+    def _check_format(self):
+        if self.manifest.get('format') != self.FORMAT:
+            raise ValueError(f"Unsupported checkpoint format in {self.directory}: {self.manifest.get('format')}")
+
+    def _continues(self, name, table):
+        """Whether ``table`` starts with exactly the live rows and strings saved for ``name``"""
+        state = self.manifest['tables'][name]
+        generation = self.manifest['generation']
+        written = state['rows'] - state['start']
+        if len(table) < written or len(table.strings) < state['strings']:
+            return False
+        for column, values in table.columns.items():
+            if not written:
+                break
+            dtype = values.dtype.newbyteorder('<')
+            saved = np.memmap(self._path(name, column, generation), dtype=dtype, mode='r',
+                              offset=state['start'] * dtype.itemsize, shape=(written,))
+            # Bytewise, so NaN and NaT rows compare equal to themselves.
+            if saved.tobytes() != values[:written].astype(dtype, copy=False).tobytes():
+                return False
+        with open(self._strings_path(name, generation), 'rb') as f:
+            f.seek(state['strings_offset'])
+            lines = f.read(state['strings_end'] - state['strings_offset']).splitlines()
+        return [json.loads(line) for line in lines] == table.strings[:state['strings']]
+
+    def _reset(self):
+        """Start an empty checkpoint, removing stray table files from the directory"""
+        for name in CHECKPOINT_TABLES:
+            for path in self.directory.glob(f'{name}/*.*.*'):
+                path.unlink()
+        self.manifest = {
+            'format': self.FORMAT,
+            'generation': 0,
+            'checkpoints': 0,
+            'since_compaction': 0,
+            'tables': {name: {'start': 0, 'rows': 0, 'strings_offset': 0, 'strings_end': 0, 'strings': 0}
+                       for name in CHECKPOINT_TABLES}
+        }
+        for name, cls in CHECKPOINT_TABLES.items():
+            (self.directory / name).mkdir(parents=True, exist_ok=True)
+            for column in cls.SCHEMA:
+                self._path(name, column, 0).touch()
+            self._strings_path(name, 0).touch()
+        self._tables = {}
+        self._edits = {}
+
+    def _write_manifest(self):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.directory / 'manifest.json')
+
+def _assign(Z, centroids):
+    """Nearest centroid per row and its squared distance"""
+    d2 = (np.einsum('ij,ij->i', Z, Z)[:, None] - 2 * Z @ centroids.T
+          + np.einsum('ij,ij->i', centroids, centroids)[None, :])
+    labels = d2.argmin(axis=1)
+    return labels, np.maximum(d2[np.arange(len(Z)), labels], 0.0)
+
+def _kmeans_plus_plus(Z, k, rng):
+    centroids = np.empty((k, Z.shape[1]))
+    centroids[0] = Z[rng.integers(len(Z))]
+    closest = np.sum((Z - centroids[0]) ** 2, axis=1)
+    for c in range(1, k):
+        total = closest.sum()
+        index = rng.choice(len(Z), p=closest / total) if total > 0 else rng.integers(len(Z))
+        centroids[c] = Z[index]
+        closest = np.minimum(closest, np.sum((Z - centroids[c]) ** 2, axis=1))
+    return centroids
+
+def _cluster_sums(Z, labels, k):
+    """Per-cluster counts and feature sums"""
+    counts = np.bincount(labels, minlength=k)
+    sums = np.column_stack([np.bincount(labels, weights=column, minlength=k) for column in Z.T])
+    return counts, sums
+
+def _recompute_centroids(Z, labels, k, previous, distances):
+    counts, sums = _cluster_sums(Z, labels, k)
+    centroids = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], previous)
+    empty = np.flatnonzero(counts == 0)
+    if empty.size:
+        # Re-seed empty clusters with the points farthest from their centroid.
+        far = np.argsort(distances)[::-1][:empty.size]
+        centroids[empty] = Z[far]
+    return centroids
+
+# Iterations per independently seeded training chunk. Fixed, so results do not
+# depend on how many workers the chunks are spread over.
+TRAIN_CHUNK = 1 << 16
+
+def _train_chunk(seed, start, stop, iterations):
+    """Simulated loss for iterations [start, stop) of a training run"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.1, 0.9, stop - start) * (1 - np.arange(start, stop) / iterations)
+
+def _learned_features(columns):
+    """Feature matrix for learned-pattern columns, which carry no coherence"""
+    return np.column_stack([columns['frequency'], columns['magnitude'], columns['phase'],
+                            np.zeros(len(columns['frequency']))])
+
 class PatternIncubator:
     """Incubate and learn patterns from data"""
     
-    def __init__(self, codex_path='../../codex/codex-index.json'):
+    def __init__(self, codex_path='../../codex/codex-index.json', seed=None):
         self.codex_path = codex_path
-        self.patterns = []
-        self.learned_patterns = []
-        self.training_history = []
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence.spawn(1)[0])
+        self.patterns = PatternTable()
+        self.learned_patterns = LearnedPatternTable()
+        self.training_history = TrainingHistory()
+        self._checkpoint = None
+        self.index = None
+        self._index_learned = False
+        self._index_edits = 0
         self.model_version = "1.0"
         
     def load_patterns(self, data):
-        """Load pattern data for analysis"""
-        self.patterns = data if isinstance(data, list) else [data]
+        """Load pattern data for analysis
+
+        Accepts a PatternTable, a list of pattern dicts, a single dict, or a
+        path to a JSON, CSV or .npz file.
+        """
+        if isinstance(data, PatternTable):
+            self.patterns = data
+        elif isinstance(data, (str, Path)):
+            self.patterns = PatternTable.load(data)
+        else:
+            self.patterns = PatternTable.from_records(data if isinstance(data, list) else [data])
+        self.index = None
         print(f"Loaded {len(self.patterns)} patterns for analysis")
         
-    def extract_features(self, pattern):
-        """Extract key features from a pattern"""
-        features = {
-            'frequency': pattern.get('frequency', 0),
-            'magnitude': pattern.get('magnitude', 0),
-            'phase': pattern.get('phase', 0),
-            'coherence': pattern.get('coherence', 0),
-            'timestamp': datetime.now().isoformat()
+    @stage_timer('features')
+    def extract_features(self, patterns=None):
+        """Extract key features from patterns
+
+        Returns an (n x 4) feature matrix for a PatternTable or list of
+        dicts (the loaded patterns by default). A single pattern dict still
+        gets the per-pattern feature dict.
+        """
+        if isinstance(patterns, dict):
+            features = {name: patterns.get(name, 0) for name in FEATURE_NAMES}
+            features['timestamp'] = datetime.now().isoformat()
+            return features
+        if patterns is None:
+            patterns = self.patterns
+        elif not isinstance(patterns, PatternTable):
+            patterns = PatternTable.from_records(patterns)
+        return patterns.features()
+
+    @stage_timer('clustering')
+    def cluster_patterns(self, k=3, seed=None, max_iter=100, tol=1e-6, features=None):
+        """Cluster patterns with k-means++ initialisation and Lloyd iterations
+
+        Features are standardised and phase is embedded as (cos, sin) so it
+        wraps around. Returns a dict with centroids (k x 4, in feature units
+        with phase in [0, 2*pi)), labels, inertia (in the embedded space) and
+        the number of iterations run. ``features`` overrides the loaded
+        patterns with an (n x 4) array.
+
+        This replaces the old list of k pattern lists; the members of cluster
+        ``c`` are ``patterns[i]`` for each ``i`` in ``flatnonzero(labels == c)``.
+        Raises ValueError with fewer than k patterns, as the mini-batch
+        variant does.
+        """
+        X = self.extract_features() if features is None else np.asarray(features, dtype=np.float64)
+        if len(X) < k:
+            raise ValueError(f"need at least k={k} patterns to cluster, got {len(X)}")
+
+        rng = np.random.default_rng(seed)
+        scaler = FeatureScaler(X)
+        Z = scaler.embed(X)
+        centroids = _kmeans_plus_plus(Z, k, rng)
+
+        for n_iter in range(1, max_iter + 1):
+            labels, distances = _assign(Z, centroids)
+            updated = _recompute_centroids(Z, labels, k, centroids, distances)
+            shift = np.sum((updated - centroids) ** 2)
+            centroids = updated
+            if shift <= tol:
+                break
+
+        labels, distances = _assign(Z, centroids)
+        return {
+            'centroids': scaler.restore(centroids),
+            'labels': labels,
+            'inertia': float(distances.sum()),
+            'n_iter': n_iter
         }
-        return features
-    
-    def cluster_patterns(self, k=3):
-        """Cluster patterns using simple k-means"""
-        if len(self.patterns) < k:
-            print("Not enough patterns for clustering")
-            return []
-        
-        # Simple clustering
-        clusters = [[] for _ in range(k)]
-        for i, pattern in enumerate(self.patterns):
-            cluster_id = i % k
-            clusters[cluster_id].append(pattern)
-        
-        return clusters
-    
+
+    @stage_timer('clustering')
+    def cluster_patterns_minibatch(self, batches, k=3, seed=None):
+        """Mini-batch k-means over a stream of feature batches
+
+        ``batches`` yields (m x 4) feature arrays or lists of pattern dicts,
+        so the full set never has to fit in memory. The first batch seeds the
+        feature scaling and k-means++ centroids; each batch then moves its
+        assigned centroids with a per-centroid learning rate of 1/count.
+        Returns centroids, the number of patterns per cluster and the inertia
+        accumulated while streaming.
+        """
+        rng = np.random.default_rng(seed)
+        scaler = centroids = counts = None
+        inertia = 0.0
+        for batch in batches:
+            X = batch if isinstance(batch, np.ndarray) else self.extract_features(batch)
+            if scaler is None:
+                if len(X) < k:
+                    raise ValueError("first batch must contain at least k patterns")
+                scaler = FeatureScaler(X)
+                centroids = _kmeans_plus_plus(scaler.embed(X), k, rng)
+                counts = np.zeros(k)
+            Z = scaler.embed(X)
+            labels, distances = _assign(Z, centroids)
+            inertia += float(distances.sum())
+
+            batch_counts, sums = _cluster_sums(Z, labels, k)
+            counts += batch_counts
+            seen = batch_counts > 0
+            # Equivalent to per-sample updates c += (z - c) / count in batch form.
+            centroids[seen] += (sums[seen] - batch_counts[seen, None] * centroids[seen]) / counts[seen, None]
+
+        if scaler is None:
+            raise ValueError("no batches to cluster")
+        return {'centroids': scaler.restore(centroids), 'counts': counts.astype(np.int64), 'inertia': inertia}
+
     def generate_pattern(self, template):
         """Generate new pattern from template"""
-        generated = {
-            'template': template,
-            'generated_at': datetime.now().isoformat(),
-            'frequency': np.random.normal(440, 100),
-            'magnitude': np.random.uniform(0.5, 1.0),
-            'phase': np.random.uniform(0, 2*np.pi),
-            'confidence': np.random.uniform(0.7, 0.99)
-        }
-        self.learned_patterns.append(generated)
-        return generated
-    
-    def train(self, iterations=100):
-        """Train the pattern incubator"""
+        self.generate_patterns(template, 1)
+        return self.learned_patterns[-1]
+
+    @stage_timer('generation')
+    def generate_patterns(self, templates, n=1):
+        """Generate ``n`` patterns per template in one vectorized call
+
+        Draws come from the instance generator, so a given seed always yields
+        the same patterns. Rows are filled in place in ``learned_patterns``;
+        returns views of the new columns.
+        """
+        templates = [templates] if isinstance(templates, str) else list(templates)
+        codes = np.array([self.learned_patterns._intern(t) for t in templates], dtype=np.int32)
+        rows = self.learned_patterns.allocate(len(codes) * n)
+
+        rows['template'][:] = np.repeat(codes, n)
+        rows['generated_at'][:] = np.datetime64(datetime.now(), 'us')
+        self.rng.standard_normal(out=rows['frequency'])
+        rows['frequency'] *= 100
+        rows['frequency'] += 440
+        for name, low, high in (('magnitude', 0.5, 1.0), ('phase', 0, 2*np.pi), ('confidence', 0.7, 0.99)):
+            self.rng.random(out=rows[name])
+            rows[name] *= high - low
+            rows[name] += low
+        if self.index is not None and self._index_learned:
+            self.index.insert(_learned_features(rows), [self.learned_patterns.strings[c] for c in rows['template']])
+        return rows
+
+    def build_index(self, include_learned=True):
+        """Build a nearest-neighbour index over the known patterns
+
+        Rows are numbered patterns first, then learned patterns in
+        generation order; patterns generated afterwards are inserted as they
+        are learned. Needs SciPy.
+        """
+        if PatternIndex is None:
+            raise ImportError("build_index requires SciPy")
+        strings = self.patterns.strings
+        features = [self.patterns.features()]
+        labels = [strings[code] if code >= 0 else None for code in self.patterns.column('id').tolist()]
+        if include_learned:
+            learned = self.learned_patterns
+            features.append(_learned_features(learned.columns))
+            labels += [learned.strings[code] if code >= 0 else None for code in learned.column('template').tolist()]
+        self.index = PatternIndex(np.concatenate(features), labels)
+        self._index_learned = include_learned
+        self._index_edits = self.patterns.edits
+        return self.index
+
+    def nearest(self, features, k=5):
+        """Distances and index rows of the k known patterns closest to features
+
+        The index is rebuilt first if patterns were edited since it was built.
+        """
+        if self.index is None:
+            self.build_index()
+        elif self._index_edits != self.patterns.edits:
+            self.build_index(self._index_learned)
+        return self.index.query(features, k)
+
+    @stage_timer('training')
+    def train(self, iterations=100, workers=None):
+        """Train the pattern incubator
+
+        Iterations run in fixed-size chunks, each with its own stream spawned
+        from the instance seed, so the loss history is identical whether the
+        chunks run inline or across ``workers`` processes. Workers are
+        spawned rather than forked, which is safe in threaded hosts such as
+        the engine.
+        """
         print(f"Starting training for {iterations} iterations...")
-        
-        for i in range(iterations):
-            # Simulate training
-            loss = np.random.uniform(0.1, 0.9) * (1 - (i / iterations))
-            self.training_history.append({
-                'iteration': i,
-                'loss': loss,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            if i % 20 == 0:
-                print(f"Iteration {i}: Loss = {loss:.4f}")
-        
+
+        history = self.training_history.allocate(iterations)
+        bounds = list(range(0, iterations, TRAIN_CHUNK)) + [iterations]
+        chunks = [(seed, start, stop, iterations)
+                  for seed, start, stop in zip(self.seed_sequence.spawn(len(bounds) - 1), bounds, bounds[1:])]
+        if workers and workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                losses = list(pool.map(_train_chunk, *zip(*chunks)))
+        else:
+            losses = [_train_chunk(*chunk) for chunk in chunks]
+
+        history['iteration'][:] = np.arange(iterations)
+        if losses:
+            np.concatenate(losses, out=history['loss'])
+        history['timestamp'][:] = np.datetime64(datetime.now(), 'us')
+
+        for i in range(0, iterations, max(20, iterations // 5)):
+            print(f"Iteration {i}: Loss = {history['loss'][i]:.4f}")
         print("Training complete!")
         return self.training_history
-    
+
     def generate_report(self):
         """Generate analysis report"""
         report = {
@@ -88,26 +775,77 @@ class PatternIncubator:
             'patterns_analyzed': len(self.patterns),
             'patterns_learned': len(self.learned_patterns),
             'training_iterations': len(self.training_history),
-            'average_confidence': np.mean([p.get('confidence', 0) for p in self.learned_patterns]) if self.learned_patterns else 0,
+            'average_confidence': float(self.learned_patterns.column('confidence').mean()) if len(self.learned_patterns) else 0,
             'status': 'ready'
         }
         return report
     
-    def save_checkpoint(self, filename='checkpoint.json'):
-        """Save training checkpoint"""
-        checkpoint = {
-            'model_version': self.model_version,
-            'timestamp': datetime.now().isoformat(),
-            'patterns': self.patterns,
-            'learned_patterns': self.learned_patterns,
-            'training_history': self.training_history
+    def _random_state(self):
+        """Generator and seed-sequence state as JSON-compatible values"""
+        seeds = self.seed_sequence
+        return {
+            'generator': self.rng.bit_generator.state,
+            'seed_sequence': {
+                'entropy': seeds.entropy,
+                'spawn_key': list(seeds.spawn_key),
+                'pool_size': seeds.pool_size,
+                'n_children_spawned': seeds.n_children_spawned
+            }
         }
-        
-        with open(filename, 'w') as f:
-            json.dump(checkpoint, f, indent=2)
-        print(f"Checkpoint saved to {filename}")
-        
-        return checkpoint
+
+    def _restore_random_state(self, state):
+        seeds = state['seed_sequence']
+        self.seed_sequence = np.random.SeedSequence(
+            seeds['entropy'], spawn_key=tuple(seeds['spawn_key']), pool_size=seeds['pool_size'],
+            n_children_spawned=seeds['n_children_spawned']
+        )
+        bit_generator = getattr(np.random, state['generator']['bit_generator'])()
+        bit_generator.state = state['generator']
+        self.rng = np.random.Generator(bit_generator)
+
+    def save_checkpoint(self, path='checkpoint', compact_every=10):
+        """Save training checkpoint
+
+        Saves append only the patterns, learned patterns and history added
+        since the checkpoint at ``path`` was last written or loaded; a table
+        that does not continue it is written out in full. The random state
+        goes into the manifest. Returns the checkpoint manifest.
+        """
+        if self._checkpoint is None or self._checkpoint.directory != Path(path):
+            self._checkpoint = CheckpointStore(path)
+        tables = {name: getattr(self, name) for name in CHECKPOINT_TABLES}
+        manifest = self._checkpoint.save(tables, self.model_version, compact_every, self._random_state())
+        print(f"Checkpoint saved to {path}")
+        return manifest
+
+    def load_checkpoint(self, path='checkpoint'):
+        """Resume from a checkpoint directory (or a legacy JSON checkpoint)
+
+        Columns are memory-mapped copy-on-write, so resuming does not read
+        the data up front and never modifies the checkpoint in place. The
+        generator and seed sequence are restored too, so a resumed run draws
+        the same patterns and training streams as one never interrupted.
+        """
+        path = Path(path)
+        if path.is_file():
+            with open(path, 'r') as f:
+                checkpoint = json.load(f)
+            for name, cls in CHECKPOINT_TABLES.items():
+                setattr(self, name, cls.from_records(checkpoint.get(name, [])))
+            self.model_version = checkpoint.get('model_version', self.model_version)
+            self._checkpoint = None
+            self.index = None
+            return checkpoint
+        self._checkpoint = CheckpointStore(path)
+        tables, manifest = self._checkpoint.load()
+        for name, table in tables.items():
+            setattr(self, name, table)
+        self.index = None
+        self.model_version = manifest.get('model_version', self.model_version)
+        if manifest.get('random_state'):
+            self._restore_random_state(manifest['random_state'])
+        print(f"Resumed from {path}: {len(self.patterns)} patterns, {len(self.training_history)} iterations")
+        return manifest
 
 def main():
     """Main execution"""
@@ -128,13 +866,13 @@ def main():
     
     # Extract features
     print("Extracting features...")
-    features = [incubator.extract_features(p) for p in incubator.patterns[:5]]
-    print(f"Sample features: {json.dumps(features[:2], indent=2, default=str)}\n")
+    features = incubator.extract_features()
+    print(f"Feature matrix: {features.shape}, first rows:\n{features[:2]}\n")
     
     # Cluster patterns
     print("Clustering patterns...")
-    clusters = incubator.cluster_patterns(k=3)
-    print(f"Created {len(clusters)} clusters\n")
+    clusters = incubator.cluster_patterns(k=3, seed=42)
+    print(f"Created {len(clusters['centroids'])} clusters (inertia = {clusters['inertia']:.2f})\n")
     
     # Train
     print("Training incubator...")
@@ -152,7 +890,7 @@ def main():
     print(json.dumps(report, indent=2, default=str))
     
     # Save checkpoint
-    incubator.save_checkpoint('incubator_checkpoint.json')
+    incubator.save_checkpoint('incubator_checkpoint')
 
 if __name__ == '__main__':
     main()
@@ -3,95 +3,585 @@ Ripple Lab
 Advanced ripple analysis laboratory
 """
 
+import contextlib
 import json
+import sys
+import time
+import uuid
 import numpy as np
+from collections.abc import Mapping
 from datetime import datetime
+from pathlib import Path
+from scipy import fft as sp_fft
 from scipy import signal
 
+# Shared helpers (nob_common) ship with python-engine but do not need it installed.
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'python-engine'))
+
+from nob_common import stage_timer
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends from several processes are not locked
+    fcntl = None
+
+SPECTRUM_KEYS = ('peak_frequency', 'peak_magnitude', 'harmonic_energy', 'spectral_centroid')
+
+def _spectrum_features(block, sample_rate):
+    """Spectrum metrics for each row of a (ripples x samples) block"""
+    n = block.shape[-1]
+    magnitude = np.abs(sp_fft.rfft(block, axis=-1))
+    freqs = np.fft.rfftfreq(n, 1 / sample_rate)
+
+    peak = magnitude.argmax(axis=-1)
+    one_sided = magnitude.sum(axis=-1, dtype=np.float64)
+    # Harmonic energy keeps its two-sided definition: every bin except DC
+    # (and Nyquist for even n) appears twice in the full spectrum.
+    two_sided = one_sided + magnitude[:, 1:(n + 1) // 2].sum(axis=-1, dtype=np.float64)
+
+    return {
+        'peak_frequency': freqs[peak],
+        'peak_magnitude': magnitude[np.arange(len(block)), peak],
+        'harmonic_energy': two_sided ** 2 / n,
+        'spectral_centroid': (magnitude @ freqs) / np.where(one_sided > 0, one_sided, 1.0)
+    }
+
+INTERFERENCE_DTYPE = np.dtype([
+    ('i', np.int32), ('j', np.int32),
+    ('amplitude_increase', np.float32), ('constructive', np.bool_),
+    ('beat_frequency', np.float64), ('lag_seconds', np.float64), ('phase_lag', np.float64)
+])
+
+def _stack_waveforms(ripples, dtype=np.float32):
+    """Stack ripples into a zero-padded (ripples x samples) array"""
+    if isinstance(ripples, np.ndarray):
+        return np.array(np.atleast_2d(ripples), dtype=dtype)
+    waveforms = [np.asarray(r['waveform']) for r in ripples]
+    stack = np.zeros((len(waveforms), max((len(w) for w in waveforms), default=0)), dtype=dtype)
+    for row, waveform in zip(stack, waveforms):
+        row[:len(waveform)] = waveform
+    return stack
+
+def _top_pairs(block, row_offset, k):
+    """Top-k (i, j, value) entries with i < j from a block of matrix rows"""
+    rows, cols = np.indices(block.shape)
+    rows += row_offset
+    upper = cols > rows
+    values = block[upper]
+    if values.size > k:
+        keep = np.argpartition(-values, k - 1)[:k]
+    else:
+        keep = np.arange(values.size)
+    return np.column_stack([rows[upper][keep], cols[upper][keep], values[keep]])
+
+@contextlib.contextmanager
+def _locked(path):
+    """Exclusive inter-process lock (no-op where fcntl is unavailable)"""
+    with open(path, 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+def _iter_chunks(source, chunk_size, dtype=np.float32):
+    """Yield consecutive sample chunks from a Ripple, array or file path"""
+    if isinstance(source, Ripple):
+        yield from source.chunks(chunk_size)
+        return
+    if isinstance(source, (str, Path)):
+        path = str(source)
+        if path.endswith('.npy'):
+            source = np.load(path, mmap_mode='r')
+        elif Path(path).stat().st_size == 0:  # np.memmap cannot map an empty file
+            return
+        else:
+            source = np.memmap(path, dtype=dtype, mode='r')
+    samples = np.asarray(source).reshape(-1)
+    for start in range(0, len(samples), chunk_size):
+        yield samples[start:start + chunk_size]
+
+class Ripple(Mapping):
+    """Parametric sine ripple whose samples are generated on demand
+
+    Only the parameters are stored. Samples are produced in the requested
+    dtype, either all at once via ``ripple['waveform']`` or in bounded
+    chunks via ``chunks()``, so long high-rate ripples never need to be
+    held in memory unless asked for.
+    """
+
+    KEYS = ('frequency', 'amplitude', 'duration', 'sample_rate', 'dtype', 'timestamp', 'waveform')
+
+    def __init__(self, frequency=440, amplitude=1.0, duration=1.0, sample_rate=44100, dtype=np.float32):
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self.timestamp = datetime.now().isoformat()
+
+    @property
+    def num_samples(self):
+        return int(self.sample_rate * self.duration)
+
+    def samples(self, start=0, stop=None):
+        """Generate samples [start, stop)"""
+        stop = self.num_samples if stop is None else min(stop, self.num_samples)
+        n = np.arange(start, max(start, stop), dtype=np.float64)
+        # Reduce the phase in float64 first so float32 output stays accurate
+        # far into long ripples.
+        phase = np.mod(self.frequency * n / self.sample_rate, 1.0)
+        return (self.amplitude * np.sin(2 * np.pi * phase)).astype(self.dtype, copy=False)
+
+    def chunks(self, chunk_size=65536):
+        """Yield the waveform in consecutive chunks of at most chunk_size samples"""
+        for start in range(0, self.num_samples, chunk_size):
+            yield self.samples(start, start + chunk_size)
+
+    def to_dict(self, max_samples=1000):
+        """JSON-friendly summary with a waveform preview"""
+        return {
+            'frequency': self.frequency,
+            'amplitude': self.amplitude,
+            'duration': self.duration,
+            'sample_rate': self.sample_rate,
+            'waveform': self.samples(0, max_samples).tolist(),
+            'timestamp': self.timestamp
+        }
+
+    def __getitem__(self, key):
+        if key == 'waveform':
+            return self.samples()
+        if key in self.KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __repr__(self):
+        return (f"Ripple(frequency={self.frequency}, amplitude={self.amplitude}, "
+                f"duration={self.duration}, sample_rate={self.sample_rate}, dtype={self.dtype})")
+
+class StoredExperiment(Mapping):
+    """Index entry of an ExperimentStore with lazily mapped arrays"""
+
+    def __init__(self, store, entry):
+        self._store = store
+        self.entry = entry
+
+    def __getitem__(self, key):
+        if key == 'waveform':
+            return self._store.waveform(self.entry['id'])
+        if key == 'spectrum':
+            return self._store.spectrum(self.entry['id'])
+        if key in self.entry['parameters']:
+            return self.entry['parameters'][key]
+        return self.entry[key]
+
+    def __iter__(self):
+        yield from ('id', 'waveform', 'spectrum', 'results', 'timestamp')
+        yield from self.entry['parameters']
+
+    def __len__(self):
+        return 5 + len(self.entry['parameters'])
+
+class ExperimentStore:
+    """Append-only on-disk store for ripple experiments
+
+    Arrays live in append-only binary files (``waveforms.bin`` and
+    ``spectra.bin``) that are memory-mapped for reading, so only the ripples
+    actually touched are paged in. ``index.jsonl`` holds one JSON line per
+    experiment with its id, parameters, results and the offset, shape and
+    dtype of its arrays. Appends take an exclusive file lock, so several
+    processes can add runs concurrently without rewriting existing data;
+    ``refresh()`` picks up runs appended by others.
+    """
+
+    ALIGNMENT = 64
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.path / 'index.jsonl'
+        self._index_path.touch(exist_ok=True)
+        self._data_paths = {'waveform': self.path / 'waveforms.bin', 'spectrum': self.path / 'spectra.bin'}
+        for data_path in self._data_paths.values():
+            data_path.touch(exist_ok=True)
+        self._maps = {}
+        self._entries = []
+        self._by_id = {}
+        self._index_offset = 0
+        self.refresh()
+
+    def refresh(self):
+        """Load index lines appended since the last refresh"""
+        with open(self._index_path, 'rb') as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # another process is mid-append
+                self._index_offset += len(line)
+                entry = json.loads(line)
+                self._by_id[entry['id']] = len(self._entries)
+                self._entries.append(entry)
+
+    def append(self, waveform, spectrum=None, parameters=None, results=None, run_id=None):
+        """Append one experiment and return its id"""
+        run_id = run_id or uuid.uuid4().hex
+        entry = {
+            'id': run_id,
+            'timestamp': datetime.now().isoformat(),
+            'parameters': parameters or {},
+            'results': results
+        }
+        with _locked(self.path / '.lock'):
+            for kind, values in (('waveform', waveform), ('spectrum', spectrum)):
+                if values is not None:
+                    entry[kind] = self._write_array(kind, np.asarray(values))
+            with open(self._index_path, 'ab') as f:
+                f.write(json.dumps(entry, default=_json_default).encode() + b'\n')
+        self.refresh()
+        return run_id
+
+    def _write_array(self, kind, values):
+        values = np.ascontiguousarray(values)
+        with open(self._data_paths[kind], 'ab') as f:
+            end = f.seek(0, 2)
+            padding = -end % self.ALIGNMENT
+            f.write(b'\0' * padding)
+            f.write(values.tobytes())
+        return {'offset': end + padding, 'shape': list(values.shape), 'dtype': values.dtype.str}
+
+    def _array(self, run_id, kind):
+        meta = self._entries[self._by_id[run_id]].get(kind)
+        if meta is None:
+            return None
+        dtype = np.dtype(meta['dtype'])
+        nbytes = int(np.prod(meta['shape'], dtype=np.int64)) * dtype.itemsize
+        if nbytes == 0:  # nothing to map, and the data file may still be empty
+            return np.empty(meta['shape'], dtype=dtype)
+        mapped = self._maps.get(kind)
+        if mapped is None or len(mapped) < meta['offset'] + nbytes:
+            mapped = self._maps[kind] = np.memmap(self._data_paths[kind], dtype=np.uint8, mode='r')
+        return mapped[meta['offset']:meta['offset'] + nbytes].view(dtype).reshape(meta['shape'])
+
+    def waveform(self, run_id):
+        return self._array(run_id, 'waveform')
+
+    def spectrum(self, run_id):
+        return self._array(run_id, 'spectrum')
+
+    def ids(self):
+        return [entry['id'] for entry in self._entries]
+
+    def get(self, run_id):
+        return StoredExperiment(self, self._entries[self._by_id[run_id]])
+
+    def __contains__(self, run_id):
+        return run_id in self._by_id
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        return StoredExperiment(self, self._entries[index])
+
+    def __iter__(self):
+        for entry in self._entries:
+            yield StoredExperiment(self, entry)
+
 class RippleLab:
     """Advanced ripple analysis toolkit"""
     
-    def __init__(self):
-        self.experiments = []
-        self.results = []
-        
-    def create_ripple(self, frequency=440, amplitude=1.0, duration=1.0, sample_rate=44100):
-        """Create a ripple waveform"""
-        t = np.linspace(0, duration, int(sample_rate * duration))
-        ripple = amplitude * np.sin(2 * np.pi * frequency * t)
+    def __init__(self, store_path=None):
+        """With ``store_path`` experiments persist in an ExperimentStore
+
+        ``experiments`` is a list either way; with a store it starts with the
+        stored runs (arrays mapped lazily) and ``store`` holds the store itself.
+        """
+        self.store = ExperimentStore(store_path) if store_path else None
+        self.experiments = list(self.store) if self.store is not None else []
+        self.results = [e['results'] for e in self.experiments]
+
+    def record_experiment(self, ripple, results=None, store_spectrum=True):
+        """Keep a ripple, its magnitude spectrum and analysis results
+
+        Returns the stored experiment (persisted when the lab has a store).
+        """
+        waveform = np.asarray(ripple['waveform'])
+        spectrum = None
+        if store_spectrum:
+            spectrum = np.abs(sp_fft.rfft(waveform)) if waveform.size else np.empty(0, dtype=np.float32)
+        parameters = {key: ripple[key] for key in ('frequency', 'amplitude', 'duration', 'sample_rate')
+                      if key in ripple}
+        if self.store is None:
+            experiment = {**parameters, 'waveform': waveform, 'spectrum': spectrum, 'results': results}
+        else:
+            experiment = self.store.get(self.store.append(waveform, spectrum, parameters, results))
+        self.experiments.append(experiment)
+        self.results.append(results)
+        return experiment
         
-        return {
-            'frequency': frequency,
-            'amplitude': amplitude,
-            'duration': duration,
-            'sample_rate': sample_rate,
-            'waveform': ripple.tolist()[:1000],  # Store only first 1000 samples
-            'timestamp': datetime.now().isoformat()
-        }
+    def create_ripple(self, frequency=440, amplitude=1.0, duration=1.0, sample_rate=44100, dtype=np.float32):
+        """Create a ripple; samples are generated lazily at full length"""
+        return Ripple(frequency, amplitude, duration, sample_rate, dtype)
     
     def analyze_spectrum(self, ripple):
         """Analyze frequency spectrum"""
-        waveform = np.array(ripple['waveform'])
-        fft = np.fft.fft(waveform)
-        freqs = np.fft.fftfreq(len(waveform), 1/ripple['sample_rate'])
-        magnitude = np.abs(fft)
-        
-        analysis = {
-            'peak_frequency': float(freqs[np.argmax(magnitude)]),
-            'peak_magnitude': float(np.max(magnitude)),
-            'harmonic_energy': float(np.sum(magnitude)**2 / len(magnitude)),
-            'spectral_centroid': float(np.average(freqs, weights=magnitude))
-        }
-        
-        return analysis
+        batch = self.analyze_spectra([ripple])
+        return {key: float(values[0]) for key, values in batch.items()}
+
+    @stage_timer('spectrum')
+    def analyze_spectra(self, ripples, sample_rate=None, chunk_size=256):
+        """Analyze the spectra of many ripples with one rfft per chunk
+
+        ``ripples`` is either a 2-D array (ripples x samples) sharing
+        ``sample_rate``, or a list of ripples. Lists are grouped by length and
+        sample rate so each group is stacked and transformed along the last
+        axis, ``chunk_size`` ripples at a time to bound memory. Returns a dict
+        of arrays: peak_frequency, peak_magnitude, harmonic_energy and
+        spectral_centroid, in input order.
+        """
+        if isinstance(ripples, np.ndarray):
+            if sample_rate is None:
+                raise ValueError("sample_rate is required for array input")
+            stack = np.atleast_2d(ripples)
+            results = {key: np.empty(len(stack)) for key in SPECTRUM_KEYS}
+            for start in range(0, len(stack), chunk_size):
+                block = stack[start:start + chunk_size]
+                for key, values in _spectrum_features(block, sample_rate).items():
+                    results[key][start:start + len(block)] = values
+            return results
+
+        groups = {}
+        for i, ripple in enumerate(ripples):
+            waveform_len = ripple.num_samples if isinstance(ripple, Ripple) else len(ripple['waveform'])
+            groups.setdefault((waveform_len, ripple['sample_rate']), []).append(i)
+
+        results = {key: np.empty(len(ripples)) for key in SPECTRUM_KEYS}
+        for (_, rate), indices in groups.items():
+            for start in range(0, len(indices), chunk_size):
+                chunk = indices[start:start + chunk_size]
+                block = np.stack([np.asarray(ripples[i]['waveform']) for i in chunk])
+                for key, values in _spectrum_features(block, rate).items():
+                    results[key][chunk] = values
+        return results
     
     def detect_interference(self, ripple1, ripple2):
         """Detect interference patterns between ripples"""
-        w1 = np.array(ripple1['waveform'])
-        w2 = np.array(ripple2['waveform'])
-        
-        # Pad to same length
-        max_len = max(len(w1), len(w2))
-        w1 = np.pad(w1, (0, max_len - len(w1)), mode='constant')
-        w2 = np.pad(w2, (0, max_len - len(w2)), mode='constant')
-        
-        combined = w1 + w2
-        constructive = np.max(combined)
-        destructive = np.min(combined)
+        pair = self.interference_pairs([ripple1, ripple2])[0]
         
         interference = {
-            'type': 'constructive' if constructive > (w1.max() + w2.max()) * 0.9 else 'mixed',
-            'amplitude_increase': float(constructive / (w1.max() + w2.max())),
-            'phase_difference': float(ripple1['frequency'] - ripple2['frequency']),
-            'beat_frequency': abs(float(ripple1['frequency'] - ripple2['frequency']))
+            'type': 'constructive' if pair['constructive'] else 'mixed',
+            'amplitude_increase': float(pair['amplitude_increase']),
+            'phase_difference': float(pair['phase_lag']),
+            'lag_seconds': float(pair['lag_seconds']),
+            'beat_frequency': float(pair['beat_frequency'])
         }
         
         return interference
+
+    @stage_timer('interference')
+    def interference_pairs(self, ripples, sample_rate=None, max_elements=1 << 24):
+        """Interference statistics for every pair of ripples
+
+        Ripples are zero-padded to a common length and processed in tiles of
+        pairs holding at most ``max_elements`` samples. For each pair i < j
+        this reports the amplitude increase of the superposition, the beat
+        frequency, and the real lag found by FFT cross-correlation, both in
+        seconds (positive when ripple j trails ripple i) and as a phase in
+        radians at the pair's mean frequency.
+        Returns a structured array with one row per pair (INTERFERENCE_DTYPE).
+        """
+        if not isinstance(ripples, np.ndarray):
+            rates = {r['sample_rate'] for r in ripples}
+            if len(rates) > 1:
+                raise ValueError("all ripples must share one sample_rate")
+            sample_rate = rates.pop() if rates else sample_rate
+        if sample_rate is None:
+            raise ValueError("sample_rate is required for array input")
+
+        waves = _stack_waveforms(ripples)
+        n, length = waves.shape
+        if isinstance(ripples, np.ndarray) or not all('frequency' in r for r in ripples):
+            freqs = self.analyze_spectra(waves, sample_rate=sample_rate)['peak_frequency']
+        else:
+            freqs = np.array([r['frequency'] for r in ripples], dtype=np.float64)
+
+        peaks = waves.max(axis=1)
+        nfft = sp_fft.next_fast_len(2 * length - 1, real=True)
+        spectra = sp_fft.rfft(waves, n=nfft, axis=-1)
+        tile = max(1, int(np.sqrt(max_elements / max(nfft, 1))))
+
+        out = np.empty(n * (n - 1) // 2, dtype=INTERFERENCE_DTYPE)
+        filled = 0
+        for i0 in range(0, n, tile):
+            rows = slice(i0, min(i0 + tile, n))
+            for j0 in range(i0, n, tile):
+                cols = slice(j0, min(j0 + tile, n))
+                ii, jj = np.meshgrid(np.arange(n)[rows], np.arange(n)[cols], indexing='ij')
+                upper = jj > ii
+                if not upper.any():
+                    continue
+
+                combined = (waves[rows, None, :] + waves[None, cols, :]).max(axis=-1)
+                xcorr = sp_fft.irfft(np.conj(spectra[rows, None, :]) * spectra[None, cols, :], n=nfft, axis=-1)
+                lag = xcorr.argmax(axis=-1)
+                lag = np.where(lag >= length, lag - nfft, lag)
+
+                i, j = ii[upper], jj[upper]
+                count = i.size
+                block = out[filled:filled + count]
+                block['i'], block['j'] = i, j
+                reference = peaks[i] + peaks[j]
+                block['amplitude_increase'] = combined[upper] / np.where(reference != 0, reference, 1.0)
+                block['constructive'] = block['amplitude_increase'] > 0.9
+                block['beat_frequency'] = np.abs(freqs[i] - freqs[j])
+                block['lag_seconds'] = lag[upper] / sample_rate
+                phase = 2 * np.pi * (freqs[i] + freqs[j]) / 2 * block['lag_seconds']
+                block['phase_lag'] = np.angle(np.exp(1j * phase))
+                filled += count
+        return out
     
     def measure_coherence(self, ripples):
         """Measure coherence between multiple ripples"""
         if len(ripples) < 2:
             return 0.0
-        
-        # Simple cross-correlation based coherence
-        waveforms = [np.array(r['waveform']) for r in ripples]
-        max_len = max(len(w) for w in waveforms)
-        
-        correlations = []
-        for i in range(len(waveforms)):
-            for j in range(i + 1, len(waveforms)):
-                w1 = np.pad(waveforms[i], (0, max_len - len(waveforms[i])), mode='constant')
-                w2 = np.pad(waveforms[j], (0, max_len - len(waveforms[j])), mode='constant')
-                
-                # Normalize
-                w1 = (w1 - np.mean(w1)) / (np.std(w1) + 1e-10)
-                w2 = (w2 - np.mean(w2)) / (np.std(w2) + 1e-10)
-                
-                correlation = np.mean(w1 * w2)
-                correlations.append(correlation)
-        
-        return float(np.mean(correlations)) if correlations else 0.0
+        return self.coherence_matrix(ripples)['mean']
+
+    @stage_timer('coherence')
+    def coherence_matrix(self, ripples, top_k=None, block_size=1024):
+        """Pairwise correlation coherence for all ripples at once
+
+        Waveforms are zero-padded to a common length and z-normalised once;
+        the correlation matrix is then one matrix product, computed
+        ``block_size`` rows at a time. Returns the (n x n) matrix, the mean
+        over distinct pairs and, if ``top_k`` is given, the most coherent
+        pairs as (i, j, coherence) tuples sorted by coherence.
+        """
+        z = _stack_waveforms(ripples)
+        n, length = z.shape
+        z -= z.mean(axis=1, keepdims=True)
+        z /= (z.std(axis=1, keepdims=True) + 1e-10) * np.sqrt(length)
+
+        matrix = np.empty((n, n), dtype=z.dtype)
+        candidates = []
+        for start in range(0, n, block_size):
+            block = matrix[start:start + block_size]
+            np.matmul(z[start:start + block_size], z.T, out=block)
+            if top_k:
+                candidates.append(_top_pairs(block, start, top_k))
+
+        pairs = n * (n - 1)
+        mean = (matrix.sum(dtype=np.float64) - np.trace(matrix, dtype=np.float64)) / pairs if pairs else 0.0
+        result = {'matrix': matrix, 'mean': float(mean)}
+        if top_k:
+            merged = np.concatenate(candidates) if candidates else np.empty((0, 3))
+            order = np.argsort(-merged[:, 2], kind='stable')[:top_k]
+            result['top_pairs'] = [(int(i), int(j), float(c)) for i, j, c in merged[order]]
+        return result
     
+    def iter_stft(self, source, sample_rate=None, window=2048, overlap=0.5,
+                  window_fn='hann', detrend=False, chunk_size=1 << 20, dtype=np.float32):
+        """Stream a short-time Fourier transform over a long recording
+
+        ``source`` may be a Ripple, an array (including ``np.memmap``), a
+        ``.npy`` path (memory-mapped) or a raw sample file of ``dtype``. It is
+        read ``chunk_size`` samples at a time, so memory stays constant however
+        long the recording is. Yields ``(frame_start, frames, spectrum)`` per
+        chunk, where ``frames`` are the raw windows and ``spectrum`` their
+        complex rfft after tapering with ``window_fn``.
+        """
+        if isinstance(source, Ripple):
+            sample_rate = source.sample_rate if sample_rate is None else sample_rate
+        if sample_rate is None:
+            raise ValueError("sample_rate is required unless source is a Ripple")
+        hop = max(1, int(round(window * (1 - overlap))))
+        taper = signal.get_window(window_fn, window).astype(np.float32)
+
+        frame_start = 0
+        carry = np.empty(0, dtype=np.float32)
+        for chunk in _iter_chunks(source, chunk_size, dtype):
+            buffer = np.concatenate([carry, np.asarray(chunk, dtype=np.float32)])
+            if len(buffer) < window:
+                carry = buffer
+                continue
+            count = 1 + (len(buffer) - window) // hop
+            frames = np.lib.stride_tricks.sliding_window_view(buffer, window)[::hop][:count]
+            tapered = frames - frames.mean(axis=1, keepdims=True) if detrend else frames
+            yield frame_start, frames, sp_fft.rfft(tapered * taper, axis=-1)
+            frame_start += count
+            carry = buffer[count * hop:]
+
+    @stage_timer('stft')
+    def stft_features(self, source, sample_rate=None, window=2048, overlap=0.5, **kwargs):
+        """Per-window feature series for a long recording
+
+        Returns arrays over windows: time (window centre, seconds),
+        peak_frequency, spectral_centroid and energy (sum of squared samples).
+        Accepts the same sources and options as ``iter_stft``.
+        """
+        sample_rate = source.sample_rate if isinstance(source, Ripple) and sample_rate is None else sample_rate
+        hop = max(1, int(round(window * (1 - overlap))))
+        freqs = np.fft.rfftfreq(window, 1 / sample_rate)
+        parts = []
+        for frame_start, frames, spectrum in self.iter_stft(source, sample_rate, window, overlap, **kwargs):
+            magnitude = np.abs(spectrum)
+            total = magnitude.sum(axis=-1, dtype=np.float64)
+            index = frame_start + np.arange(len(frames))
+            parts.append({
+                'time': (index * hop + window / 2) / sample_rate,
+                'peak_frequency': freqs[magnitude.argmax(axis=-1)],
+                'spectral_centroid': (magnitude @ freqs) / np.where(total > 0, total, 1.0),
+                'energy': np.einsum('ij,ij->i', frames, frames, dtype=np.float64)
+            })
+        keys = ('time', 'peak_frequency', 'spectral_centroid', 'energy')
+        return {key: np.concatenate([p[key] for p in parts]) if parts else np.empty(0) for key in keys}
+
+    @stage_timer('stft')
+    def spectrogram(self, source, sample_rate=None, window=2048, overlap=0.5, **kwargs):
+        """Magnitude spectrogram: returns (times, freqs, magnitude[windows x bins])"""
+        sample_rate = source.sample_rate if isinstance(source, Ripple) and sample_rate is None else sample_rate
+        hop = max(1, int(round(window * (1 - overlap))))
+        blocks = [np.abs(spectrum) for _, _, spectrum in self.iter_stft(source, sample_rate, window, overlap, **kwargs)]
+        magnitude = np.concatenate(blocks) if blocks else np.empty((0, window // 2 + 1), dtype=np.float32)
+        times = (np.arange(len(magnitude)) * hop + window / 2) / sample_rate
+        return times, np.fft.rfftfreq(window, 1 / sample_rate), magnitude
+
+    @stage_timer('welch')
+    def welch_psd(self, source, sample_rate=None, window=2048, overlap=0.5, window_fn='hann', **kwargs):
+        """Welch power spectral density accumulated chunk by chunk
+
+        Matches ``scipy.signal.welch`` (constant detrend, density scaling,
+        one-sided) but never holds more than one chunk of the recording.
+        Returns (freqs, psd).
+        """
+        sample_rate = source.sample_rate if isinstance(source, Ripple) and sample_rate is None else sample_rate
+        taper = signal.get_window(window_fn, window)
+        power = np.zeros(window // 2 + 1)
+        count = 0
+        for _, frames, spectrum in self.iter_stft(source, sample_rate, window, overlap,
+                                                  window_fn=window_fn, detrend=True, **kwargs):
+            power += (np.abs(spectrum) ** 2).sum(axis=0, dtype=np.float64)
+            count += len(frames)
+        psd = power / (max(count, 1) * sample_rate * (taper ** 2).sum())
+        psd[1:(window + 1) // 2] *= 2
+        return np.fft.rfftfreq(window, 1 / sample_rate), psd
+
+    @stage_timer('resonance')
     def resonance_analysis(self, ripple, cavity_frequency):
         """Analyze resonance in a cavity"""
         freq_ratio = ripple['frequency'] / cavity_frequency
@@ -109,6 +599,27 @@ class RippleLab:
         
         return resonance
 
+def benchmark_spectra(n_ripples=2000, duration=0.1, sample_rate=44100):
+    """Compare analyze_spectra against looping analyze_spectrum"""
+    lab = RippleLab()
+    rng = np.random.default_rng(0)
+    ripples = [lab.create_ripple(frequency=f, amplitude=a, duration=duration, sample_rate=sample_rate)
+               for f, a in zip(rng.uniform(100, 4000, n_ripples), rng.uniform(0.1, 1.0, n_ripples))]
+    stack = np.stack([r['waveform'] for r in ripples])
+
+    start = time.perf_counter()
+    looped = [lab.analyze_spectrum(r) for r in ripples]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = lab.analyze_spectra(stack, sample_rate=sample_rate)
+    batch_time = time.perf_counter() - start
+
+    assert np.allclose([r['peak_frequency'] for r in looped], batched['peak_frequency'])
+    print(f"{n_ripples} ripples x {stack.shape[1]} samples")
+    print(f"  looped analyze_spectrum: {loop_time:.3f}s")
+    print(f"  analyze_spectra:         {batch_time:.3f}s ({loop_time / batch_time:.1f}x faster)")
+
 def main():
     """Main execution"""
     print("=== Ripple Lab ===\n")
@@ -154,4 +665,7 @@ def main():
     print("\n=== Lab Analysis Complete ===")
 
 if __name__ == '__main__':
-    main()
+    if '--benchmark' in sys.argv:
+        benchmark_spectra()
+    else:
+        main()
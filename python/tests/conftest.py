@@ -0,0 +1,39 @@
+"""
+Shared setup for the python/ tool tests
+The tools and the Blender stroke geometry are scripts rather than packages,
+and some file names have hyphens, so their folders are put on sys.path here
+and hyphenated scripts are loaded by file path.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+for path in (ROOT / 'python-engine', ROOT / 'python' / 'egn-training', ROOT / 'blender'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+def _load(name, path):
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+@pytest.fixture(scope='session')
+def incubator_core():
+    return _load('incubator_core', ROOT / 'python' / 'pattern-incubator' / 'incubator-core.py')
+
+@pytest.fixture(scope='session')
+def ripple_lab():
+    return _load('ripple_lab', ROOT / 'python' / 'ripple-lab' / 'ripple-lab.py')
+
+@pytest.fixture(scope='session')
+def solar_timeseries():
+    # Not put on sys.path: the dashboard's app.py would shadow the engine's app package.
+    return _load('solar_timeseries', ROOT / 'python' / 'dash-solar-estate' / 'timeseries.py')
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import egn_solver as solver
+
+def _brute_force(positions, q):
+    """Reference O(n^2) field, one pair at a time"""
+    field = np.zeros((len(positions), 3))
+    for i in range(len(positions)):
+        for j in range(len(positions)):
+            if i != j:
+                delta = positions[j] - positions[i]
+                dist = max(np.linalg.norm(delta), solver.MIN_DISTANCE)
+                field[i] += q[j] * delta / dist**3
+    return field
+
+def _relative_l2(approx, exact):
+    return np.linalg.norm(approx - exact) / np.linalg.norm(exact)
+
+def test_methods_match_brute_force():
+    nodes = solver.random_nodes(200, seed=1)
+    positions, q = nodes['position'], solver.charges(nodes)
+    exact = _brute_force(positions, q)
+
+    np.testing.assert_allclose(solver.compute_field(positions, q, 'direct'), exact, rtol=1e-9, atol=1e-12)
+    # theta=0 never accepts a cell, so Barnes-Hut degenerates to the exact sum
+    np.testing.assert_allclose(solver.compute_field(positions, q, theta=0.0, leaf_size=4), exact,
+                               rtol=1e-9, atol=1e-12)
+    assert _relative_l2(solver.compute_field(positions, q, theta=0.5, leaf_size=4), exact) < 0.02
+    # a cutoff wider than the whole set keeps every pair
+    extent = np.ptp(positions, axis=0).max()
+    np.testing.assert_allclose(solver.compute_field(positions, q, 'cutoff', cutoff=2 * extent), exact,
+                               rtol=1e-9, atol=1e-12)
+
+def test_error_report_matches_brute_force_error():
+    nodes = solver.random_nodes(300, seed=2)
+    report = solver.error_report(nodes, theta=0.5, leaf_size=4, sample=1000)
+    field = solver.compute_field(nodes['position'], solver.charges(nodes), theta=0.5, leaf_size=4)
+    exact = _brute_force(nodes['position'], solver.charges(nodes))
+    assert report['sampled'] == 300
+    assert report['relative_l2'] == pytest.approx(_relative_l2(field, exact))
+
+def test_single_node_feels_no_field():
+    positions, q = np.array([[1.0, -2.0, 3.0]]), np.array([0.7])
+    for method in solver.METHODS:
+        np.testing.assert_array_equal(solver.compute_field(positions, q, method, cutoff=1.0), np.zeros((1, 3)))
+
+def test_coincident_nodes():
+    rng = np.random.default_rng(3)
+    positions = np.vstack([np.zeros((20, 3)), np.full((20, 3), 5.0), rng.normal(0, 1, (10, 3))])
+    q = rng.uniform(0.1, 1, len(positions))
+    exact = _brute_force(positions, q)
+    for method in solver.METHODS:
+        field = solver.compute_field(positions, q, method, theta=0.0, cutoff=100.0, leaf_size=4)
+        assert np.isfinite(field).all()
+        np.testing.assert_allclose(field, exact, rtol=1e-9, atol=1e-9)
+
+def test_empty_node_set():
+    positions, q = np.zeros((0, 3)), np.zeros(0)
+    for method in solver.METHODS:
+        assert solver.compute_field(positions, q, method, cutoff=1.0).shape == (0, 3)
+    forces, accelerations = solver.compute_forces(solver.random_nodes(0))
+    assert forces.shape == accelerations.shape == (0, 3)
+    assert solver.error_report(solver.random_nodes(0))['sampled'] == 0
+    with pytest.raises(ValueError):
+        solver.Octree(positions, q)
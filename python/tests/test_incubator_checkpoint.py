@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+def _incubator(incubator_core, n=20, missing=float('nan')):
+    incubator = incubator_core.PatternIncubator(seed=1)
+    incubator.load_patterns([
+        {'id': f'p{i}', 'template': 'wave' if i % 2 else None, 'frequency': 100.0 + i,
+         'magnitude': 0.5, 'phase': 0.1 * i, 'coherence': missing if i == 3 else 0.9}
+        for i in range(n)
+    ])
+    incubator.train(iterations=30)
+    incubator.generate_patterns(['a', 'b'], 3)
+    return incubator
+
+def _assert_same_tables(a, b):
+    for name in ('patterns', 'learned_patterns', 'training_history'):
+        left, right = getattr(a, name), getattr(b, name)
+        assert len(left) == len(right)
+        for column in left.SCHEMA:
+            np.testing.assert_array_equal(left.column(column), right.column(column))
+        assert left.strings == right.strings
+
+def test_save_load_round_trip(incubator_core, tmp_path):
+    saved = _incubator(incubator_core)
+    saved.save_checkpoint(tmp_path / 'ck')
+    loaded = incubator_core.PatternIncubator()
+    manifest = loaded.load_checkpoint(tmp_path / 'ck')
+    _assert_same_tables(saved, loaded)
+    assert manifest['model_version'] == saved.model_version
+    assert loaded.patterns[1] == saved.patterns[1]
+
+def test_incremental_saves_append(incubator_core, tmp_path):
+    incubator = _incubator(incubator_core)
+    incubator.save_checkpoint(tmp_path / 'ck')
+    incubator.generate_patterns(['c'], 4)
+    incubator.train(iterations=5)
+    manifest = incubator.save_checkpoint(tmp_path / 'ck')
+    assert manifest['tables']['learned_patterns']['start'] == 0
+    assert manifest['tables']['learned_patterns']['rows'] == 10
+
+    loaded = incubator_core.PatternIncubator()
+    loaded.load_checkpoint(tmp_path / 'ck')
+    _assert_same_tables(incubator, loaded)
+
+    loaded.generate_patterns(['d'], 1)
+    loaded.save_checkpoint(tmp_path / 'ck')
+    reloaded = incubator_core.PatternIncubator()
+    reloaded.load_checkpoint(tmp_path / 'ck')
+    _assert_same_tables(loaded, reloaded)
+
+def test_new_store_continues_existing_checkpoint(incubator_core, tmp_path):
+    first = _incubator(incubator_core)
+    first.save_checkpoint(tmp_path / 'ck')
+
+    # A fresh process with the same patterns plus one more appends to them.
+    second = incubator_core.PatternIncubator()
+    second.load_patterns(first.patterns.to_records() + [{'id': 'extra', 'frequency': 1.0}])
+    manifest = second.save_checkpoint(tmp_path / 'ck')
+    assert manifest['tables']['patterns']['start'] == 0
+    assert manifest['tables']['patterns']['rows'] == len(first.patterns) + 1
+
+    loaded = incubator_core.PatternIncubator()
+    loaded.load_checkpoint(tmp_path / 'ck')
+    _assert_same_tables(second, loaded)
+
+def test_replaced_tables_are_rewritten(incubator_core, tmp_path):
+    incubator = _incubator(incubator_core)
+    incubator.save_checkpoint(tmp_path / 'ck')
+    incubator.load_patterns([{'id': 'only', 'frequency': 5.0}])
+    incubator.save_checkpoint(tmp_path / 'ck')
+    loaded = incubator_core.PatternIncubator()
+    loaded.load_checkpoint(tmp_path / 'ck')
+    assert [record['id'] for record in loaded.patterns] == ['only']
+
+def test_saved_rows_cannot_be_edited_through_columns(incubator_core, tmp_path):
+    incubator = _incubator(incubator_core)
+    incubator.save_checkpoint(tmp_path / 'ck')
+    with pytest.raises(ValueError):
+        incubator.patterns.column('frequency')[0] = 0.0
+
+def test_edited_rows_are_checkpointed(incubator_core, tmp_path):
+    incubator = _incubator(incubator_core)
+    incubator.save_checkpoint(tmp_path / 'ck')
+    incubator.patterns[2]['coherence'] = 0.1
+    incubator.patterns[2]['note'] = 'edited'
+    manifest = incubator.save_checkpoint(tmp_path / 'ck')
+    assert manifest['tables']['patterns']['start'] == 20
+
+    loaded = incubator_core.PatternIncubator()
+    loaded.load_checkpoint(tmp_path / 'ck')
+    _assert_same_tables(incubator, loaded)
+    assert loaded.patterns[2]['coherence'] == 0.1 and loaded.patterns[2]['note'] == 'edited'
+
+    # Editing rows of a resumed (memory-mapped) table leaves the files alone until saved.
+    loaded.patterns[0]['frequency'] = -1.0
+    assert incubator_core.PatternIncubator().load_checkpoint(tmp_path / 'ck')['tables'] == manifest['tables']
+    loaded.save_checkpoint(tmp_path / 'ck')
+    reloaded = incubator_core.PatternIncubator()
+    reloaded.load_checkpoint(tmp_path / 'ck')
+    assert reloaded.patterns[0]['frequency'] == -1.0
+
+def test_edits_to_unsaved_rows_still_append(incubator_core, tmp_path):
+    incubator = _incubator(incubator_core)
+    incubator.save_checkpoint(tmp_path / 'ck')
+    incubator.patterns.append({'id': 'new', 'frequency': 1.0})
+    incubator.patterns[-1]['coherence'] = 0.5
+    manifest = incubator.save_checkpoint(tmp_path / 'ck')
+    assert manifest['tables']['patterns']['start'] == 0
+    assert manifest['tables']['patterns']['rows'] == 21
+
+def test_load_drops_stale_index(incubator_core, tmp_path):
+    _incubator(incubator_core, missing=0.0).save_checkpoint(tmp_path / 'ck')
+    incubator = incubator_core.PatternIncubator()
+    incubator.load_patterns([{'id': 'x', 'frequency': 1.0, 'magnitude': 1.0, 'phase': 0.0, 'coherence': 1.0}])
+    incubator.build_index()
+    incubator.load_checkpoint(tmp_path / 'ck')
+    assert incubator.index is None
+    assert len(incubator.nearest(np.array([100.0, 0.5, 0.0, 0.9]), k=1)[1]) == 1
+    assert len(incubator.index) == len(incubator.patterns) + len(incubator.learned_patterns)
+
+def _first_half(incubator):
+    incubator.load_patterns([{'id': 'p', 'frequency': 1.0}])
+    incubator.train(iterations=30)
+    incubator.generate_patterns(['a', 'b'], 5)
+
+def _second_half(incubator):
+    incubator.generate_patterns(['c'], 4)
+    incubator.train(iterations=20)
+
+def test_resumed_run_matches_uninterrupted_run(incubator_core, tmp_path):
+    uninterrupted = incubator_core.PatternIncubator(seed=11)
+    _first_half(uninterrupted)
+    _second_half(uninterrupted)
+
+    interrupted = incubator_core.PatternIncubator(seed=11)
+    _first_half(interrupted)
+    interrupted.save_checkpoint(tmp_path / 'ck')
+    interrupted.generate_patterns(['lost'], 3)  # work after the checkpoint is discarded
+    resumed = incubator_core.PatternIncubator(seed=99)
+    resumed.load_checkpoint(tmp_path / 'ck')
+    _second_half(resumed)
+
+    for name in ('learned_patterns', 'training_history'):
+        table, expected = getattr(resumed, name), getattr(uninterrupted, name)
+        for column, dtype in table.SCHEMA.items():
+            if np.dtype(incubator_core._storage_dtype(dtype)).kind != 'M':
+                np.testing.assert_array_equal(table.column(column), expected.column(column))
+    assert resumed.learned_patterns.strings == uninterrupted.learned_patterns.strings
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from nob_common import FeatureScaler
+
+CENTRES = np.array([[200.0, 0.5, 1.0, 0.2], [600.0, 1.5, 3.0, 0.5], [1000.0, 1.0, 5.0, 0.9]])
+
+def _blobs(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    truth = np.repeat(np.arange(len(CENTRES)), n)
+    X = CENTRES[truth] + rng.normal(scale=[10.0, 0.05, 0.1, 0.02], size=(len(truth), 4))
+    return X, truth
+
+def _reference_lloyd(Z, centroids, max_iter=100):
+    # Textbook k-means: assign by full distance matrix, recompute means, repeat until stable.
+    labels = None
+    for _ in range(max_iter):
+        distances = ((Z[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        updated = distances.argmin(axis=1)
+        if labels is not None and (updated == labels).all():
+            break
+        labels = updated
+        centroids = np.array([Z[labels == c].mean(axis=0) for c in range(len(centroids))])
+    return labels, centroids, float(((Z - centroids[labels]) ** 2).sum())
+
+def test_cluster_patterns_matches_reference_kmeans(incubator_core):
+    X, truth = _blobs()
+    result = incubator_core.PatternIncubator().cluster_patterns(k=3, seed=5, features=X)
+
+    scaler = FeatureScaler(X)
+    Z = scaler.embed(X)
+    init = incubator_core._kmeans_plus_plus(Z, 3, np.random.default_rng(5))
+    labels, centroids, inertia = _reference_lloyd(Z, init)
+    np.testing.assert_array_equal(result['labels'], labels)
+    np.testing.assert_allclose(result['centroids'], scaler.restore(centroids), rtol=1e-9)
+    assert result['inertia'] == pytest.approx(inertia, rel=1e-9)
+
+    # The blobs are far apart, so each cluster is exactly one blob.
+    for c in range(3):
+        assert len(set(truth[result['labels'] == c])) == 1
+    order = np.argsort(result['centroids'][:, 0])
+    np.testing.assert_allclose(result['centroids'][order], CENTRES, rtol=0.05)
+
+def test_phase_wraps_around(incubator_core):
+    X = np.array([[440.0, 1.0, phase, 0.5] for phase in (0.05, 2 * np.pi - 0.05, 0.1, np.pi, np.pi + 0.1)])
+    labels = incubator_core.PatternIncubator().cluster_patterns(k=2, seed=0, features=X)['labels']
+    assert labels[0] == labels[1] == labels[2] != labels[3] == labels[4]
+
+def test_clustering_is_seeded_and_uses_loaded_patterns(incubator_core):
+    X, _ = _blobs(seed=1)
+    incubator = incubator_core.PatternIncubator()
+    incubator.load_patterns([dict(zip(incubator_core.FEATURE_NAMES, row)) for row in X.tolist()])
+    first = incubator.cluster_patterns(k=4, seed=9)
+    second = incubator.cluster_patterns(k=4, seed=9, features=X)
+    np.testing.assert_array_equal(first['labels'], second['labels'])
+    np.testing.assert_array_equal(first['centroids'], second['centroids'])
+    with pytest.raises(ValueError):
+        incubator.cluster_patterns(k=len(X) + 1)
+
+def test_minibatch_finds_the_blobs(incubator_core):
+    X, _ = _blobs(n=500, seed=2)
+    batches = np.array_split(np.random.default_rng(3).permutation(X), 20)
+    result = incubator_core.PatternIncubator().cluster_patterns_minibatch(batches, k=3, seed=4)
+    assert result['counts'].sum() == len(X)
+    order = np.argsort(result['centroids'][:, 0])
+    np.testing.assert_allclose(result['centroids'][order], CENTRES, rtol=0.05)
+    assert sorted(result['counts'].tolist()) == [500, 500, 500]
+
+def test_parallel_training_spawns_workers_and_matches_inline(incubator_core, monkeypatch):
+    contexts = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        # Records the start method; threads stand in for the spawned processes,
+        # which could not re-import this test-loaded module by name.
+        def __init__(self, max_workers, mp_context):
+            contexts.append(mp_context.get_start_method())
+            super().__init__(max_workers)
+
+    monkeypatch.setattr(incubator_core, 'TRAIN_CHUNK', 7)
+    monkeypatch.setattr(incubator_core, 'ProcessPoolExecutor', RecordingPool)
+    inline = incubator_core.PatternIncubator(seed=3).train(iterations=50)
+    parallel = incubator_core.PatternIncubator(seed=3).train(iterations=50, workers=3)
+    assert contexts == ['spawn']
+    np.testing.assert_array_equal(inline.column('loss'), parallel.column('loss'))
@@ -0,0 +1,60 @@
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+RECORDS = [
+    {'id': 'a', 'frequency': 440.0, 'magnitude': 1.0, 'phase': 0.5, 'coherence': 0.9,
+     'source': 'codex', 'tags': ['x', 'y'], 'extra': 1},
+    {'id': 'b', 'frequency': 528.0},
+]
+
+def test_unknown_keys_are_kept(incubator_core, tmp_path):
+    table = incubator_core.PatternTable.from_records(RECORDS)
+    assert table[0]['source'] == 'codex' and table[0]['tags'] == ['x', 'y'] and table[0]['extra'] == 1
+    assert table[1] == {'id': 'b', 'frequency': 528.0, 'magnitude': 0.0, 'phase': 0.0, 'coherence': 0.0}
+    assert table.features().shape == (2, 4)
+
+    table.save_binary(tmp_path / 'patterns.npz')
+    assert incubator_core.PatternTable.load(tmp_path / 'patterns.npz').to_records() == table.to_records()
+
+    (tmp_path / 'patterns.csv').write_text('id,frequency,source\nc,1.5,lab\n')
+    assert incubator_core.PatternTable.load(tmp_path / 'patterns.csv')[0]['source'] == 'lab'
+
+def test_item_assignment_writes_back(incubator_core):
+    table = incubator_core.PatternTable.from_records(RECORDS)
+    table[1]['coherence'] = 0.25
+    table[-1]['note'] = 'checked'
+    assert table.column('coherence').tolist() == [0.9, 0.25]
+    assert table[1]['note'] == 'checked'
+
+    row = table[0]
+    del row['source']
+    row.update(id='a2', magnitude=2.0)
+    assert 'source' not in table[0]
+    assert table[0]['id'] == 'a2' and table[0]['magnitude'] == 2.0
+
+    table[0] = {'id': 'z', 'frequency': 1.0}
+    assert table[0] == {'id': 'z', 'frequency': 1.0, 'magnitude': 0.0, 'phase': 0.0, 'coherence': 0.0}
+    assert table.edits == 5
+    with pytest.raises(IndexError):
+        table[2] = {}
+    with pytest.raises(ValueError):
+        table.column('frequency')[0] = 0.0
+
+def test_rows_behave_as_plain_dicts(incubator_core):
+    row = incubator_core.PatternTable.from_records(RECORDS)[0]
+    assert json.loads(json.dumps(row)) == dict(row)
+    assert type(pickle.loads(pickle.dumps(row))) is dict
+    assert type(incubator_core.PatternTable.from_records(RECORDS).to_records()[0]) is dict
+
+def test_edits_invalidate_the_index(incubator_core):
+    pytest.importorskip('scipy')
+    incubator = incubator_core.PatternIncubator()
+    incubator.load_patterns([{'id': str(i), 'frequency': 100.0 * (i + 1), 'magnitude': 1.0, 'phase': 0.0,
+                              'coherence': 0.5} for i in range(5)])
+    query = np.array([480.0, 1.0, 0.0, 0.5])
+    assert incubator.nearest(query, k=1)[1].tolist() == [4]
+    incubator.patterns[0]['frequency'] = 479.0
+    assert incubator.nearest(query, k=1)[1].tolist() == [0]
@@ -0,0 +1,250 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from app.analysis import spectrum
+
+
+@pytest.mark.parametrize('n', [4, 5, 64, 101])
+def test_engine_spectrum_matches_ripple_lab(ripple_lab, n):
+    rng = np.random.default_rng(n)
+    waveform = rng.normal(size=n)
+    expected = ripple_lab.RippleLab().analyze_spectra(waveform[None, :], sample_rate=8.0)
+    metrics, _ = spectrum(waveform, 8.0)
+    for key in ripple_lab.SPECTRUM_KEYS:
+        assert metrics[key] == pytest.approx(expected[key][0], rel=1e-9)
+
+def test_harmonic_energy_example(ripple_lab):
+    waveform = np.array([0.0, 1.0, 0.0, -1.0])
+    expected = ripple_lab.RippleLab().analyze_spectra(waveform[None, :], sample_rate=4.0)
+    assert expected['harmonic_energy'][0] == pytest.approx(4.0)
+    assert spectrum(waveform, 4.0)[0]['harmonic_energy'] == pytest.approx(4.0)
+
+def test_ripple_generates_full_length_lazily(ripple_lab):
+    ripple = ripple_lab.RippleLab().create_ripple(frequency=5, amplitude=2.0, duration=1.5, sample_rate=100)
+    waveform = ripple['waveform']
+    assert waveform.dtype == np.float32 and waveform.shape == (150,)
+    n = np.arange(150)
+    np.testing.assert_allclose(waveform, 2.0 * np.sin(2 * np.pi * 5 * n / 100), atol=1e-5)
+    chunks = list(ripple.chunks(64))
+    assert [len(chunk) for chunk in chunks] == [64, 64, 22]
+    np.testing.assert_array_equal(np.concatenate(chunks), waveform)
+    assert len(ripple.to_dict(max_samples=10)['waveform']) == 10
+    assert ripple['sample_rate'] == 100 and set(ripple) == set(ripple_lab.Ripple.KEYS)
+
+def test_ripple_samples_stay_accurate_deep_into_long_ripples(ripple_lab):
+    # A day at 192 kHz is ~1.7e10 samples; only the requested slice is generated.
+    ripple = ripple_lab.Ripple(frequency=1000.5, duration=86400, sample_rate=192000)
+    assert ripple.num_samples == 86400 * 192000
+    start = ripple.num_samples - 100
+    tail = ripple.samples(start, start + 1000)
+    assert tail.dtype == np.float32 and tail.shape == (100,)
+    # Exact phase from integers: 1000.5 / 192000 == 2001 / 384000.
+    n = np.arange(start, ripple.num_samples, dtype=np.int64)
+    expected = np.sin(2 * np.pi * ((2001 * n) % 384000) / 384000)
+    np.testing.assert_allclose(tail, expected, atol=1e-6)
+    assert ripple_lab.Ripple(dtype=np.float64, duration=0.01)['waveform'].dtype == np.float64
+
+def _baseline_spectrum(waveform, sample_rate):
+    # The original per-ripple analyze_spectrum (full complex FFT); the centroid
+    # is taken over the one-sided spectrum, as analyze_spectra documents.
+    waveform = np.asarray(waveform, dtype=np.float64)
+    magnitude = np.abs(np.fft.fft(waveform))
+    freqs = np.fft.fftfreq(len(waveform), 1 / sample_rate)
+    half = len(waveform) // 2 + 1
+    return {
+        'peak_frequency': abs(freqs[np.argmax(magnitude)]),
+        'peak_magnitude': np.max(magnitude),
+        'harmonic_energy': np.sum(magnitude) ** 2 / len(magnitude),
+        'spectral_centroid': np.average(np.abs(freqs[:half]), weights=magnitude[:half])
+    }
+
+def test_analyze_spectra_matches_baseline_formula(ripple_lab):
+    lab = ripple_lab.RippleLab()
+    rng = np.random.default_rng(8)
+    ripples = [lab.create_ripple(frequency=f, amplitude=a, duration=d, sample_rate=r, dtype=np.float64)
+               for f, a, d, r in [(50, 1.0, 0.5, 400), (120, 0.5, 0.5, 400), (7, 2.0, 1.0, 101), (30, 1.0, 0.5, 400)]]
+    ripples.append({'waveform': rng.normal(size=333), 'sample_rate': 1000})
+
+    batched = lab.analyze_spectra(ripples, chunk_size=2)
+    for i, ripple in enumerate(ripples):
+        expected = _baseline_spectrum(ripple['waveform'], ripple['sample_rate'])
+        single = lab.analyze_spectrum(ripple)
+        for key, value in expected.items():
+            assert batched[key][i] == pytest.approx(value, rel=1e-6)
+            assert single[key] == pytest.approx(value, rel=1e-6)
+
+def test_analyze_spectra_array_input_is_chunked(ripple_lab):
+    lab = ripple_lab.RippleLab()
+    stack = np.random.default_rng(9).normal(size=(7, 64))
+    batched = lab.analyze_spectra(stack, sample_rate=64.0, chunk_size=3)
+    whole = lab.analyze_spectra(stack, sample_rate=64.0, chunk_size=100)
+    for key in ripple_lab.SPECTRUM_KEYS:
+        assert batched[key].shape == (7,)
+        np.testing.assert_allclose(batched[key], whole[key])
+        np.testing.assert_allclose(
+            batched[key], [_baseline_spectrum(row, 64.0)[key] for row in stack], rtol=1e-6
+        )
+    with pytest.raises(ValueError):
+        lab.analyze_spectra(stack)
+
+def _ripple_list(rng, n, lengths=(40, 64)):
+    return [{'waveform': rng.normal(size=rng.choice(lengths)), 'sample_rate': 64.0} for _ in range(n)]
+
+def _brute_force_coherence(ripples):
+    # The original measure_coherence pair loop.
+    waveforms = [np.asarray(r['waveform'], dtype=np.float64) for r in ripples]
+    length = max(len(w) for w in waveforms)
+    padded = [np.pad(w, (0, length - len(w))) for w in waveforms]
+    normalised = [(w - w.mean()) / (w.std() + 1e-10) for w in padded]
+    return {(i, j): float(np.mean(normalised[i] * normalised[j]))
+            for i in range(len(ripples)) for j in range(i + 1, len(ripples))}
+
+def test_coherence_matrix_matches_pairwise_loop(ripple_lab):
+    lab = ripple_lab.RippleLab()
+    ripples = _ripple_list(np.random.default_rng(9), 23)
+    expected = _brute_force_coherence(ripples)
+    result = lab.coherence_matrix(ripples, top_k=5, block_size=4)
+
+    matrix = result['matrix']
+    for (i, j), value in expected.items():
+        assert matrix[i, j] == pytest.approx(value, abs=1e-5)
+        assert matrix[j, i] == pytest.approx(value, abs=1e-5)
+    assert result['mean'] == pytest.approx(np.mean(list(expected.values())), abs=1e-6)
+    assert lab.measure_coherence(ripples) == pytest.approx(result['mean'])
+
+    ranked = sorted(expected, key=expected.get, reverse=True)[:5]
+    assert [(i, j) for i, j, _ in result['top_pairs']] == ranked
+    for i, j, value in result['top_pairs']:
+        assert value == pytest.approx(expected[i, j], abs=1e-5)
+
+def test_top_pairs_of_offset_block_matches_brute_force(ripple_lab):
+    block = np.random.default_rng(10).normal(size=(3, 8))
+    upper = [(r + 2, c, block[r, c]) for r in range(3) for c in range(8) if c > r + 2]
+    for k in (1, 4, 50):
+        pairs = ripple_lab._top_pairs(block, 2, k)
+        expected = sorted(upper, key=lambda pair: -pair[2])[:k]
+        assert sorted(map(tuple, pairs.tolist())) == sorted(expected)
+
+def test_interference_pairs_match_pairwise_loop(ripple_lab):
+    lab = ripple_lab.RippleLab()
+    rng = np.random.default_rng(11)
+    ripples = _ripple_list(rng, 9, lengths=(30, 50))
+    for ripple in ripples:
+        ripple['frequency'] = float(rng.uniform(1, 20))
+    # Tiles of two rows force many partial (and diagonal) tiles.
+    pairs = lab.interference_pairs(ripples, max_elements=400)
+    assert len(pairs) == 9 * 8 // 2
+
+    waves = ripple_lab._stack_waveforms(ripples).astype(np.float64)
+    length = waves.shape[1]
+    for pair in pairs:
+        i, j = int(pair['i']), int(pair['j'])
+        wi, wj = waves[i], waves[j]
+        amplitude = (wi + wj).max() / (wi.max() + wj.max())
+        lag = int(np.argmax(np.correlate(wj, wi, mode='full'))) - (length - 1)
+        mean_frequency = (ripples[i]['frequency'] + ripples[j]['frequency']) / 2
+        phase = np.angle(np.exp(2j * np.pi * mean_frequency * lag / 64.0))
+        assert pair['amplitude_increase'] == pytest.approx(amplitude, rel=1e-5)
+        assert pair['constructive'] == (amplitude > 0.9)
+        assert pair['beat_frequency'] == pytest.approx(abs(ripples[i]['frequency'] - ripples[j]['frequency']))
+        assert pair['lag_seconds'] == pytest.approx(lag / 64.0)
+        assert pair['phase_lag'] == pytest.approx(phase)
+    expected_pairs = [(i, j) for i in range(9) for j in range(i + 1, 9)]
+    assert sorted(zip(pairs['i'].tolist(), pairs['j'].tolist())) == expected_pairs
+
+def test_detect_interference_finds_real_lag(ripple_lab):
+    lab = ripple_lab.RippleLab()
+    base = np.random.default_rng(12).normal(size=200)
+    first = {'waveform': base, 'sample_rate': 100.0, 'frequency': 10.0}
+    second = {'waveform': np.concatenate([np.zeros(7), base[:-7]]), 'sample_rate': 100.0, 'frequency': 12.0}
+    result = lab.detect_interference(first, second)
+    assert result['lag_seconds'] == pytest.approx(0.07)
+    assert result['beat_frequency'] == pytest.approx(2.0)
+    assert result['phase_difference'] == pytest.approx(np.angle(np.exp(2j * np.pi * 11.0 * 0.07)))
+
+@pytest.mark.parametrize('chunk_size', [37, 500, 1 << 20])
+def test_welch_psd_matches_scipy(ripple_lab, chunk_size):
+    x = np.random.default_rng(13).normal(size=3001).astype(np.float32)
+    freqs, psd = ripple_lab.RippleLab().welch_psd(x, sample_rate=250.0, window=128, overlap=0.75, chunk_size=chunk_size)
+    expected_freqs, expected = signal.welch(x.astype(np.float64), fs=250.0, window='hann', nperseg=128, noverlap=96)
+    np.testing.assert_allclose(freqs, expected_freqs)
+    np.testing.assert_allclose(psd, expected, rtol=1e-4, atol=1e-9)
+
+@pytest.mark.parametrize('window,overlap', [(64, 0.5), (100, 0.0), (50, 0.9)])
+def test_stft_frame_counts_and_features(ripple_lab, window, overlap):
+    lab = ripple_lab.RippleLab()
+    x = np.random.default_rng(14).normal(size=2000).astype(np.float32)
+    hop = max(1, int(round(window * (1 - overlap))))
+    count = 1 + (len(x) - window) // hop
+    starts = np.arange(count) * hop
+
+    stft = list(lab.iter_stft(x, 100.0, window, overlap, chunk_size=333))
+    seen = 0
+    for frame_start, frames, _ in stft:
+        assert frame_start == seen
+        seen += len(frames)
+    frames = np.concatenate([f for _, f, _ in stft])
+    np.testing.assert_array_equal(frames, np.stack([x[s:s + window] for s in starts]))
+
+    features = lab.stft_features(x, 100.0, window, overlap, chunk_size=333)
+    assert all(len(values) == count for values in features.values())
+    np.testing.assert_allclose(features['time'], (starts + window / 2) / 100.0)
+    np.testing.assert_allclose(features['energy'], (frames.astype(np.float64) ** 2).sum(axis=1), rtol=1e-5)
+    magnitude = np.abs(np.fft.rfft(frames * signal.get_window('hann', window), axis=1))
+    np.testing.assert_allclose(features['peak_frequency'], np.fft.rfftfreq(window, 0.01)[magnitude.argmax(axis=1)])
+
+    times, _, spectrogram = lab.spectrogram(x, 100.0, window, overlap, chunk_size=333)
+    assert spectrogram.shape == (count, window // 2 + 1)
+    np.testing.assert_allclose(times, features['time'])
+
+def test_stft_reads_files_and_ripples(ripple_lab, tmp_path):
+    lab = ripple_lab.RippleLab()
+    ripple = lab.create_ripple(frequency=30, duration=2.0, sample_rate=200)
+    x = ripple['waveform']
+    x.tofile(tmp_path / 'raw.f32')
+    np.save(tmp_path / 'x.npy', x)
+    expected = lab.stft_features(x, 200.0, window=64)
+    for source in (ripple, tmp_path / 'raw.f32', str(tmp_path / 'x.npy')):
+        features = lab.stft_features(source, None if source is ripple else 200.0, window=64, chunk_size=100)
+        for key, values in expected.items():
+            np.testing.assert_allclose(features[key], values, rtol=1e-6)
+    np.testing.assert_allclose(expected['peak_frequency'], 30.0, atol=200 / 64)
+    (tmp_path / 'empty.f32').touch()
+    assert lab.stft_features(tmp_path / 'empty.f32', 200.0, window=64)['time'].size == 0
+
+def test_experiment_store_round_trip(ripple_lab, tmp_path):
+    lab = ripple_lab.RippleLab(tmp_path / 'store')
+    ripples = [lab.create_ripple(frequency=f, duration=0.1, sample_rate=1000) for f in (50, 120)]
+    for ripple in ripples:
+        lab.record_experiment(ripple, results=lab.analyze_spectrum(ripple))
+    lab.record_experiment({'waveform': np.arange(5, dtype=np.int16)}, store_spectrum=False)
+    lab.record_experiment({'waveform': np.empty(0)}, results={'note': 'empty'})
+
+    reopened = ripple_lab.RippleLab(tmp_path / 'store')
+    assert len(reopened.experiments) == 4
+    assert reopened.results == lab.results
+    for ripple, experiment in zip(ripples, reopened.experiments):
+        np.testing.assert_array_equal(experiment['waveform'], ripple['waveform'])
+        np.testing.assert_allclose(experiment['spectrum'], np.abs(np.fft.rfft(ripple['waveform'])), rtol=1e-5, atol=1e-4)
+        assert experiment['frequency'] == ripple['frequency']
+        assert experiment['results']['peak_frequency'] == ripple['frequency']
+    assert reopened.experiments[2]['waveform'].dtype == np.int16
+    assert reopened.experiments[2]['spectrum'] is None
+    assert reopened.experiments[3]['waveform'].shape == reopened.experiments[3]['spectrum'].shape == (0,)
+
+def test_experiment_store_interleaved_writers(ripple_lab, tmp_path):
+    first = ripple_lab.ExperimentStore(tmp_path)
+    second = ripple_lab.ExperimentStore(tmp_path)
+    ids = []
+    for k in range(6):
+        store = first if k % 2 else second
+        ids.append(store.append(np.full(k + 3, k, dtype=np.float32), parameters={'k': k}))
+    first.refresh()
+    second.refresh()
+    assert first.ids() == second.ids() == ids
+    for k, run_id in enumerate(ids):
+        assert first.get(run_id)['k'] == k
+        np.testing.assert_array_equal(first.waveform(run_id), np.full(k + 3, k))
+        assert first.get(run_id).entry['waveform']['offset'] % ripple_lab.ExperimentStore.ALIGNMENT == 0
+    assert len(ripple_lab.ExperimentStore(tmp_path)) == 6
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+def _series(n=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.date_range('2025-01-01', periods=n, freq='min'),
+        'power_output': np.cumsum(rng.normal(0, 1, n))
+    })
+
+def _lttb_reference(x, y, n_out):
+    """Textbook LTTB, one bucket at a time"""
+    n = len(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected, previous = [0], 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < n_out - 1:
+            nxt = slice(edges[bucket + 1], edges[bucket + 2])
+            cx, cy = x[nxt].mean(), y[nxt].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        best, best_area = start, -1.0
+        for i in range(start, stop):
+            area = abs((x[previous] - cx) * (y[i] - y[previous]) - (x[previous] - x[i]) * (cy - y[previous]))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        previous = best
+    return np.array(selected + [n - 1])
+
+def test_lttb_matches_reference(solar_timeseries):
+    ts = solar_timeseries
+    rng = np.random.default_rng(1)
+    x = np.sort(rng.uniform(0, 100, 997))
+    y = rng.normal(size=997)
+    for n_out in (3, 10, 101):
+        np.testing.assert_array_equal(ts.lttb(x, y, n_out), _lttb_reference(x, y, n_out))
+
+def test_lttb_keeps_endpoints_and_spike(solar_timeseries):
+    ts = solar_timeseries
+    y = np.zeros(5000)
+    y[1234] = 100.0
+    keep = ts.lttb(np.arange(5000), y, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 4999
+    assert (np.diff(keep) > 0).all()
+    assert 1234 in keep
+
+def test_lttb_short_inputs(solar_timeseries):
+    ts = solar_timeseries
+    np.testing.assert_array_equal(ts.lttb(np.arange(5), np.arange(5), 10), np.arange(5))
+    np.testing.assert_array_equal(ts.lttb(np.arange(9), np.arange(9), 2), [0, 8])
+    assert len(ts.lttb(np.arange(9), np.arange(9), 0)) == 0
+
+def test_minmax_keeps_every_bucket_extreme(solar_timeseries):
+    ts = solar_timeseries
+    y = _series(10_007)['power_output'].to_numpy()
+    keep = ts.minmax(y, 200)
+    assert (np.diff(keep) > 0).all() and len(keep) <= 200
+    edges = np.linspace(0, len(y), 101).astype(np.int64)
+    for start, stop in zip(edges[:-1], edges[1:]):
+        inside = keep[(keep >= start) & (keep < stop)]
+        assert y[inside].min() == y[start:stop].min()
+        assert y[inside].max() == y[start:stop].max()
+
+def test_minmax_short_inputs(solar_timeseries):
+    ts = solar_timeseries
+    np.testing.assert_array_equal(ts.minmax(np.arange(10.0), 10), np.arange(10))
+    np.testing.assert_array_equal(ts.minmax(np.arange(10.0), 1), np.arange(10))
+
+def test_downsample_visible_range(solar_timeseries):
+    ts = solar_timeseries
+    df = _series()
+    x_range = (pd.Timestamp('2025-01-02'), pd.Timestamp('2025-01-04'))
+    times, values = ts.downsample(df, 'power_output', x_range, max_points=500)
+    assert len(times) == len(values) == 500
+    # one padding row either side of the range, so the line reaches the plot edges
+    assert times[0] < np.datetime64(x_range[0]) <= times[1]
+    assert times[-2] <= np.datetime64(x_range[1]) < times[-1]
+
+    times, values = ts.downsample(df, 'power_output', x_range, max_points=500, method='minmax')
+    assert len(times) <= 500
+    inside = ts.window(df, x_range)['power_output']
+    assert values.min() == inside.min() and values.max() == inside.max()
+
+    times, _ = ts.downsample(df.iloc[:100], 'power_output')
+    assert len(times) == 100
+
+def test_visible_range(solar_timeseries):
+    ts = solar_timeseries
+    assert ts.visible_range(None) is None
+    assert ts.visible_range({'xaxis.autorange': True}) is None
+    assert ts.visible_range({'dragmode': 'pan'}) is None
+    assert ts.visible_range({'xaxis.range[0]': '2025-03-01', 'xaxis.range[1]': '2025-02-01'}) == (
+        pd.Timestamp('2025-02-01'), pd.Timestamp('2025-03-01'))
+    assert ts.visible_range({'xaxis.range': ['2025-02-01 06:00', '2025-02-02']}) == (
+        pd.Timestamp('2025-02-01 06:00'), pd.Timestamp('2025-02-02'))
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['irradiance', 'power_output']
+
+def _readings(start, periods, freq='min', seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.date_range(start, periods=periods, freq=freq),
+        'irradiance': rng.uniform(0, 1000, periods),
+        'power_output': rng.normal(500, 100, periods)
+    })
+
+def _batches(df, count):
+    return [df.iloc[index] for index in np.array_split(np.arange(len(df)), count)]
+
+def test_ring_buffer_since_returns_only_unseen_rows(solar_timeseries):
+    ts = solar_timeseries
+    df = _readings('2025-01-01', 25)
+    buffer = ts.RingBuffer(COLUMNS, capacity=10)
+    times, values, seq = buffer.since(0)
+    assert len(times) == 0 and seq == 0
+
+    buffer.extend(df.iloc[:4])
+    times, values, seq = buffer.since(0)
+    np.testing.assert_array_equal(times, df['date'].iloc[:4].to_numpy())
+    np.testing.assert_array_equal(values['irradiance'], df['irradiance'].iloc[:4])
+    assert seq == 4 and len(buffer) == 4
+
+    buffer.extend(df.iloc[4:7])
+    times, values, seq = buffer.since(seq)
+    np.testing.assert_array_equal(values['power_output'], df['power_output'].iloc[4:7])
+    assert seq == 7
+    assert len(buffer.since(seq)[0]) == 0
+
+def test_ring_buffer_wraps_and_caps_stale_cursors(solar_timeseries):
+    ts = solar_timeseries
+    df = _readings('2025-01-01', 25)
+    buffer = ts.RingBuffer(COLUMNS, capacity=10)
+    buffer.extend(df.iloc[:8])
+    buffer.extend(df.iloc[8:13])  # wraps around the end of the buffer
+    times, values, seq = buffer.since(5)
+    np.testing.assert_array_equal(times, df['date'].iloc[5:13].to_numpy())
+    # a cursor older than the buffer gets the newest ``capacity`` rows
+    times, values, seq = buffer.since(0)
+    np.testing.assert_array_equal(values['irradiance'], df['irradiance'].iloc[3:13])
+    # a batch bigger than the buffer keeps its newest rows and still counts them all
+    buffer.extend(df.iloc[13:25])
+    times, values, seq = buffer.since(13)
+    assert seq == 25 and len(buffer) == 10
+    np.testing.assert_array_equal(times, df['date'].iloc[15:25].to_numpy())
+    buffer.extend(df.iloc[:0])
+    assert buffer.seq == 25
+
+def test_chunked_frame_matches_concatenated_history(solar_timeseries):
+    ts = solar_timeseries
+    df = _readings('2025-01-01', 3000)
+    frame = ts.ChunkedFrame(df.iloc[:1000])
+    for batch in _batches(df.iloc[1000:], 37):
+        frame.append(batch.sample(frac=1, random_state=2))
+    assert len(frame) == 3000
+    # binary-counter merging keeps O(log n) chunks
+    assert len(frame.chunks) <= int(np.log2(3000)) + 1
+    pd.testing.assert_frame_equal(frame.window(), df)
+
+    x_range = (pd.Timestamp('2025-01-01 10:00:30'), pd.Timestamp('2025-01-02 20:00'))
+    assert frame.count(x_range) == len(df[df['date'].between(*x_range)])
+    pd.testing.assert_frame_equal(frame.window(x_range), ts.window(df, x_range).reset_index(drop=True))
+
+def test_chunked_frame_out_of_order_batches(solar_timeseries):
+    ts = solar_timeseries
+    df = _readings('2025-01-01', 200)
+    frame = ts.ChunkedFrame(df.iloc[100:])
+    frame.append(df.iloc[:100])
+    pd.testing.assert_frame_equal(frame.window(), df)
+    assert len(ts.ChunkedFrame(df.iloc[:0]).window()) == 0
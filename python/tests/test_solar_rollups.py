@@ -0,0 +1,118 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+COLUMNS = ['irradiance', 'power_output']
+
+def _readings(start, periods, freq='10min', seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'date': pd.date_range(start, periods=periods, freq=freq),
+        'irradiance': rng.uniform(0, 1000, periods),
+        'power_output': rng.normal(500, 100, periods)
+    })
+    if periods > 3:
+        df.loc[3, 'power_output'] = np.nan
+    return df
+
+def _batches(df, count):
+    return [df.iloc[index] for index in np.array_split(np.arange(len(df)), count)]
+
+def _expected(df, freq):
+    buckets = df['date'].dt.to_period(freq).dt.start_time
+    return df[COLUMNS].groupby(buckets.to_numpy()).agg(['count', 'sum', 'min', 'max']).astype(np.float64)
+
+def test_incremental_appends_match_one_shot_rollup(solar_timeseries):
+    ts = solar_timeseries
+    df = _readings('2025-01-30 20:00', 1000)
+    # shuffled batches that overlap each other's hours, days and months
+    batches = _batches(df.sample(frac=1, random_state=1), 7)
+    pyramid = ts.RollupPyramid(batches[0], COLUMNS)
+    for batch in batches[1:]:
+        pyramid.append(batch)
+    for freq, label in ts.LEVELS:
+        pd.testing.assert_frame_equal(pyramid.rollup(label), _expected(df, freq), check_freq=False,
+                                      check_names=False, check_index_type=False)
+
+    summary = pyramid.summary('power_output')
+    values = df['power_output'].dropna()
+    assert summary['count'] == len(values)
+    assert summary['mean'] == pytest.approx(values.mean())
+    assert (summary['min'], summary['max']) == (values.min(), values.max())
+
+def test_rollup_range_and_resolution(solar_timeseries):
+    ts = solar_timeseries
+    pyramid = ts.RollupPyramid(_readings('2025-01-01', 24 * 6 * 60), COLUMNS)
+    x_range = (pd.Timestamp('2025-01-10 12:30'), pd.Timestamp('2025-01-12 00:00'))
+    hourly = pyramid.rollup('hourly', x_range)
+    assert hourly.index[0] == pd.Timestamp('2025-01-10 12:00')
+    assert hourly.index[-1] == pd.Timestamp('2025-01-12 00:00')
+    assert len(pyramid.rollup('daily', x_range)) == 3
+
+    assert pyramid.resolution(100, x_range, max_points=100) == 'raw'
+    assert pyramid.resolution(1000, x_range, max_points=100) == 'hourly'
+    assert pyramid.resolution(1000, None, max_points=100) == 'daily'
+    assert pyramid.resolution(10 ** 6, None, max_points=1) == 'monthly'
+
+def test_epoch_moves_only_when_an_hour_closes_or_is_backfilled(solar_timeseries):
+    ts = solar_timeseries
+    pyramid = ts.RollupPyramid(_readings('2025-01-01', 6), COLUMNS)
+    epoch = pyramid.epoch
+    # the readings so far fill 00:00-00:50, so hour 00 is still open
+    for minute in (52, 55, 59):
+        pyramid.append(_readings(f'2025-01-01 00:{minute}', 1))
+    assert pyramid.epoch == epoch
+    pyramid.append(_readings('2025-01-01 01:00', 1))
+    assert pyramid.epoch == epoch + 1
+    pyramid.append(_readings('2025-01-01 00:30', 1))
+    assert pyramid.epoch == epoch + 2
+    assert pyramid.version == 6
+
+def test_summary_of_empty_pyramid(solar_timeseries):
+    ts = solar_timeseries
+    pyramid = ts.RollupPyramid(_readings('2025-01-01', 0), COLUMNS)
+    assert pyramid.summary('irradiance')['count'] == 0
+    assert np.isnan(pyramid.summary('irradiance')['mean'])
+    assert pyramid.epoch == 0
+
+def test_figure_cache_is_lru(solar_timeseries):
+    ts = solar_timeseries
+    cache = ts.FigureCache(max_entries=2)
+    built = []
+
+    def factory(key):
+        return lambda: built.append(key) or key.upper()
+
+    assert cache.get_or_create('a', factory('a')) == 'A'
+    cache.get_or_create('b', factory('b'))
+    assert cache.get_or_create('a', factory('a')) == 'A'
+    cache.get_or_create('c', factory('c'))  # evicts b, the least recently used
+    assert len(cache) == 2
+    cache.get_or_create('a', factory('a'))
+    cache.get_or_create('b', factory('b'))
+    assert built == ['a', 'b', 'c', 'b']
+    assert (cache.hits, cache.misses) == (2, 4)
+    cache.clear()
+    assert len(cache) == 0
+
+def test_figure_cache_concurrent_readers(solar_timeseries):
+    ts = solar_timeseries
+    cache = ts.FigureCache(max_entries=8)
+    errors = []
+
+    def reader(seed):
+        rng = np.random.default_rng(seed)
+        for key in rng.integers(0, 16, 500):
+            if cache.get_or_create(int(key), lambda key=int(key): key * 2) != key * 2:
+                errors.append(key)
+
+    threads = [threading.Thread(target=reader, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(cache) <= 8
+    assert cache.hits + cache.misses == 2000
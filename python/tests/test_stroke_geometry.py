@@ -0,0 +1,46 @@
+import numpy as np
+
+import stroke_geometry as sg
+
+def test_circles_are_closed_rings():
+    geometry = sg.circles([(0, 0, 0), (5, 1, 0)], [1.0, 2.0], segments=8, lift=0.5)
+    assert len(geometry) == 2
+    assert geometry.vertices.shape == (16, 3)
+    assert geometry.offsets.tolist() == [0, 8, 16]
+    for stroke, center, radius in zip(geometry.strokes(), [(0, 0), (5, 1)], [1.0, 2.0]):
+        np.testing.assert_allclose(np.hypot(*(stroke[:, :2] - center).T), radius, rtol=1e-6)
+        np.testing.assert_allclose(stroke[:, 2], 0.5)
+    expected = [(i, i + 1) for i in range(7)] + [(7, 0)]
+    expected += [(8 + a, 8 + b) for a, b in expected]
+    assert sorted(map(tuple, geometry.edges.tolist())) == sorted(expected)
+
+def test_polylines_are_open_and_keep_stroke_order():
+    strokes = [np.zeros((3, 3)), np.ones((1, 3)), np.full((2, 3), 2.0)]
+    geometry = sg.polylines(strokes)
+    assert geometry.offsets.tolist() == [0, 3, 4, 6]
+    assert geometry.edges.tolist() == [[0, 1], [1, 2], [4, 5]]
+    for stroke, expected in zip(geometry.strokes(), strokes):
+        np.testing.assert_array_equal(stroke, expected)
+    assert len(sg.polylines([])) == 0
+
+def test_closed_edges_skip_short_strokes():
+    assert sg.polyline_edges([2], closed=True).tolist() == [[0, 1]]
+    assert sg.polyline_edges([3], closed=True).tolist() == [[0, 1], [1, 2], [2, 0]]
+
+def test_concat_rebases_edges_and_offsets():
+    lines = sg.lines([(0, 0, 0)], [(1, 0, 0)])
+    circles = sg.circles([(0, 0, 0)], 1.0, segments=4)
+    combined = sg.concat([lines, sg.empty(), circles])
+    assert len(combined) == 2
+    assert combined.offsets.tolist() == [0, 2, 6]
+    np.testing.assert_array_equal(combined.edges[:1], lines.edges)
+    np.testing.assert_array_equal(combined.edges[1:], circles.edges + 2)
+    np.testing.assert_array_equal(combined.stroke(1), circles.vertices)
+    assert len(sg.concat([])) == 0
+    assert (lines + circles).offsets.tolist() == [0, 2, 6]
+
+def test_keyframe_coords_interleaves_frames_and_values():
+    coords = sg.keyframe_coords([1, 50], [(0, 0, 1), (1, 1, 1)])
+    assert coords.dtype == np.float32
+    assert coords.tolist() == [[1, 0, 50, 1], [1, 0, 50, 1], [1, 1, 50, 1]]
+    assert sg.keyframe_coords([1, 2, 3], [4, 5, 6]).tolist() == [[1, 4, 2, 5, 3, 6]]